@@ -2,22 +2,37 @@
 Analytics and history endpoints
 """
 
-from fastapi import APIRouter, Depends
+import base64
+import binascii
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable, Iterable, Optional, Tuple
+from collections import Counter
 from datetime import date, datetime, timedelta
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from backend.core.security import get_current_user
+from backend.core.response_cache import ConditionalGetRoute, conditional_get
 from backend.core.storage import read_json, write_json
-from backend.core.database import get_user_history_from_db, get_db_connection, get_cached_data, set_cached_data, get_team_members_from_db
+from backend.core.database import get_user_history_from_db, get_db_connection, get_team_members_from_db, iter_history, query_history, group_history_rows
+from backend.core.bulk_db import bulk_insert_snapshots
+from backend.core.closed_weeks import closed_week_fingerprint, current_week_start, get_closed_week, last_closed_day, set_closed_week
+from backend.core.json_response import fast_json
+from backend.core.stale_cache import get_or_revalidate
+from backend.core.streaming import ndjson_response, wants_ndjson
+from backend.core.tag_stats import query_member_problem_totals, query_member_tag_counts, query_team_tag_counts
+from backend.core.weekly_deltas import DeltaRow, query_weekly_deltas
 from backend.core.config import settings
-from backend.utils.leetcodeapi import fetch_user_data, fetch_submissions_with_tags
-from backend.utils.streak_tracker import get_team_streaks, get_streak_leaderboard, get_members_at_risk
-from backend.utils.difficulty_analyzer import get_team_difficulty_trends, get_stuck_members, calculate_difficulty_trends
-from backend.utils.tag_analyzer import get_team_tag_analysis, get_team_tag_heatmap, recommend_problems_by_weak_tags
+from backend.services.tag_sync import backfill_member_tags
+from backend.utils.leetcodeapi import fetch_user_data
+from backend.utils.streak_tracker import get_team_streaks_from_active_weeks, get_streak_leaderboard, get_members_at_risk
+from backend.utils.difficulty_analyzer import get_stuck_members, matrix_difficulty_trends
+from backend.utils.history_matrix import HistoryMatrix
+from backend.utils.tag_analyzer import analyze_tag_counts, get_team_tag_analysis_from_counts, recommend_problems_by_weak_tags, team_tag_heatmap_from_counts
 from backend.utils.problem_recommender import get_personalized_recommendations, recommend_by_company
+from backend.utils.week_over_week import compute_week_over_week, fetch_live_totals
 
-router = APIRouter()
+router = APIRouter(route_class=ConditionalGetRoute)
 
 class WeeklySnapshot(BaseModel):
     week_start: str
@@ -27,44 +42,100 @@ class WeeklySnapshot(BaseModel):
     medium: int
     hard: int
 
-@router.get("/history", response_model=List[WeeklySnapshot])
-def get_history(current_user: dict = Depends(get_current_user)):
-    """Get historical weekly snapshots"""
-    # print(f"get_history called for {current_user.get('username')}")
+# /history field -> SnapshotRow position (week_start and member are always returned)
+HISTORY_API_FIELDS = {"totalSolved": 2, "easy": 3, "medium": 4, "hard": 5}
+
+
+def _split_param(value: Optional[str]) -> Optional[List[str]]:
+    """Comma-separated query parameter as a list (None when not given)"""
+    return [item.strip() for item in value.split(",") if item.strip()] if value else None
+
+
+def encode_history_cursor(member: str, week_start: str) -> str:
+    """Opaque /history cursor pointing after the given row"""
+    return base64.urlsafe_b64encode(f"{member}\n{week_start}".encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_history_cursor(cursor: str) -> Tuple[str, str]:
     try:
-        username = current_user["username"]
+        member, week_start = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8").split("\n")
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid history cursor")
+    return member, week_start
+
+
+def history_row_shaper(fields: Tuple[str, ...] = tuple(HISTORY_API_FIELDS)) -> Callable[[Any], Dict[str, Any]]:
+    """Maps a query_history row to a WeeklySnapshot-shaped dict (missing counts become 0)"""
+    keys = ("week_start", "member") + fields
+    positions = [HISTORY_API_FIELDS[field] for field in fields]
+    return lambda row: dict(zip(keys, (row[1], row[0], *[row[i] or 0 for i in positions])))
+
+
+def history_payload(rows: List[Any], fields: Tuple[str, ...] = tuple(HISTORY_API_FIELDS)) -> List[Dict[str, Any]]:
+    """WeeklySnapshot-shaped dicts straight from query_history rows"""
+    return list(map(history_row_shaper(fields), rows))
+
+
+@router.get("/history", responses={200: {"model": List[WeeklySnapshot]}})
+@conditional_get()
+def get_history(
+    request: Request,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    members: Optional[str] = None,
+    fields: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Get historical weekly snapshots, ordered by member then week.
 
+    since/until bound week_start (inclusive ISO dates); members and fields are
+    comma-separated subsets (week_start and member are always returned).
+    With limit, rows come in pages and X-Next-Cursor carries the cursor of the
+    next page until the last one. With Accept: application/x-ndjson the rows
+    are streamed one per line instead.
+    """
+    for bound in (since, until):
+        if bound:
+            try:
+                date.fromisoformat(bound)
+            except ValueError:
+                raise HTTPException(status_code=400, detail=f"Invalid date: {bound}")
+    selected = tuple(_split_param(fields) or HISTORY_API_FIELDS)
+    unknown = [field for field in selected if field not in HISTORY_API_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown history fields: {', '.join(unknown)}")
+    if limit is not None and limit < 1:
+        raise HTTPException(status_code=400, detail="limit must be at least 1")
+    after = decode_history_cursor(cursor) if cursor else None
+
+    if wants_ndjson(request):
+        shape = history_row_shaper(selected)
+        return ndjson_response(lambda: (shape(row) for row in iter_history(
+            current_user["username"], settings.STREAM_BATCH_ROWS, since=since, until=until,
+            members=_split_param(members), after=after, limit=limit, replica=True
+        )))
+
+    try:
         username = current_user["username"]
-        
-        # Fetch history from DB
-        user_history_dict = get_user_history_from_db(username)
-
-        # Flatten all snapshots from all members
-        valid_snapshots = []
-        for member_username, snapshots in user_history_dict.items():
-            if isinstance(snapshots, list):
-                for snapshot in snapshots:
-                    try:
-                        # Validate snapshot data
-                        if isinstance(snapshot, dict):
-                            # Ensure required fields exist
-                            if "week_start" in snapshot and "member" in snapshot:
-                                # Ensure numeric fields are ints
-                                snapshot["totalSolved"] = int(snapshot.get("totalSolved", 0))
-                                snapshot["easy"] = int(snapshot.get("easy", 0))
-                                snapshot["medium"] = int(snapshot.get("medium", 0))
-                                snapshot["hard"] = int(snapshot.get("hard", 0))
-                                
-                                # Try to create Pydantic model here to catch validation errors
-                                model = WeeklySnapshot(**snapshot)
-                                valid_snapshots.append(model)
-                    except Exception:
-                        continue
-
-        return valid_snapshots
+
+        # One extra row tells whether another page follows
+        rows = query_history(
+            username, since=since, until=until, members=_split_param(members), replica=True,
+            after=after, limit=limit + 1 if limit is not None else None
+        )
+        headers = {}
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            headers["X-Next-Cursor"] = encode_history_cursor(rows[-1].member, rows[-1].week_start)
+
+        # Rows come typed from SQL and are shaped directly, without a model per row
+        return fast_json(history_payload(rows, selected), headers=headers)
     except Exception as e:
         print(f"Error in get_history: {e}")
-        return []
+        return fast_json([])
 
 @router.post("/snapshot")
 async def record_snapshot(current_user: dict = Depends(get_current_user)):
@@ -82,7 +153,7 @@ async def record_snapshot(current_user: dict = Depends(get_current_user)):
     week_start = today - timedelta(days=today.weekday())
     week_start_str = week_start.isoformat()
 
-    snapshots_added = 0
+    rows = []
 
     # Fetch all member data in parallel
     with ThreadPoolExecutor(max_workers=10) as executor:
@@ -92,53 +163,37 @@ async def record_snapshot(current_user: dict = Depends(get_current_user)):
             for member in user_members
         }
 
-        # Process results as they complete
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            
-            for future in as_completed(future_to_member):
-                member = future_to_member[future]
-                member_username = member["username"]
+        # Collect results as they complete
+        for future in as_completed(future_to_member):
+            member = future_to_member[future]
+            member_username = member["username"]
 
-                try:
-                    data = future.result()
-
-                    if data:
-                        # Extract difficulty counts
-                        easy = data.get("easy", 0)
-                        medium = data.get("medium", 0)
-                        hard = data.get("hard", 0)
-                        total = data.get("totalSolved", 0)
-
-                        # Insert into DB (IGNORE if exists for this week)
-                        try:
-                            cursor.execute("""
-                            INSERT OR IGNORE INTO snapshots 
-                            (username, week_start, total_solved, easy, medium, hard, timestamp)
-                            VALUES (?, ?, ?, ?, ?, ?, ?)
-                            """, (
-                                member_username,
-                                week_start_str,
-                                total,
-                                int(easy),
-                                int(medium),
-                                int(hard),
-                                datetime.utcnow().isoformat()
-                            ))
-                            
-                            if cursor.rowcount > 0:
-                                snapshots_added += 1
-                                
-                        except Exception as e:
-                            print(f"Error inserting snapshot for {member_username}: {e}")
-
-                except Exception as e:
-                    # Log error but continue with other members
-                    import logging
-                    logger = logging.getLogger(__name__)
-                    logger.error(f"Error fetching data for {member_username}: {e}")
-            
-            conn.commit()
+            try:
+                data = future.result()
+
+                if data:
+                    rows.append({
+                        "username": member_username,
+                        "week_start": week_start_str,
+                        "totalSolved": data.get("totalSolved", 0),
+                        "easy": data.get("easy", 0),
+                        "medium": data.get("medium", 0),
+                        "hard": data.get("hard", 0),
+                        "timestamp": datetime.utcnow().isoformat()
+                    })
+
+            except Exception as e:
+                # Log error but continue with other members
+                import logging
+                logger = logging.getLogger(__name__)
+                logger.error(f"Error fetching data for {member_username}: {e}")
+
+    # Write the whole week in one transaction (existing rows for the week are kept)
+    outcomes = bulk_insert_snapshots(rows)
+    for outcome in outcomes:
+        if outcome.status == "error":
+            print(f"Error inserting snapshot for {outcome.key[0]}: {outcome.error}")
+    snapshots_added = sum(1 for o in outcomes if o.status == "inserted")
 
     return {
         "message": f"Recorded {snapshots_added} snapshots for week {week_start_str}",
@@ -146,7 +201,17 @@ async def record_snapshot(current_user: dict = Depends(get_current_user)):
         "week_start": week_start_str
     }
 
+def _trend_point(row) -> Dict[str, Any]:
+    return {
+        "week": row.week_start,
+        "total": row.total,
+        "easy": row.easy,
+        "medium": row.medium,
+        "hard": row.hard
+    }
+
 @router.get("/trends")
+@conditional_get()
 def get_trends(
     weeks: int = 12,
     current_user: dict = Depends(get_current_user)
@@ -154,350 +219,70 @@ def get_trends(
     """Get trend data for the last N weeks"""
     username = current_user["username"]
 
-    # Fetch history from DB
-    user_history_dict = get_user_history_from_db(username)
+    if weeks <= 0:
+        return {"weeks": [], "members": {}}
 
-    if not user_history_dict:
+    # Closed weeks never change: their last N snapshots per member are cached
+    # for the rest of this week, and only the open week is read per call
+    this_week = current_week_start()
+    fingerprint = closed_week_fingerprint(username)
+    closed = get_closed_week(username, "trends", this_week, weeks, fingerprint)
+    if closed is None:
+        closed = {}
+        for row in query_history(username, until=last_closed_day(), last_n=weeks):
+            closed.setdefault(row.member, []).append(_trend_point(row))
+        set_closed_week(username, "trends", closed, this_week, weeks, fingerprint)
+
+    current = {}
+    for row in query_history(username, since=this_week, replica=True):
+        current.setdefault(row.member, []).append(_trend_point(row))
+
+    if not closed and not current:
         return {"weeks": [], "members": {}}
 
-    # Group by member and extract recent weeks
     trends = {}
     all_weeks = set()
 
-    for member_username, snapshots in user_history_dict.items():
-        # Sort by week
-        sorted_snapshots = sorted(snapshots, key=lambda x: x.get("week_start", ""))
-
-        # Get last N weeks worth of snapshots
-        recent_snapshots = sorted_snapshots[-weeks:]
-
-        trends[member_username] = []
-        for snapshot in recent_snapshots:
-            week_start = snapshot.get("week_start")
-            if week_start:
-                all_weeks.add(week_start)
-                trends[member_username].append({
-                    "week": week_start,
-                    "total": snapshot.get("totalSolved", 0),
-                    # Handle both old (capitalized) and new (lowercase) keys
-                    "easy": snapshot.get("easy", snapshot.get("Easy", 0)),
-                    "medium": snapshot.get("medium", snapshot.get("Medium", 0)),
-                    "hard": snapshot.get("hard", snapshot.get("Hard", 0))
-                })
+    for member in sorted(closed.keys() | current.keys()):
+        # Only the last N snapshots per member are kept
+        points = (closed.get(member, []) + current.get(member, []))[-weeks:]
+        trends[member] = points
+        all_weeks.update(point["week"] for point in points)
 
     # Get unique weeks
-    weeks_list = sorted(list(all_weeks))[-weeks:]
+    weeks_list = sorted(all_weeks)[-weeks:]
 
-    return {
+    # Points are plain values from SQL
+    return fast_json({
         "weeks": weeks_list,
         "members": trends
-    }
+    })
 
-def get_week_over_week_internal(username: str, weeks: int = 4) -> List[Dict[str, Any]]:
-    """Internal helper to get week-over-week changes (synchronous, for Excel export)"""
-    user_history_dict = get_user_history_from_db(username)
-
-    if not user_history_dict:
-        return []
-
-    today = date.today()
-    changes = []
-
-    # Get members from DB
-    user_members_raw = get_team_members_from_db(username)
-    # Filter out suspended members
-    user_members = [m for m in user_members_raw if m.get("status", "active") != "suspended"]
-
-    # For each of the last N weeks, compare with the previous week
-    for week_offset in range(weeks):
-        current_week_start = (today - timedelta(days=today.weekday() + (week_offset * 7))).isoformat()
-        previous_week_start = (today - timedelta(days=today.weekday() + ((week_offset + 1) * 7))).isoformat()
-
-        # Extract data for each member for this specific week pair
-        current_week_data = {}
-        previous_week_data = {}
-
-        # First populate from history
-        # First populate from history
-        current_week_ranks = {}
-        previous_week_ranks = {}
-        
-        for member_username, snapshots in user_history_dict.items():
-            # Filter and sort snapshots for this user
-            user_snaps = sorted(snapshots, key=lambda x: x.get("week_start", ""), reverse=True)
-            
-            # Find current week snapshot
-            curr_snap = next((s for s in user_snaps if s.get("week_start") == current_week_start), None)
-            
-            # Find previous week snapshot (strict match first)
-            prev_snap = next((s for s in user_snaps if s.get("week_start") == previous_week_start), None)
-            
-            # Fallback: if strictly previous is missing, find the most recent snapshot BEFORE current week
-            if not prev_snap:
-                prev_snap = next((s for s in user_snaps if s.get("week_start", "") < current_week_start), None)
-
-            if curr_snap:
-                current_week_data[member_username] = curr_snap.get("totalSolved", 0)
-                # Extract rank if available
-                if curr_snap.get("rank"):
-                    current_week_ranks[member_username] = curr_snap.get("rank")
-                    
-            if prev_snap:
-                previous_week_data[member_username] = prev_snap.get("totalSolved", 0)
-                # Extract rank if available
-                if prev_snap.get("rank"):
-                    previous_week_ranks[member_username] = prev_snap.get("rank")
-
-        # Calculate ranks for members without saved ranks (fallback for current week or missing data)
-        if not current_week_ranks:
-            current_week_ranks = {
-                m: i + 1 
-                for i, (m, _) in enumerate(sorted(current_week_data.items(), key=lambda x: x[1], reverse=True))
-            }
-        if not previous_week_ranks:
-            previous_week_ranks = {
-                m: i + 1 
-                for i, (m, _) in enumerate(sorted(previous_week_data.items(), key=lambda x: x[1], reverse=True))
-            }
-
-        # For current week (week_offset=0), fetch live data for members without snapshots
-        if week_offset == 0:
-            for member_info in user_members:
-                member = member_info["username"]
-                if member not in current_week_data or current_week_data.get(member, 0) == 0:
-                    try:
-                        live_data = fetch_user_data(member)
-                        if live_data:
-                            current_val = live_data.get("totalSolved", 0)
-                            if current_val > 0:
-                                current_week_data[member] = current_val
-                    except Exception:
-                        pass
-            
-            # Recalculate ranks after fetching all live data
-            current_week_ranks = {
-                m: i + 1 
-                for i, (m, _) in enumerate(sorted(current_week_data.items(), key=lambda x: x[1], reverse=True))
-            }
-
-        # Iterate over ALL configured members to build response
-        for member_info in user_members:
-            member = member_info["username"]
-            
-            # Get values (default to 0)
-            current_val = current_week_data.get(member, 0)
-            previous_val = previous_week_data.get(member, 0)
-            
-            change = current_val - previous_val
-            
-            # Calculate percentage change
-            if previous_val > 0:
-                pct_change = (change / previous_val) * 100
-            elif current_val > 0:
-                pct_change = 100.0
-            else:
-                pct_change = 0.0
-                
-            # Calculate rank delta
-            current_rank = current_week_ranks.get(member)
-            previous_rank = previous_week_ranks.get(member)
-            
-            rank_delta = 0
-            if current_rank and previous_rank:
-                rank_delta = previous_rank - current_rank
-
-            # Format week date
-            week_date_obj = date.fromisoformat(current_week_start)
-            formatted_week = week_date_obj.strftime("%b %d, %Y")
-
-            changes.append({
-                "week": formatted_week,
-                "member": member,
-                "previous": previous_val,
-                "current": current_val,
-                "change": change,
-                "pct_change": round(pct_change, 1),
-                "rank": current_rank if current_rank else 0,
-                "rank_delta": rank_delta
-            })
+def week_over_week_result(
+    username: str,
+    weeks: int = 1,
+    profiles: Optional[Dict[str, Optional[dict]]] = None,
+    user_members_raw: Optional[List[dict]] = None,
+    recent_deltas: Optional[List[DeltaRow]] = None,
+) -> List[Dict[str, Any]]:
+    """Rows of /week-over-week (also used by the dashboard bundle, which passes what it already loaded)"""
+    changes = compute_week_over_week(username, weeks, profiles, user_members_raw, recent_deltas)
 
+    # Sort by week (descending) then by current total (descending)
+    changes.sort(key=lambda x: (x["week"], x["current"]), reverse=True)
     return changes
 
 @router.get("/week-over-week")
+@conditional_get(live_seconds=60)
 def get_week_over_week(
     weeks: int = 1,
     current_user: dict = Depends(get_current_user)
 ):
     """Get week-over-week changes for team members"""
-    username = current_user["username"]
-
-    # Fetch history from DB
-    user_history_dict = get_user_history_from_db(username)
-
-    if not user_history_dict:
-        return []
-
-    today = date.today()
-    changes = []
-    
-    # Get all members from DB
-    user_members_raw = get_team_members_from_db(username)
-    # Filter out suspended members
-    user_members = [m for m in user_members_raw if m.get("status", "active") != "suspended"]
-    user_members_dict = {m["username"]: m for m in user_members}
-
-    # Iterate through requested number of weeks
-    for w in range(weeks):
-        # Calculate week starts for this iteration
-        # w=0 -> this week vs last week
-        # w=1 -> last week vs 2 weeks ago
-        current_week_start = (today - timedelta(days=today.weekday() + 7 * w)).isoformat()
-        previous_week_start = (today - timedelta(days=today.weekday() + 7 * (w + 1))).isoformat()
-
-        # Extract data for each member for this specific week pair
-        current_week_data = {}
-        previous_week_data = {}
-
-        # First, process existing history
-        # First, process existing history
-        for member_username, snapshots in user_history_dict.items():
-            # Sort snapshots
-            user_snaps = sorted(snapshots, key=lambda x: x.get("week_start", ""), reverse=True)
-            
-            # Find current week snapshot
-            curr_snap = next((s for s in user_snaps if s.get("week_start") == current_week_start), None)
-            
-            # Find previous week snapshot (strict match first)
-            prev_snap = next((s for s in user_snaps if s.get("week_start") == previous_week_start), None)
-            
-            # Fallback for previous week if missing (find most recent BEFORE current week)
-            if not prev_snap:
-                target_date = current_week_start
-                # If current week snapshot is missing too, we assume "current" is today
-                # but we need strictly before "expected current week start"
-                prev_snap = next((s for s in user_snaps if s.get("week_start", "") < target_date), None)
-            
-            if curr_snap:
-                current_week_data[member_username] = curr_snap.get("totalSolved", 0)
-            if prev_snap:
-                previous_week_data[member_username] = prev_snap.get("totalSolved", 0)
-        
-        
-        # Calculate ranks for this week pair
-        current_week_ranks = {
-            m: i + 1 
-            for i, (m, _) in enumerate(sorted(current_week_data.items(), key=lambda x: x[1], reverse=True))
-        }
-        previous_week_ranks = {
-            m: i + 1 
-            for i, (m, _) in enumerate(sorted(previous_week_data.items(), key=lambda x: x[1], reverse=True))
-        }
-
-        # For current week (w=0), fetch live data for members without snapshots
-        if w == 0:
-            for member_info in user_members:
-                member = member_info["username"]
-                if member not in current_week_data or current_week_data.get(member, 0) == 0:
-                    try:
-                        live_data = fetch_user_data(member)
-                        if live_data:
-                            current_val = live_data.get("totalSolved", 0)
-                            if current_val > 0:
-                                current_week_data[member] = current_val
-                    except Exception:
-                        pass
-            
-            # Recalculate ranks after fetching all live data
-            current_week_ranks = {
-                m: i + 1 
-                for i, (m, _) in enumerate(sorted(current_week_data.items(), key=lambda x: x[1], reverse=True))
-            }
-
-        # Iterate over ALL configured members to build response
-        for member_info in user_members:
-            member = member_info["username"]
-            
-            # Get values (default to 0 if not found)
-            current_val = current_week_data.get(member, 0)
-            previous_val = previous_week_data.get(member, 0)
-
-            change = current_val - previous_val
-            
-            # Calculate percentage change
-            if previous_val > 0:
-                pct_change = (change / previous_val) * 100
-            elif current_val > 0:
-                pct_change = 100.0
-            else:
-                pct_change = 0.0
-                
-            # Calculate rank delta
-            current_rank = current_week_ranks.get(member)
-            previous_rank = previous_week_ranks.get(member)
-            
-            rank_delta = 0
-            if current_rank and previous_rank:
-                rank_delta = previous_rank - current_rank
-
-            # Format week date
-            week_date_obj = date.fromisoformat(current_week_start)
-            formatted_week = week_date_obj.strftime("%b %d, %Y")
-
-            changes.append({
-                "week": formatted_week,
-                "member": member,
-                "previous": previous_val,
-                "current": current_val,
-                "change": change,
-                "pct_change": round(pct_change, 1),
-                "rank": current_rank if current_rank else 0,
-                "rank_delta": rank_delta
-            })
-
-    # Sort by week (descending) then by current total (descending)
-    # Since we iterate weeks 0, 1, 2... they are already in date desc order.
-    # We just need to sort by rank within each week.
-    # Actually, let's sort by date desc, then rank asc (which is total desc)
-    changes.sort(key=lambda x: (x["week"], x["current"]), reverse=True)
-    # Wait, date string sort might be wrong if format is "Nov 03". 
-    # But we iterate w=0, 1, 2. w=0 is latest.
-    # If we append in order, they are grouped by week.
-    # But we want to sort strictly.
-    # Let's rely on the fact that we generate them in order.
-    # We just need to sort by rank WITHIN each block?
-    # Actually, simpler: just sort by current total descending, but that mixes weeks?
-    # No, we want to see Week 1 grouped, then Week 2 grouped.
-    # Since we append w=0 first, then w=1, the list is implicitly ordered by week descending.
-    # We just need to sort by rank WITHIN each week.
-    # But `changes.sort` is stable.
-    # So if we sort by `current` descending, it might mix weeks if we don't include week in key.
-    # Let's sort by (week_index, current_desc).
-    # But we don't have week_index in the dict.
-    # Let's just trust the generation order for weeks, and sort by current for members?
-    # No, `changes.sort` will reorder everything.
-    
-    # Let's re-sort properly.
-    # We need a sortable date.
-    # Let's add `week_start_iso` to the dict for sorting, then remove it? Or just keep it.
-    # Or just sort by `current` desc, and rely on stable sort?
-    # If we sort by `current` desc, we lose the week grouping.
-    
-    # Correct approach:
-    # We want primary sort key: Week (descending)
-    # Secondary sort key: Rank (ascending) / Total (descending)
-    
-    # Since "Nov 03" is not easily sortable as string, let's use the loop index logic implicitly.
-    # Actually, I can just sort the `changes` list at the end?
-    # But I don't have the ISO date in the dict.
-    # Let's add `week_sort` key.
-    
-    # Re-writing the loop slightly to include sort key.
-    pass # (This is just thought process, I will implement it in the code block)
-
-    # I will add a hidden sort key `_sort_date`
-    return changes
+    return week_over_week_result(current_user["username"], weeks)
 
 @router.get("/weekly-progress")
+@conditional_get(live_seconds=60)
 def get_weekly_progress(
     weeks: int = 12,
     current_user: dict = Depends(get_current_user)
@@ -508,14 +293,8 @@ def get_weekly_progress(
     """
     username = current_user["username"]
     
-    # Load history
-    # Fetch history from DB
-    user_history_dict = get_user_history_from_db(username)
-    
-
-    
     # Get team members for names
-    user_members_raw = get_team_members_from_db(username)
+    user_members_raw = get_team_members_from_db(username, replica=True)
     # Filter out suspended members
     user_members = [m for m in user_members_raw if m.get("status", "active") != "suspended"]
     member_names = {m["username"]: m.get("name", m["username"]) for m in user_members}
@@ -532,56 +311,55 @@ def get_weekly_progress(
         all_weeks.append(current.isoformat())
         current += timedelta(weeks=1)
     
+    if not all_weeks:
+        return {"weeks": [], "members": {}}
+    
+    # Determine current week to potentially use live data
+    current_week_iso = end_week.isoformat()
+    closed_weeks = all_weeks[:-1]
+    
+    # The forward-filled closed weeks are cached for the rest of this week
+    # ({member: [values]}, members without snapshots in range are all zeros)
+    fingerprint = closed_week_fingerprint(username)
+    closed_series = get_closed_week(username, "progress", current_week_iso, weeks, fingerprint)
+    if closed_series is None:
+        closed_series = {}
+        if closed_weeks:
+            # Load only the snapshots inside the displayed range
+            matrix = HistoryMatrix.from_rows(
+                query_history(username, since=closed_weeks[0], until=last_closed_day(today)),
+                weeks=closed_weeks
+            )
+            closed_series = dict(zip(matrix.members, matrix.forward_filled().astype(int).tolist()))
+        set_closed_week(username, "progress", closed_series, current_week_iso, weeks, fingerprint)
+    
+    current_snapshots = {
+        s.member: s.total
+        for s in query_history(username, since=current_week_iso, until=current_week_iso, replica=True)
+    }
+    
+    # No snapshot this week and nothing to forward (new members):
+    # show their live totals instead of 0, fetched in one batch
+    live_totals = fetch_live_totals(
+        m["username"] for m in user_members
+        if m["username"] not in current_snapshots and not (closed_series.get(m["username"]) or [0])[-1]
+    )
+    
     # Process each member with forward-fill
     members_data = {}
     
     # Iterate over ALL members
     for member in user_members:
         member_username = member["username"]
-        snapshots = user_history_dict.get(member_username, [])
-        
-        # Sort snapshots by week
-        sorted_snapshots = sorted(snapshots, key=lambda x: x.get("week_start", ""))
-        
-        # Create lookup dict
-        snapshot_dict = {s["week_start"]: s["totalSolved"] for s in sorted_snapshots}
+        filled_data = list(closed_series.get(member_username) or [0] * len(closed_weeks))
+        last_value = filled_data[-1] if filled_data else 0
         
-        # Forward-fill algorithm
-        filled_data = []
-        last_value = 0
+        if member_username in current_snapshots:
+            last_value = current_snapshots[member_username]
+        else:
+            last_value = live_totals.get(member_username, last_value)
         
-        # Determine current week to potentially use live data
-        current_week_iso = end_week.isoformat()
-        
-        for week in all_weeks:
-            if week in snapshot_dict:
-                last_value = snapshot_dict[week]
-            
-            # If it's the current week and we have 0 (or just forwarded), let's try to get live/cached data
-            # Only if we don't have a real snapshot for this week
-            if week == current_week_iso and week not in snapshot_dict:
-                # Try to get live data from cache to avoid heavy api calls
-                # We can't actuall call async fetch here easily without changing architecture
-                # But we can check if we have it in memory or just use last value
-                
-                # For now, let's leave it as forward-fill. 
-                # If we want live data here, we'd need to fetch_user_data which is slow if not parallel.
-                # However, the user specifically complained about "Showing 0".
-                # If last_value is 0 (new member), we should try to get it.
-                if last_value == 0:
-                    try:
-                        # Try cache first (implicit in fetch_user_data usually? No, fetch_user_data calls external)
-                        # We use get_cached_data? No, fetch_user_data does internal caching.
-                        # We should try to use fetch_user_data but it might be slow for 12 weeks graph?
-                        # Actually this is just one point per member.
-                        # Let's do it only if 0, which is the case for new members.
-                        live_data = fetch_user_data(member_username)
-                        if live_data and live_data.get("totalSolved"):
-                            last_value = live_data.get("totalSolved")
-                    except:
-                        pass
-                
-            filled_data.append(last_value)
+        filled_data.append(last_value)
         
         members_data[member_username] = {
             "name": member_names.get(member_username, member_username),
@@ -593,28 +371,13 @@ def get_weekly_progress(
         "members": members_data
     }
 
-@router.get("/accepted-trend")
-def get_accepted_trend(
-    days: int = 30,
-    current_user: dict = Depends(get_current_user)
-):
-    """
-    Get daily accepted problems trend.
-    Uses GraphQL API to fetch recent submissions and aggregates by day.
-    """
+def _compute_accepted_trend(user_members: List[dict], days: int) -> List[Dict[str, Any]]:
+    """Accepted problems per member per day over the last N days (from recent submissions)"""
     import logging
     from backend.utils.leetcodeapi import fetch_recent_submissions
     from collections import defaultdict
 
     logger = logging.getLogger(__name__)
-    username = current_user["username"]
-
-    # Get team members
-    # Get team members from DB
-    user_members = get_team_members_from_db(username)
-
-    if not user_members:
-        return []
 
     # Calculate date range
     end_date = date.today()
@@ -622,13 +385,6 @@ def get_accepted_trend(
 
     logger.info(f"Fetching accepted trend for {len(user_members)} members from {start_date} to {end_date}")
     
-    # Check cache
-    cache_key = f"accepted_trend_{username}_{days}"
-    cached_result = get_cached_data(cache_key, ttl_seconds=3600)
-    if cached_result:
-        logger.info("Returning cached accepted trend data")
-        return cached_result
-
     result = []
 
     # Fetch submissions for each member - PARALLELIZED
@@ -698,50 +454,112 @@ def get_accepted_trend(
 
     logger.info(f"Returning {len(result)} daily data points. Date range: {result[0]['date'] if result else 'N/A'} to {result[-1]['date'] if result else 'N/A'}")
 
-    # Save to cache
-    set_cached_data(cache_key, result)
+    return result
+
+def accepted_trend_result(username: str, days: int = 30) -> Tuple[List[Dict[str, Any]], Optional[float]]:
+    """
+    Accepted trend of username's team and its age in seconds, None without
+    members (also used by the cache warmer). Served from cache while a background task recomputes
+    it once stale.
+    """
+    # Get team members from DB
+    user_members = get_team_members_from_db(username, replica=True)
+
+    if not user_members:
+        return [], None
+
+    return get_or_revalidate(
+        f"accepted_trend_{username}_{days}",
+        username,
+        lambda: _compute_accepted_trend(user_members, days),
+        fresh_seconds=settings.SWR_FRESH_SECONDS,
+    )
 
+@router.get("/accepted-trend")
+@conditional_get(live_seconds=300)
+def get_accepted_trend(
+    response: Response,
+    days: int = 30,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Get daily accepted problems trend.
+    Uses GraphQL API to fetch recent submissions and aggregates by day.
+    """
+    result, age = accepted_trend_result(current_user["username"], days)
+    if age is not None:
+        response.headers["X-Data-Age"] = str(int(age))
     return result
 
 
 # ==================== NEW STREAK TRACKING ENDPOINTS ====================
 
+def _team_streaks(username: str, active_usernames: set, recent_deltas: Optional[List[DeltaRow]] = None) -> List[Dict[str, Any]]:
+    """
+    Streaks of the active members, from precomputed weekly deltas.
+
+    Active weeks before the open one are cached for the rest of the week;
+    only this week's delta rows are read per call (or taken from recent_deltas).
+    """
+    this_week = current_week_start()
+    fingerprint = closed_week_fingerprint(username)
+    closed = get_closed_week(username, "active_weeks", this_week, fingerprint)
+    if closed is None:
+        closed = {
+            member: [d.week_start for d in deltas if d.solved_delta > 0]
+            for member, deltas in group_history_rows(
+                query_weekly_deltas(username, until=last_closed_day())
+            ).items()
+        }
+        set_closed_week(username, "active_weeks", closed, this_week, fingerprint)
+
+    if recent_deltas is None:
+        recent_deltas = query_weekly_deltas(username, since=this_week, members=active_usernames, replica=True)
+    open_deltas = group_history_rows(
+        d for d in recent_deltas if d.week_start >= this_week and d.member in active_usernames
+    )
+
+    return get_team_streaks_from_active_weeks({
+        member: closed.get(member, []) + [d.week_start for d in open_deltas.get(member, []) if d.solved_delta > 0]
+        for member in sorted((closed.keys() & active_usernames) | open_deltas.keys())
+    })
+
+
+def named_team_streaks(
+    username: str,
+    user_members_raw: Optional[List[dict]] = None,
+    recent_deltas: Optional[List[DeltaRow]] = None,
+) -> List[Dict[str, Any]]:
+    """Streaks of the team's non-suspended members, each with the member's name"""
+    if user_members_raw is None:
+        user_members_raw = get_team_members_from_db(username, replica=True)
+    # Filter out suspended members
+    member_names = {
+        m["username"]: m.get("name", m["username"])
+        for m in user_members_raw if m.get("status", "active") != "suspended"
+    }
+    
+    team_streaks = _team_streaks(username, set(member_names), recent_deltas)
+    
+    # Filter for active members only and add names
+    return [
+        {**streak, "name": member_names.get(streak["member"], streak["member"])}
+        for streak in team_streaks if streak["member"] in member_names
+    ]
+
+
 @router.get("/streaks")
+@conditional_get()
 def get_streaks(current_user: dict = Depends(get_current_user)):
     """
     Get streak data for all team members.
     Returns current streak, longest streak, and streak status for each member.
     """
-    username = current_user["username"]
-    
-    # Load history
-    # Fetch history from DB
-    user_history_dict = get_user_history_from_db(username)
-    
-    if not user_history_dict:
-        return []
-    
-    # Get member names for active filtering
-    user_members_raw = get_team_members_from_db(username)
-    # Filter out suspended members
-    user_members = [m for m in user_members_raw if m.get("status", "active") != "suspended"]
-    member_names = {m["username"]: m.get("name", m["username"]) for m in user_members}
-    active_usernames = set(member_names.keys())
-    
-    # Calculate streaks for all members
-    team_streaks = get_team_streaks(user_history_dict)
-    
-    # Filter for active members only
-    active_streaks = [s for s in team_streaks if s["member"] in active_usernames]
-    
-    # Add names to streak data
-    for streak in active_streaks:
-        streak["name"] = member_names.get(streak["member"], streak["member"])
-    
-    return active_streaks
+    return named_team_streaks(current_user["username"])
 
 
 @router.get("/streaks/leaderboard")
+@conditional_get()
 def get_streaks_leaderboard(
     limit: int = 10,
     current_user: dict = Depends(get_current_user)
@@ -749,80 +567,29 @@ def get_streaks_leaderboard(
     """
     Get streak leaderboard showing top members by current streak.
     """
-    username = current_user["username"]
-    
-    # Load history
-    # Fetch history from DB
-    user_history_dict = get_user_history_from_db(username)
-    
-    if not user_history_dict:
-        return []
-    
-    # Get team members from DB
-    user_members_raw = get_team_members_from_db(username)
-    # Filter out suspended members
-    user_members = [m for m in user_members_raw if m.get("status", "active") != "suspended"]
-    member_names = {m["username"]: m.get("name", m["username"]) for m in user_members}
-    active_usernames = set(member_names.keys())
-    
-    # Calculate streaks
-    team_streaks = get_team_streaks(user_history_dict)
+    # Get leaderboard from the active members' streaks
+    leaderboard = get_streak_leaderboard(named_team_streaks(current_user["username"]), limit)
     
-    # Filter for active members only
-    active_streaks = [s for s in team_streaks if s["member"] in active_usernames]
-    
-    # Get leaderboard from filtered list
-    leaderboard = get_streak_leaderboard(active_streaks, limit)
-    
-    # Add names and rank
+    # Add rank
     for i, streak in enumerate(leaderboard):
-        streak["name"] = member_names.get(streak["member"], streak["member"])
         streak["rank"] = i + 1
     
     return leaderboard
 
 
 @router.get("/streaks/at-risk")
+@conditional_get()
 def get_streaks_at_risk(current_user: dict = Depends(get_current_user)):
     """
     Get members whose streaks are about to break (haven't solved in 1-2 weeks).
     """
-    username = current_user["username"]
-    
-    # Load history
-    # Fetch history from DB
-    user_history_dict = get_user_history_from_db(username)
-    
-    if not user_history_dict:
-        return []
-    
-    # Get member names for active filtering
-    # Get team members from DB
-    user_members_raw = get_team_members_from_db(username)
-    # Filter out suspended members
-    user_members = [m for m in user_members_raw if m.get("status", "active") != "suspended"]
-    member_names = {m["username"]: m.get("name", m["username"]) for m in user_members}
-    active_usernames = set(member_names.keys())
-    
-    # Calculate streaks
-    team_streaks = get_team_streaks(user_history_dict)
-    
-    # Filter for active members only
-    active_streaks = [s for s in team_streaks if s["member"] in active_usernames]
-    
-    # Get at-risk from filtered list
-    at_risk = get_members_at_risk(active_streaks)
-    
-    # Add names
-    for streak in at_risk:
-        streak["name"] = member_names.get(streak["member"], streak["member"])
-    
-    return at_risk
+    return get_members_at_risk(named_team_streaks(current_user["username"]))
 
 
 # ==================== DIFFICULTY TRENDS ENDPOINTS ====================
 
 @router.get("/difficulty-trends")
+@conditional_get()
 def get_difficulty_trends(current_user: dict = Depends(get_current_user)):
     """
     Get difficulty distribution trends for all team members.
@@ -830,38 +597,33 @@ def get_difficulty_trends(current_user: dict = Depends(get_current_user)):
     """
     username = current_user["username"]
     
-    # Load history
-    # Fetch history from DB
-    user_history_dict = get_user_history_from_db(username)
-    
-    if not user_history_dict:
-        return []
-    
     # Get member names
-    user_members_raw = get_team_members_from_db(username)
+    user_members_raw = get_team_members_from_db(username, replica=True)
     # Filter out suspended members
     user_members = [m for m in user_members_raw if m.get("status", "active") != "suspended"]
     member_names = {m["username"]: m.get("name", m["username"]) for m in user_members}
     
-    # Calculate difficulty trends for all members
-    team_trends = []
-    for member in user_members:
-        member_username = member["username"]
-        member_history = user_history_dict.get(member_username, [])
-        
-        # Calculate trends even if history is empty
-        trend_data = calculate_difficulty_trends(member_history)
-        
-        team_trends.append({
-            "member": member_username,
-            "name": member_names.get(member_username, member_username),
-            **trend_data
-        })
+    # Load history for active members only
+    rows = query_history(username, members=member_names.keys(), replica=True)
     
-    return team_trends
+    if not rows:
+        return []
+    
+    # Calculate difficulty trends for all members at once (even those without history)
+    member_trends = matrix_difficulty_trends(HistoryMatrix.from_rows(rows, members=member_names.keys()))
+    
+    return [
+        {
+            "member": member["username"],
+            "name": member_names.get(member["username"], member["username"]),
+            **member_trends[member["username"]]
+        }
+        for member in user_members
+    ]
 
 
 @router.get("/difficulty-trends/stuck")
+@conditional_get()
 def get_stuck_on_difficulty(current_user: dict = Depends(get_current_user)):
     """
     Get members who are stuck on a particular difficulty level.
@@ -871,17 +633,20 @@ def get_stuck_on_difficulty(current_user: dict = Depends(get_current_user)):
     
     # Load history
     # Fetch history from DB
-    user_history_dict = get_user_history_from_db(username)
+    rows = query_history(username, replica=True)
     
-    if not user_history_dict:
+    if not rows:
         return []
     
     # Calculate difficulty trends
-    team_trends = get_team_difficulty_trends(user_history_dict)
+    team_trends = [
+        {"member": member, **trend_data}
+        for member, trend_data in matrix_difficulty_trends(HistoryMatrix.from_rows(rows)).items()
+    ]
     stuck_members = get_stuck_members(team_trends)
     
     # Get member names for active filtering
-    user_members_raw = get_team_members_from_db(username)
+    user_members_raw = get_team_members_from_db(username, replica=True)
     # Filter out suspended members
     user_members = [m for m in user_members_raw if m.get("status", "active") != "suspended"]
     member_names = {m["username"]: m.get("name", m["username"]) for m in user_members}
@@ -895,148 +660,77 @@ def get_stuck_on_difficulty(current_user: dict = Depends(get_current_user)):
 
 # ==================== PROBLEM TAGS ANALYSIS ENDPOINTS ====================
 
-@router.get("/tags/analysis")
-def get_tags_analysis(
-    limit: int = 100,
-    current_user: dict = Depends(get_current_user)
-):
+def _tag_reads_use_replica(usernames: Iterable[str]) -> bool:
     """
-    Get problem tags analysis for all team members.
-    Shows which topics members are solving and identifies skill gaps.
-    
-    Note: This endpoint fetches recent submissions with tags, which may take longer.
+    Backfill members whose tags were never synced, then tell whether tag
+    reads may use the replica (not when the backfill just wrote new rows).
     """
-    username = current_user["username"]
-    
+    return not backfill_member_tags(usernames)
+
+
+def tags_analysis_result(username: str) -> List[Dict[str, Any]]:
+    """Tag analysis of username's active members, from the stored tag aggregates"""
     # Get team members from DB
-    user_members_raw = get_team_members_from_db(username)
+    user_members_raw = get_team_members_from_db(username, replica=True)
     # Filter out suspended members
     user_members = [m for m in user_members_raw if m.get("status", "active") != "suspended"]
     
     if not user_members:
         return []
-        
-    # Check cache
-    cache_key = f"tags_analysis_{username}_{limit}"
-    cached_result = get_cached_data(cache_key, ttl_seconds=3600)
-    if cached_result:
-        return cached_result
-    
-    # Fetch submissions with tags for each member (parallelized)
-    member_submissions = {}
-    
-    with ThreadPoolExecutor(max_workers=5) as executor:
-        future_to_member = {
-            executor.submit(fetch_submissions_with_tags, member["username"], limit): member
-            for member in user_members
-        }
-        
-        for future in as_completed(future_to_member):
-            member = future_to_member[future]
-            member_username = member["username"]
-            
-            try:
-                submissions = future.result()
-                member_submissions[member_username] = submissions
-            except Exception as e:
-                import logging
-                logger = logging.getLogger(__name__)
-                logger.error(f"Error fetching tags for {member_username}: {e}")
-                member_submissions[member_username] = []
     
-    # Analyze tags for all members
-    team_analysis = get_team_tag_analysis(member_submissions)
+    replica = _tag_reads_use_replica(m["username"] for m in user_members)
+    team_analysis = get_team_tag_analysis_from_counts(
+        query_member_tag_counts(username, replica=replica),
+        query_member_problem_totals(username, replica=replica),
+        [m["username"] for m in user_members]
+    )
     
     # Add member names
     member_names = {m["username"]: m.get("name", m["username"]) for m in user_members}
     for analysis in team_analysis:
         analysis["name"] = member_names.get(analysis["member"], analysis["member"])
     
-    # Save to cache
-    set_cached_data(cache_key, team_analysis)
-    
     return team_analysis
 
 
-@router.get("/tags/heatmap")
-def get_tags_heatmap(
-    limit: int = 100,
-    current_user: dict = Depends(get_current_user)
-):
-    """
-    Get heatmap data for tags.
+def member_tag_analysis(username: str, member_username: str) -> Dict[str, Any]:
+    """Tag analysis of one member of username's team, from the stored tag aggregates"""
+    replica = _tag_reads_use_replica([member_username])
+    tag_counts = query_member_tag_counts(username, [member_username], replica=replica)
+    totals = query_member_problem_totals(username, [member_username], replica=replica)
+    return analyze_tag_counts(tag_counts.get(member_username, Counter()), totals.get(member_username, 0))
+
+
+@router.get("/tags/analysis")
+@conditional_get()
+def get_tags_analysis(current_user: dict = Depends(get_current_user)):
     """
-    username = current_user["username"]
-    
-    # Check cache
-    cache_key = f"tags_heatmap_{username}_{limit}"
-    cached_result = get_cached_data(cache_key, ttl_seconds=3600)
-    if cached_result:
-        return cached_result
-        
-    # Reuse get_tags_analysis logic or call it directly?
-    # get_tags_analysis returns a list of dicts.
-    # Heatmap logic is likely different.
-    # Let's see the implementation.
+    Get problem tags analysis for all team members.
+    Shows which topics members are solving and identifies skill gaps.
     
-    # (Implementation continues...)
+    Counts cover every accepted problem recorded for a member (kept current
+    by the scheduler's submission check).
+    """
+    return tags_analysis_result(current_user["username"])
+
+
+@router.get("/tags/heatmap")
+@conditional_get()
+def get_tags_heatmap(current_user: dict = Depends(get_current_user)):
     """
     Get team-wide tag coverage heatmap.
     Shows collective strengths and weaknesses across all members.
     """
     username = current_user["username"]
-    
-    # Get team members from DB
-    user_members_raw = get_team_members_from_db(username)
-    # Filter out suspended members
-    user_members = [m for m in user_members_raw if m.get("status", "active") != "suspended"]
-    
-    if not user_members:
-        return {
-            "team_strengths": [],
-            "team_weaknesses": [],
-            "team_coverage_score": 0,
-            "total_unique_tags": 0,
-            "total_problems": 0
-        }
-    
-    # Fetch submissions with tags for each member
-    member_submissions = {}
-    
-    with ThreadPoolExecutor(max_workers=5) as executor:
-        future_to_member = {
-            executor.submit(fetch_submissions_with_tags, member["username"], limit): member
-            for member in user_members
-        }
-        
-        for future in as_completed(future_to_member):
-            member = future_to_member[future]
-            member_username = member["username"]
-            
-            try:
-                submissions = future.result()
-                member_submissions[member_username] = submissions
-            except Exception as e:
-                import logging
-                logger = logging.getLogger(__name__)
-                logger.error(f"Error fetching tags for {member_username}: {e}")
-                member_submissions[member_username] = []
-    
-    # Analyze tags
-    team_analysis = get_team_tag_analysis(member_submissions)
-    heatmap = get_team_tag_heatmap(team_analysis)
-    
-    # Save to cache
-    set_cached_data(cache_key, heatmap)
-    
-    return heatmap
+    active = [m["username"] for m in get_team_members_from_db(username, replica=True) if m.get("status", "active") != "suspended"]
+    return team_tag_heatmap_from_counts(query_team_tag_counts(username, replica=_tag_reads_use_replica(active)))
 
 
 @router.get("/tags/recommendations/{member_username}")
+@conditional_get()
 async def get_tag_recommendations(
     member_username: str,
     difficulty: str = "medium",
-    limit: int = 100,
     current_user: dict = Depends(get_current_user)
 ):
     """
@@ -1045,23 +739,18 @@ async def get_tag_recommendations(
     Args:
         member_username: Username of the member
         difficulty: Preferred difficulty (easy/medium/hard)
-        limit: Number of submissions to analyze
     """
     username = current_user["username"]
     
     # Verify member belongs to user's team
-    user_members = get_team_members_from_db(username)
+    user_members = get_team_members_from_db(username, replica=True)
     member_usernames = [m["username"] for m in user_members]
     
     if member_username not in member_usernames:
         return {"error": "Member not found in your team"}
     
-    # Fetch submissions with tags
-    submissions = fetch_submissions_with_tags(member_username, limit)
-    
-    # Analyze tags
-    from backend.utils.tag_analyzer import analyze_problem_tags
-    analysis = analyze_problem_tags(submissions)
+    # May fetch the member's submissions (first read), so off the event loop
+    analysis = await run_in_threadpool(member_tag_analysis, username, member_username)
     
     # Generate recommendations
     recommendations = recommend_problems_by_weak_tags(
@@ -1080,6 +769,7 @@ async def get_tag_recommendations(
 # ==================== PROBLEM RECOMMENDATIONS ENDPOINTS ====================
 
 @router.get("/recommendations/{member_username}")
+@conditional_get()
 async def get_member_recommendations(
     member_username: str,
     current_user: dict = Depends(get_current_user)
@@ -1091,19 +781,17 @@ async def get_member_recommendations(
     username = current_user["username"]
     
     # Verify member belongs to user's team
-    user_members = get_team_members_from_db(username)
+    user_members = get_team_members_from_db(username, replica=True)
     member_usernames = [m["username"] for m in user_members]
     
     if member_username not in member_usernames:
         return {"error": "Member not found in your team"}
     
     # Get tag analysis
-    submissions = fetch_submissions_with_tags(member_username, limit=100)
-    from backend.utils.tag_analyzer import analyze_problem_tags
-    tag_analysis = analyze_problem_tags(submissions)
+    tag_analysis = await run_in_threadpool(member_tag_analysis, username, member_username)
     
     # Get difficulty trends
-    user_history_dict = get_user_history_from_db(username)
+    user_history_dict = get_user_history_from_db(username, members=[member_username], replica=True)
     member_history = user_history_dict.get(member_username, [])
     
     from backend.utils.difficulty_analyzer import calculate_difficulty_trends
@@ -1126,6 +814,7 @@ async def get_member_recommendations(
 
 
 @router.get("/recommendations/company/{company}")
+@conditional_get()
 async def get_company_recommendations(
     company: str,
     difficulty: str = "all",
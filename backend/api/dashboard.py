@@ -0,0 +1,228 @@
+"""
+One-shot dashboard payload.
+
+The dashboard page loads about a dozen sections, and each endpoint rereads
+the team and refetches the same members from LeetCode. /dashboard/bundle
+loads the members, their live profiles, their recent submissions, the daily
+challenge and the newest weekly delta rows once (the sources in parallel,
+each only when a requested section needs it) and builds every section from
+that shared context. A source that fails only blanks the sections built
+from it.
+"""
+
+import contextvars
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from backend.api.analytics import named_team_streaks, week_over_week_result
+from backend.api.leetcode import daily_completions, team_recent_submissions
+from backend.api.team import get_members_list_internal, members_with_stats, team_totals
+from backend.api.weekly_progress import current_week_progress
+from backend.core.closed_weeks import current_week_start
+from backend.core.response_cache import ConditionalGetRoute, conditional_get
+from backend.core.security import get_current_user
+from backend.core.weekly_deltas import DeltaRow, query_weekly_deltas
+from backend.utils.leetcodeapi import fetch_daily_challenge, fetch_for_members, fetch_recent_submissions, fetch_user_data
+from backend.utils.streak_tracker import get_members_at_risk
+
+router = APIRouter(route_class=ConditionalGetRoute)
+logger = logging.getLogger(__name__)
+
+# Recent submissions loaded per member: enough for /leetcode/daily/completions (50),
+# /leetcode/recent uses the newest 20 of them
+RECENT_SUBMISSIONS_LIMIT = 50
+
+# Bounds of the week_over_week and recent sections' parameters
+MAX_WEEKS = 52
+MAX_RECENT_LIMIT = 200
+
+
+class DashboardContext:
+    """Team and live state shared by the sections of one bundle"""
+
+    def __init__(self, owner: str, weeks: int = 1, recent_limit: int = 50):
+        self.owner = owner
+        self.weeks = weeks
+        self.recent_limit = recent_limit
+
+    @cached_property
+    def members(self) -> List[dict]:
+        """Every member of the team, suspended ones included"""
+        return get_members_list_internal(self.owner)
+
+    @cached_property
+    def db_members(self) -> List[dict]:
+        """Members as get_team_members_from_db returns them (no avatar column)"""
+        columns = ("username", "name", "team_owner", "status")
+        return [{column: member.get(column) for column in columns} for member in self.members]
+
+    @cached_property
+    def profiles(self) -> Dict[str, Optional[dict]]:
+        return fetch_for_members(fetch_user_data, [m["username"] for m in self.members])
+
+    @cached_property
+    def submissions(self) -> Dict[str, Optional[List[dict]]]:
+        return fetch_for_members(fetch_recent_submissions, [m["username"] for m in self.members], RECENT_SUBMISSIONS_LIMIT)
+
+    @cached_property
+    def daily_challenge(self) -> Optional[Dict[str, Any]]:
+        return fetch_daily_challenge()
+
+    @cached_property
+    def recent_deltas(self) -> List[DeltaRow]:
+        """
+        Each member's two newest delta rows up to the open week: this week's
+        rows, last week's rows and every member's latest row are among them
+        """
+        return query_weekly_deltas(self.owner, until=current_week_start(), last_n=2, replica=True)
+
+    @cached_property
+    def streaks(self) -> List[Dict[str, Any]]:
+        return named_team_streaks(self.owner, self.db_members, self.recent_deltas)
+
+    def profile(self, username: str) -> Optional[dict]:
+        return self.profiles.get(username)
+
+    def load(self, sources: List[str]) -> Dict[str, str]:
+        """
+        Fill the given cached properties in parallel (each thread keeps the
+        request's owner scope).
+
+        Returns:
+            {source: error} for the sources that failed
+        """
+        sources = [source for source in sources if source not in self.__dict__]
+        failed: Dict[str, str] = {}
+
+        def fill(source: str):
+            try:
+                getattr(self, source)
+            except Exception as e:
+                logger.error(f"Dashboard source {source} failed for {self.owner}: {e}")
+                failed[source] = str(e)
+
+        if len(sources) < 2:
+            for source in sources:
+                fill(source)
+            return failed
+        with ThreadPoolExecutor(max_workers=len(sources)) as executor:
+            for future in [executor.submit(contextvars.copy_context().run, fill, source) for source in sources]:
+                future.result()
+        return failed
+
+
+def _members(ctx: DashboardContext):
+    return members_with_stats(ctx.db_members, ctx.profiles)
+
+
+def _stats(ctx: DashboardContext):
+    active = [m for m in ctx.db_members if m.get("status") != "suspended"]
+    if not active:
+        return {"totalSolved": 0, "easy": 0, "medium": 0, "hard": 0, "memberCount": 0}
+    return team_totals(active, ctx.profiles)
+
+
+def _week_over_week(ctx: DashboardContext):
+    return week_over_week_result(ctx.owner, ctx.weeks, ctx.profiles, ctx.db_members, ctx.recent_deltas)
+
+
+def _current_week_progress(ctx: DashboardContext):
+    return current_week_progress(ctx.owner, ctx.db_members, ctx.profiles, ctx.recent_deltas)
+
+
+def _streaks_at_risk(ctx: DashboardContext):
+    return get_members_at_risk(ctx.streaks)
+
+
+def _daily_completions(ctx: DashboardContext):
+    challenge = ctx.daily_challenge
+    if not challenge or not challenge.get("titleSlug"):
+        return None
+    return daily_completions(challenge, ctx.members, ctx.submissions, ctx.profile)
+
+
+def _recent(ctx: DashboardContext):
+    return team_recent_submissions(ctx.members, ctx.submissions, ctx.recent_limit)
+
+
+# Section name -> (builder, context sources it needs besides the members), in dashboard order.
+# Each section matches the endpoint it replaces on the dashboard.
+SECTIONS: Dict[str, tuple] = {
+    "members": (_members, ["profiles"]),                                 # /team/members
+    "stats": (_stats, ["profiles"]),                                     # /team/stats
+    "week_over_week": (_week_over_week, ["profiles", "recent_deltas"]),  # /analytics/week-over-week
+    "current_week_progress": (_current_week_progress, ["profiles", "recent_deltas"]),  # /analytics/current-week-progress
+    "streaks": (lambda ctx: ctx.streaks, ["recent_deltas"]),             # /analytics/streaks
+    "streaks_at_risk": (_streaks_at_risk, ["recent_deltas"]),            # /analytics/streaks/at-risk
+    "daily": (lambda ctx: ctx.daily_challenge, ["daily_challenge"]),     # /leetcode/daily
+    "daily_completions": (_daily_completions, ["daily_challenge", "submissions", "profiles"]),  # /leetcode/daily/completions
+    "recent": (_recent, ["submissions"]),                                # /leetcode/recent
+}
+
+
+def build_bundle(owner: str, sections: Optional[List[str]] = None, weeks: int = 1, recent_limit: int = 50) -> Dict[str, Any]:
+    """
+    Build the requested dashboard sections (default: all) from one shared context.
+
+    A failing section, or one whose source failed to load, is returned as
+    None with its error under "errors", so one upstream problem does not
+    blank the whole dashboard.
+    """
+    names = list(SECTIONS) if not sections else sections
+    ctx = DashboardContext(owner, weeks, recent_limit)
+
+    # Every section starts from the member list; the other sources then load side by side
+    failed = ctx.load(["members"])
+    if not failed:
+        sources = []
+        for name in names:
+            sources.extend(source for source in SECTIONS[name][1] if source not in sources)
+        failed = ctx.load(sources)
+
+    bundle: Dict[str, Any] = {}
+    errors: Dict[str, str] = {}
+    for name in names:
+        builder: Callable[[DashboardContext], Any] = SECTIONS[name][0]
+        missing = [source for source in ["members", *SECTIONS[name][1]] if source in failed]
+        if missing:
+            bundle[name] = None
+            errors[name] = failed[missing[0]]
+            continue
+        try:
+            bundle[name] = builder(ctx)
+        except Exception as e:
+            logger.error(f"Dashboard section {name} failed for {owner}: {e}")
+            bundle[name] = None
+            errors[name] = str(e)
+    bundle["errors"] = errors
+    return bundle
+
+
+@router.get("/bundle")
+@conditional_get(live_seconds=60)
+def get_dashboard_bundle(
+    sections: Optional[str] = None,
+    weeks: int = 1,
+    recent_limit: int = 50,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Get the dashboard sections in one response.
+
+    sections is a comma-separated subset of: members, stats, week_over_week,
+    current_week_progress, streaks, streaks_at_risk, daily, daily_completions,
+    recent (default: all).
+    """
+    requested = [name.strip() for name in sections.split(",") if name.strip()] if sections else None
+    unknown = [name for name in requested or [] if name not in SECTIONS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown dashboard sections: {', '.join(unknown)}")
+    if not 1 <= weeks <= MAX_WEEKS:
+        raise HTTPException(status_code=400, detail=f"weeks must be between 1 and {MAX_WEEKS}")
+    if not 1 <= recent_limit <= MAX_RECENT_LIMIT:
+        raise HTTPException(status_code=400, detail=f"recent_limit must be between 1 and {MAX_RECENT_LIMIT}")
+    return build_bundle(current_user["username"], requested, weeks, recent_limit)
@@ -1,12 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException
-from typing import List, Dict, Any
+from typing import Callable, List, Dict, Any, Optional
 from backend.api.auth import get_current_user
-from backend.utils.leetcodeapi import fetch_daily_challenge, fetch_recent_submissions
+from backend.utils.leetcodeapi import fetch_daily_challenge, fetch_for_members, fetch_recent_submissions
 from datetime import date, datetime
 
 import logging
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from backend.core.config import settings
 from backend.core.database import get_cached_data, set_cached_data
+from backend.core.data_version import versioned_cache_key
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -41,59 +43,53 @@ async def get_daily_challenge_completions(current_user: dict = Depends(get_curre
     from backend.utils.leetcodeapi import fetch_user_data
     
     members = get_members_list_internal(current_user["username"])
-    
+    submissions = fetch_for_members(fetch_recent_submissions, [m["username"] for m in members], 50)
+    return daily_completions(challenge, members, submissions, fetch_user_data)
+
+def daily_completions(
+    challenge: Dict[str, Any],
+    members: List[dict],
+    submissions: Dict[str, Optional[List[dict]]],
+    get_profile: Callable[[str], Optional[dict]],
+) -> Dict[str, Any]:
+    """
+    Members who solved the daily challenge today, from their recent
+    submissions (at least the last 50 per member). get_profile supplies the
+    avatars of those who did; the dashboard bundle passes profiles it already
+    fetched.
+    """
+    title_slug = challenge.get("titleSlug")
     completions = []
     today = date.today()
     
     # Check each member's recent submissions
-    def check_member_completion(member):
+    for member in members:
         try:
-            # Fetch recent submissions
-            submissions = fetch_recent_submissions(member["username"], limit=50)
-            
-            # Check if any submission matches today's challenge
-            completed = False
             completion_time = None
-            
-            for sub in submissions:
+            for sub in submissions.get(member["username"]) or []:
                 if sub.get("titleSlug") == title_slug:
                     # Check if submission was made today
                     timestamp = int(sub.get("timestamp", 0))
-                    submission_date = datetime.fromtimestamp(timestamp).date()
-                    
-                    if submission_date == today:
-                        completed = True
+                    if datetime.fromtimestamp(timestamp).date() == today:
                         completion_time = datetime.fromtimestamp(timestamp).strftime("%H:%M")
                         break
             
             # Only return if completed
-            if not completed:
-                return None
+            if completion_time is None:
+                continue
             
             # Get user profile data for avatar
-            user_data = fetch_user_data(member["username"])
+            user_data = get_profile(member["username"])
             
-            return {
+            completions.append({
                 "username": member["username"],
                 "name": member.get("name", member["username"]),
                 "avatar": user_data.get("avatar") if user_data else None,
                 "completed": True,
                 "completionTime": completion_time
-            }
+            })
         except Exception as e:
             logger.error(f"Error checking completion for {member['username']}: {e}")
-            return None
-    
-    # Check all members concurrently
-    with ThreadPoolExecutor(max_workers=10) as executor:
-        futures = [executor.submit(check_member_completion, m) for m in members]
-        for future in as_completed(futures):
-            try:
-                result = future.result()
-                if result:  # Only add if completed
-                    completions.append(result)
-            except Exception as e:
-                logger.error(f"Error processing member completion: {e}")
     
     # Sort by completion time
     completions.sort(key=lambda x: x["completionTime"] or "99:99")
@@ -105,24 +101,19 @@ async def get_daily_challenge_completions(current_user: dict = Depends(get_curre
         "completedCount": len(completions)
     }
 
-@router.get("/daily/history")
-async def get_daily_challenge_history(
-    days: int = 7,
-    current_user: dict = Depends(get_current_user)
-):
+def daily_challenge_history(username: str, days: int = 7) -> Dict[str, Any]:
     """
-    Get the last N days of daily challenges with completion details.
-    Returns who completed each challenge.
+    Daily challenges of the last N days with the completions of username's
+    team (also used by the cache warmer).
     """
     from datetime import timedelta
     from backend.api.team import get_members_list_internal
     from backend.utils.leetcodeapi import fetch_daily_challenge_by_date, fetch_user_data
 
-    username = current_user["username"]
-    
-    # Check cache (v2 to invalidate old cache after API fix)
-    cache_key = f"daily_history_v2_{username}_{days}"
-    cached_result = get_cached_data(cache_key, ttl_seconds=900) # 15 mins cache
+    # Check cache (v2 to invalidate old cache after API fix); keyed by the
+    # team's data version and the day, as the window moves daily
+    cache_key = versioned_cache_key("daily_history_v2", username, days, date.today().isoformat())
+    cached_result = get_cached_data(cache_key, ttl_seconds=settings.CACHE_VERSIONED_TTL_SECONDS)
     if cached_result:
         return cached_result
 
@@ -225,11 +216,23 @@ async def get_daily_challenge_history(
     }
     
     # Save to cache
-    set_cached_data(cache_key, result)
+    set_cached_data(cache_key, result, ttl_seconds=settings.CACHE_VERSIONED_TTL_SECONDS)
     
     return result
 
 
+@router.get("/daily/history")
+async def get_daily_challenge_history(
+    days: int = 7,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Get the last N days of daily challenges with completion details.
+    Returns who completed each challenge.
+    """
+    return daily_challenge_history(current_user["username"], days)
+
+
 @router.get("/recent")
 async def get_recent_submissions(
     limit: int = 50,
@@ -244,28 +247,22 @@ async def get_recent_submissions(
     from backend.api.team import get_members_list_internal
     
     members = get_members_list_internal(current_user["username"])
-    
-    all_submissions = []
+    submissions = fetch_for_members(fetch_recent_submissions, [m["username"] for m in members], 20)
+    return team_recent_submissions(members, submissions, limit)
 
-    # Fetch submissions concurrently
-    with ThreadPoolExecutor(max_workers=10) as executor:
-        future_to_user = {
-            executor.submit(fetch_recent_submissions, m["username"], 20): m 
-            for m in members
-        }
-        
-        for future in as_completed(future_to_user):
-            member = future_to_user[future]
-            try:
-                submissions = future.result()
-                # Add member info to each submission
-                for sub in submissions:
-                    sub["username"] = member["username"]
-                    sub["name"] = member.get("name", member["username"])
-                    sub["avatar"] = member.get("avatar")
-                    all_submissions.append(sub)
-            except Exception as e:
-                logger.error(f"Error fetching submissions for {member['username']}: {e}")
+
+def team_recent_submissions(members: List[dict], submissions: Dict[str, Optional[List[dict]]], limit: int = 50) -> List[dict]:
+    """Newest accepted submissions across the team (the latest 20 per member), with member info"""
+    all_submissions = []
+    for member in members:
+        # Add member info to each submission
+        for sub in (submissions.get(member["username"]) or [])[:20]:
+            all_submissions.append({
+                **sub,
+                "username": member["username"],
+                "name": member.get("name", member["username"]),
+                "avatar": member.get("avatar")
+            })
     
     # Sort by timestamp descending
     all_submissions.sort(key=lambda x: int(x.get("timestamp", 0)), reverse=True)
@@ -3,12 +3,13 @@ Notifications API endpoints
 """
 
 from fastapi import APIRouter, Depends
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from datetime import datetime, timezone
 from backend.core.security import get_current_user
 from backend.core.storage import read_json, write_json
 from backend.core.config import settings
 from backend.core.database import get_db_connection, get_user_history_from_db, get_team_members_from_db
+from backend.core.json_response import fast_json
 from backend.utils.notification_service import (
     notification_service,
     check_and_notify_streaks,
@@ -118,21 +119,37 @@ async def upload_screenshot(
 @router.get("")
 async def get_notifications(
     limit: int = 50,
+    priority: Optional[str] = None,
+    member_name: Optional[str] = None,
+    milestone_type: Optional[str] = None,
+    type: Optional[str] = None,
+    include_metadata: bool = False,
     current_user: dict = Depends(get_current_user)
 ):
     """
     Get recent notifications for the current user's team.
+    
+    Optional filters (priority, member_name, milestone_type, type) run in the
+    database. include_metadata adds the remaining per-notification details.
     """
     username = current_user["username"]
     
     # Get all notifications (in-app)
-    notifications = notification_service.get_notifications(limit=limit)
+    notifications = notification_service.get_notifications(
+        limit=limit,
+        priority=priority,
+        member_name=member_name,
+        milestone_type=milestone_type,
+        type=type,
+        include_metadata=include_metadata
+    )
     
-    return {
+    # Notifications are plain JSON values already (shared state / SQL rows)
+    return fast_json({
         "notifications": notifications,
         "count": len(notifications),
         "unread_count": len([n for n in notifications if not n.get("read", False)])
-    }
+    })
 
 
 @router.post("/check-streaks")
@@ -160,7 +177,8 @@ async def check_streak_notifications(current_user: dict = Depends(get_current_us
         streak["name"] = member_names.get(streak["member"], streak["member"])
     
     # Check and create notifications
-    notifications = check_and_notify_streaks(team_streaks)
+    with notification_service.batched_saves():
+        notifications = check_and_notify_streaks(team_streaks)
     
     return {
         "notifications": notifications,
@@ -190,8 +208,8 @@ async def check_new_submissions(current_user: dict = Depends(get_current_user)):
     notifications = []
     new_state = {}
     
-    # Fetch current data in parallel
-    with ThreadPoolExecutor(max_workers=10) as executor:
+    # Fetch current data in parallel; notifications are written in one batch
+    with ThreadPoolExecutor(max_workers=10) as executor, notification_service.batched_saves():
         future_to_member = {
             executor.submit(fetch_user_data, member["username"]): member
             for member in user_members
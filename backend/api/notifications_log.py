@@ -1,7 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from typing import List, Dict, Any, Optional
+from backend.core.config import settings
 from backend.core.security import get_current_user
-from backend.core.database import get_db_connection
+from backend.core.database import PROMOTED_METADATA_FIELDS, get_db_connection
+from backend.core.json_response import fast_json
+from backend.core.notifications_db import count_notifications, iter_notifications, query_notifications
+from backend.core.streaming import ndjson_response, wants_ndjson
 from backend.utils.notification_service import notification_service
 import json
 
@@ -9,54 +13,45 @@ router = APIRouter()
 
 @router.get("")
 async def get_notification_logs(
-    limit: int = 50,
+    request: Request,
+    limit: Optional[int] = None,
     offset: int = 0,
     status: Optional[str] = None,
+    type: Optional[str] = None,
+    priority: Optional[str] = None,
+    member_name: Optional[str] = None,
+    milestone_type: Optional[str] = None,
+    include_metadata: bool = False,
     current_user: dict = Depends(get_current_user)
 ):
-    """Get notification logs from database"""
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-        
-        query = "SELECT * FROM notifications"
-        params = []
-        
-        if status:
-            query += " WHERE status = ?"
-            params.append(status)
-            
-        query += " ORDER BY created_at DESC LIMIT ? OFFSET ?"
-        params.extend([limit, offset])
-        
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
-        
-        notifications = []
-        for row in rows:
-            notif = dict(row)
-            if notif.get("metadata"):
-                try:
-                    notif["metadata"] = json.loads(notif["metadata"])
-                except:
-                    notif["metadata"] = {}
-            notifications.append(notif)
-            
-        # Get total count
-        count_query = "SELECT COUNT(*) as count FROM notifications"
-        if status:
-            count_query += " WHERE status = ?"
-            cursor.execute(count_query, (status,))
-        else:
-            cursor.execute(count_query)
-            
-        total = cursor.fetchone()["count"]
-        
-        return {
-            "notifications": notifications,
-            "total": total,
-            "limit": limit,
-            "offset": offset
-        }
+    """
+    Get notification logs from database (filters run in SQL; metadata only when requested).
+
+    With Accept: application/x-ndjson every matching notification (or limit
+    of them) is streamed, one per line, instead of a page of 50.
+    """
+    filters = {
+        "status": status,
+        "type": type,
+        "priority": priority,
+        "member_name": member_name,
+        "milestone_type": milestone_type,
+    }
+    if wants_ndjson(request):
+        return ndjson_response(lambda: iter_notifications(
+            limit=limit, offset=offset, include_metadata=include_metadata,
+            batch_rows=settings.STREAM_BATCH_ROWS, **filters
+        ))
+
+    limit = limit if limit is not None else 50
+    notifications = query_notifications(limit=limit, offset=offset, include_metadata=include_metadata, **filters)
+    
+    return fast_json({
+        "notifications": notifications,
+        "total": count_notifications(**filters),
+        "limit": limit,
+        "offset": offset
+    })
 
 @router.post("/{notification_id}/resend")
 async def resend_notification(
@@ -82,6 +77,9 @@ async def resend_notification(
             "member": notification["recipient"],
             "created_at": notification["created_at"]
         }
+        for field in PROMOTED_METADATA_FIELDS:
+            if notification.get(field) is not None:
+                payload[field] = notification[field]
         
         if notification.get("metadata"):
             try:
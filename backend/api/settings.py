@@ -5,7 +5,8 @@ import json
 from datetime import datetime
 
 from backend.api.auth import get_current_user
-from backend.core.database import get_db_connection
+from backend.core.database import delete_cached_data, get_db_connection
+from backend.core.sharding import catalog_only
 
 router = APIRouter()
 
@@ -14,6 +15,7 @@ class SettingUpdate(BaseModel):
     value: Any
 
 @router.get("/")
+@catalog_only
 def get_settings(current_user: dict = Depends(get_current_user)):
     """Get all system settings"""
     # Check cache first (settings don't change often)
@@ -38,10 +40,17 @@ def get_settings(current_user: dict = Depends(get_current_user)):
                 settings[row["key"]] = row["value"]
     
     # Save to cache
-    set_cached_data(cache_key, settings)
+    set_cached_data(cache_key, settings, ttl_seconds=60)
     return settings
 
+@router.get("/cache-warmer")
+def get_cache_warmer_status(current_user: dict = Depends(get_current_user)):
+    """Progress of the running dashboard cache warm-up and the last run per trigger"""
+    from backend.services.cache_warmer import cache_warmer
+    return cache_warmer.status()
+
 @router.post("/")
+@catalog_only
 def update_setting(setting: SettingUpdate, current_user: dict = Depends(get_current_user)):
     """Update a system setting"""
     
@@ -64,13 +73,12 @@ def update_setting(setting: SettingUpdate, current_user: dict = Depends(get_curr
     with get_db_connection() as conn:
         cursor = conn.cursor()
         cursor.execute("""
-        INSERT OR REPLACE INTO system_settings (key, value, updated_at)
+        INSERT INTO system_settings (key, value, updated_at)
         VALUES (?, ?, ?)
+        ON CONFLICT(key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at
         """, (setting.key, value_str, datetime.utcnow().isoformat()))
         conn.commit()
         
-        # Invalidate cache
-        cursor.execute("DELETE FROM api_cache WHERE key = 'system_settings_all'")
-        conn.commit()
-        
+    # Invalidate cache
+    delete_cached_data("system_settings_all")
     return {"message": "Setting updated successfully", "key": setting.key, "value": setting.value}
@@ -1,15 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Request, Response
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 import logging
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from backend.core.security import get_current_user
+from backend.core.response_cache import ConditionalGetRoute, conditional_get
+from backend.core.streaming import ndjson_response, wants_ndjson
 from backend.core.config import settings
 from backend.core.database import get_db_connection
-from backend.utils.leetcodeapi import fetch_user_data, check_leetcode_user_exists
+from backend.core.stale_cache import get_or_revalidate
+from backend.core.bulk_db import OWNED_BY_ANOTHER_TEAM, transaction, bulk_upsert_members, bulk_insert_snapshots
+from backend.core.weekly_deltas import refresh_weekly_deltas
+from backend.core.data_version import bump_owner_versions
+from backend.utils.leetcodeapi import fetch_for_members, fetch_user_data, check_leetcode_user_exists
 from datetime import datetime
 
-router = APIRouter()
+router = APIRouter(route_class=ConditionalGetRoute)
 logger = logging.getLogger(__name__)
 
 class TeamMember(BaseModel):
@@ -32,13 +37,10 @@ def get_members_list_internal(owner_username: str) -> List[dict]:
         return [dict(row) for row in rows]
 
 
-@router.get("/members", response_model=List[dict])
-def get_team_members(current_user: dict = Depends(get_current_user)):
-    """Get all team members with their latest stats"""
+def _compute_team_members(current_username: str) -> List[dict]:
     user_members = []
     
     # 1. Load members from DB
-    current_username = current_user["username"]
     print(f"DEBUG: get_team_members called for user: '{current_username}'")
     
     with get_db_connection() as conn:
@@ -59,46 +61,55 @@ def get_team_members(current_user: dict = Depends(get_current_user)):
         return []
 
     # 2. Fetch live LeetCode stats in parallel
+    profiles = fetch_for_members(
+        fetch_user_data, [m["username"] for m in user_members if m.get("status") != "suspended"], max_workers=5
+    )
+    return members_with_stats(user_members, profiles)
+
+def team_members_result(owner_username: str) -> Tuple[List[dict], float]:
+    """
+    Members with live stats and the result's age in seconds (also used by the
+    cache warmer). Live stats are refreshed in the background once older than
+    TEAM_MEMBERS_FRESH_SECONDS and fetched in the request once older than
+    TEAM_MEMBERS_MAX_STALE_SECONDS; a change to the team is recomputed right away.
+    """
+    return get_or_revalidate(
+        f"team_members_{owner_username}",
+        owner_username,
+        lambda: _compute_team_members(owner_username),
+        fresh_seconds=settings.TEAM_MEMBERS_FRESH_SECONDS,
+        wait_for_new_version=True,
+        max_stale_seconds=settings.TEAM_MEMBERS_MAX_STALE_SECONDS,
+    )
+
+@router.get("/members", response_model=List[dict])
+@conditional_get(live_seconds=60)
+def get_team_members(response: Response, current_user: dict = Depends(get_current_user)):
+    """Get all team members with their latest stats"""
+    members, age = team_members_result(current_user["username"])
+    response.headers["X-Data-Age"] = str(int(age))
+    return members
+
+def members_with_stats(user_members: List[dict], profiles: Dict[str, Optional[dict]]) -> List[dict]:
+    """Members merged with their live profiles, most solved first (also used by the dashboard bundle)"""
     results = []
-    with ThreadPoolExecutor(max_workers=5) as executor:
-        future_to_member = {
-            executor.submit(fetch_user_data, member["username"]): member 
-            for member in user_members if member.get("status") != "suspended"
-        }
-        
-        # Add suspended members with 0 stats (or just skipped stats)
-        for member in user_members:
-            if member.get("status") == "suspended":
-                member_data = member.copy()
-                member_data.update({
-                    "totalSolved": 0,
-                    "easy": 0,
-                    "medium": 0, 
-                    "hard": 0,
-                    "ranking": 0,
-                    "contributionPoints": 0,
-                    "reputation": 0
-                })
-                results.append(member_data)
-
-        for future in as_completed(future_to_member):
-            member = future_to_member[future]
-            try:
-                data = future.result()
-                if data:
-                    member_data = member.copy()
-                    member_data.update(data)
-                    results.append(member_data)
-                else:
-                    # Failed to fetch, return member info with 0 stats
-                    member_data = member.copy()
-                    member_data.update({"totalSolved": 0})
-                    results.append(member_data)
-            except Exception as e:
-                logger.error(f"Error fetching data for {member['username']}: {e}")
-                member_data = member.copy()
-                member_data.update({"totalSolved": 0})
-                results.append(member_data)
+    for member in user_members:
+        member_data = member.copy()
+        if member.get("status") == "suspended":
+            # Suspended members are listed with 0 stats
+            member_data.update({
+                "totalSolved": 0,
+                "easy": 0,
+                "medium": 0, 
+                "hard": 0,
+                "ranking": 0,
+                "contributionPoints": 0,
+                "reputation": 0
+            })
+        else:
+            # Failed fetches return member info with 0 stats
+            member_data.update(profiles.get(member["username"]) or {"totalSolved": 0})
+        results.append(member_data)
 
     # Sort by total solved descending
     results.sort(key=lambda x: x.get("totalSolved", 0), reverse=True)
@@ -121,52 +132,53 @@ def add_team_member(member: TeamMember, current_user: dict = Depends(get_current
         if cursor.fetchone():
              raise HTTPException(status_code=400, detail="Member already exists")
 
-    # 2. Verify LeetCode user exists
-    if not check_leetcode_user_exists(username):
+    # 2. Verify LeetCode user exists (the same fetch seeds the first snapshot)
+    leetcode_data = fetch_user_data(username)
+    if not leetcode_data:
          raise HTTPException(status_code=404, detail="LeetCode user not found")
 
-    # 3. Add to Database
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO members (username, name, team_owner, status, created_at) 
-            VALUES (?, ?, ?, ?, ?)
-        """, (
-            username, 
-            member.name or username, 
-            current_username, 
-            member.status,
-            datetime.utcnow().isoformat()
-        ))
-        conn.commit()
-        print(f"DEBUG: Successfully added {username} to DB with owner {current_username}")
-
-    # 4. Fetch initial stats and record history immediately
+    # 3. Add to Database together with this week's snapshot, in one transaction
+    from datetime import date, timedelta
+    today = date.today()
+    week_start = (today - timedelta(days=today.weekday())).isoformat()
+    
     try:
-        leetcode_data = fetch_user_data(username)
-        if leetcode_data:
-            from datetime import date, timedelta
-            today = date.today()
-            week_start = (today - timedelta(days=today.weekday())).isoformat()
-            
-            with get_db_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    INSERT OR IGNORE INTO snapshots 
-                    (username, week_start, total_solved, easy, medium, hard, timestamp)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    username,
-                    week_start,
-                    leetcode_data.get("totalSolved", 0),
-                    leetcode_data.get("easy", 0),
-                    leetcode_data.get("medium", 0),
-                    leetcode_data.get("hard", 0),
-                    datetime.utcnow().isoformat()
-                ))
-                conn.commit()
+        with transaction() as conn:
+            member_outcome = bulk_upsert_members(current_username, [{
+                "username": username,
+                "name": member.name or username,
+                "status": member.status,
+                "created_at": datetime.utcnow().isoformat()
+            }], conn=conn)[0]
+
+            if member_outcome.error == OWNED_BY_ANOTHER_TEAM:
+                raise HTTPException(status_code=400, detail="Member already belongs to another team")
+            if member_outcome.status == "error":
+                raise HTTPException(status_code=500, detail="Failed to add member")
+            if member_outcome.status != "inserted":
+                raise HTTPException(status_code=400, detail="Member already exists")
+
+            snapshot_outcome = bulk_insert_snapshots([{
+                "username": username,
+                "week_start": week_start,
+                "totalSolved": leetcode_data.get("totalSolved", 0),
+                "easy": leetcode_data.get("easy", 0),
+                "medium": leetcode_data.get("medium", 0),
+                "hard": leetcode_data.get("hard", 0),
+                "timestamp": datetime.utcnow().isoformat()
+            }], conn=conn)[0]
+
+            # Raising here rolls the member row back with the snapshot
+            if snapshot_outcome.status == "error":
+                logger.error(f"Failed to record initial history for {username}: {snapshot_outcome.error}")
+                raise HTTPException(status_code=500, detail="Failed to add member")
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Failed to record initial history for {username}: {e}")
+        logger.error(f"Failed to add member {username}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to add member")
+
+    print(f"DEBUG: Successfully added {username} to DB with owner {current_username}")
 
     return {"message": "Member added successfully", "username": username}
 
@@ -209,15 +221,18 @@ def update_team_member(
 
             # Update Member
             try:
-                # Update members table
+                # Update members table (another LeetCode account: its tags are synced afresh)
                 cursor.execute("""
                     UPDATE members 
-                    SET username = ?, name = ?, status = ? 
+                    SET username = ?, name = ?, status = ?, tags_synced_at = NULL 
                     WHERE username = ?
                 """, (new_username, member_update.name or new_username, member_update.status, actual_username))
                 
                 # Update snapshots table (manual update necessary if no CASCADE)
                 cursor.execute("UPDATE snapshots SET username = ? WHERE username = ?", (new_username, actual_username))
+                # Ties are ranked by username, so every week of the team can change
+                refresh_weekly_deltas(owners=[current_user["username"]], conn=conn)
+                bump_owner_versions(cursor, [current_user["username"]])
                 
                 conn.commit()
             except Exception as e:
@@ -231,6 +246,7 @@ def update_team_member(
                 SET name = ?, status = ? 
                 WHERE username = ?
             """, (member_update.name or member["name"], member_update.status, actual_username))
+            bump_owner_versions(cursor, [current_user["username"]])
             conn.commit()
             
     return {"message": "Member updated successfully"}
@@ -246,13 +262,22 @@ def remove_team_member(member_id: str, current_user: dict = Depends(get_current_
         if not cursor.fetchone():
             raise HTTPException(status_code=404, detail="Member not found")
             
+        cursor.execute("SELECT MIN(week_start) FROM snapshots WHERE username = ?", (member_id,))
+        first_week = cursor.fetchone()[0]
+
         # Delete from members (Historical snapshots remain in DB)
         cursor.execute("DELETE FROM members WHERE username = ? AND team_owner = ?", (member_id, current_user["username"]))
+        cursor.execute("DELETE FROM weekly_deltas WHERE username = ?", (member_id,))
+        # Team ranks change without the removed member, from their first snapshot on
+        if first_week:
+            refresh_weekly_deltas(owners=[current_user["username"]], since=first_week, conn=conn)
+        bump_owner_versions(cursor, [current_user["username"]])
         conn.commit()
         
     return {"message": "Member removed successfully"}
 
 @router.get("/stats")
+@conditional_get(live_seconds=60)
 def get_team_stats(current_user: dict = Depends(get_current_user)):
     """Get aggregated team statistics"""
     
@@ -266,42 +291,59 @@ def get_team_stats(current_user: dict = Depends(get_current_user)):
     if not user_members:
         return {"totalSolved": 0, "easy": 0, "medium": 0, "hard": 0, "memberCount": 0}
 
-    total_stats = {"totalSolved": 0, "easy": 0, "medium": 0, "hard": 0}
-    
     # 2. Fetch live data
-    with ThreadPoolExecutor(max_workers=5) as executor:
-        futures = [executor.submit(fetch_user_data, member["username"]) for member in user_members]
-        for future in as_completed(futures):
-            try:
-                data = future.result()
-                if data:
-                    total_stats["totalSolved"] += data.get("totalSolved", 0)
-                    total_stats["easy"] += data.get("easy", 0)
-                    total_stats["medium"] += data.get("medium", 0)
-                    total_stats["hard"] += data.get("hard", 0)
-            except:
-                pass
+    profiles = fetch_for_members(fetch_user_data, [m["username"] for m in user_members], max_workers=5)
+    return team_totals(user_members, profiles)
+
+def team_totals(user_members: List[dict], profiles: Dict[str, Optional[dict]]) -> dict:
+    """Summed live stats of the given members (also used by the dashboard bundle)"""
+    total_stats = {"totalSolved": 0, "easy": 0, "medium": 0, "hard": 0}
+    for member in user_members:
+        data = profiles.get(member["username"])
+        if data:
+            total_stats["totalSolved"] += data.get("totalSolved", 0)
+            total_stats["easy"] += data.get("easy", 0)
+            total_stats["medium"] += data.get("medium", 0)
+            total_stats["hard"] += data.get("hard", 0)
 
     total_stats["memberCount"] = len(user_members)
     return total_stats
 
 @router.get("/export/excel")
-def export_excel(current_user: dict = Depends(get_current_user)):
-    """Export team data to Excel"""
+def export_excel(request: Request, current_user: dict = Depends(get_current_user)):
+    """
+    Export team data to Excel.
+
+    With Accept: application/x-ndjson the same rows are streamed instead,
+    one per line, each with the name of its sheet under "sheet". Both sheets
+    are bounded by the team's size (its members, and four weeks of rows per
+    member), so they are built from the cached /team/members payload and the
+    weekly deltas rather than iterated from a history cursor; the members'
+    live totals are reused for the open week instead of being fetched again.
+    """
     from fastapi.responses import FileResponse
-    import pandas as pd
+    from backend.utils.week_over_week import compute_week_over_week
     import os
+
+    def export_sheets():
+        members_data, _ = team_members_result(current_user["username"])
+        profiles = {member["username"]: member for member in members_data}
+        return members_data, compute_week_over_week(current_user["username"], 4, profiles)
+    
+    if wants_ndjson(request):
+        def rows():
+            members_data, wow_data = export_sheets()
+            for member in members_data:
+                yield {"sheet": "Current Stats", **member}
+            for row in wow_data:
+                yield {"sheet": "Week over Week", **row}
+        return ndjson_response(rows)
+    
+    import pandas as pd
     
     try:
-        # 1. Get Members Data
-        # Re-use logic from get_team_members but we need the raw list
-        members_data = get_team_members(current_user)
-        
-        # 2. Get Week Over Week Data
-        # Fetch directly since importing might be circular
-        # Actually importing analytics here IS safe if analytics imports team (team doesn't import analytics at top level)
-        from backend.api.analytics import get_week_over_week_internal
-        wow_data = get_week_over_week_internal(current_user["username"], weeks=4)
+        # 1. Members (same cached payload as /team/members) and 2. week-over-week rows
+        members_data, wow_data = export_sheets()
         
         # 3. Create DataFrame
         df_current = pd.DataFrame(members_data)
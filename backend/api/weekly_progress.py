@@ -2,21 +2,24 @@
 Get current week's progress by comparing live data with last snapshot
 """
 from fastapi import APIRouter, Depends
-from typing import Dict, Any
+from typing import Any, Dict, List, Optional
 from datetime import date, timedelta
 import logging
 
 from backend.api.auth import get_current_user
-from backend.core.database import get_user_history_from_db, get_team_members_from_db
-from backend.utils.leetcodeapi import fetch_user_data
+from backend.core.response_cache import ConditionalGetRoute, conditional_get
+from backend.core.database import get_team_members_from_db
+from backend.core.weekly_deltas import DeltaRow, query_weekly_deltas
+from backend.utils.leetcodeapi import fetch_for_members, fetch_user_data
 from backend.core.storage import read_json
 from backend.core.config import settings
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter()
+router = APIRouter(route_class=ConditionalGetRoute)
 
 @router.get("/current-week-progress")
+@conditional_get(live_seconds=60)
 async def get_current_week_progress(current_user: dict = Depends(get_current_user)):
     """
     Get current week's progress by comparing live totals with last week's snapshot.
@@ -25,8 +28,23 @@ async def get_current_week_progress(current_user: dict = Depends(get_current_use
     username = current_user["username"]
     
     # Get members list from DB
-    user_members = get_team_members_from_db(username)
+    user_members = get_team_members_from_db(username, replica=True)
     
+    # Fetch current live data for all members in parallel
+    profiles = fetch_for_members(fetch_user_data, [m["username"] for m in user_members if m.get("username")])
+    return current_week_progress(username, user_members, profiles)
+
+
+def current_week_progress(
+    username: str,
+    user_members: list,
+    profiles: Dict[str, Any],
+    recent_deltas: Optional[List[DeltaRow]] = None,
+) -> Dict[str, Any]:
+    """
+    Progress of the open week from live profiles (also used by the dashboard
+    bundle, which passes the newest delta rows per member it already loaded)
+    """
     if not user_members:
         return {
             "current_week_total": 0,
@@ -35,83 +53,51 @@ async def get_current_week_progress(current_user: dict = Depends(get_current_use
             "members_progress": []
         }
     
-    # Get last week's snapshot data
-    user_history_dict = get_user_history_from_db(username)
-    
     # Calculate last week's start date
     today = date.today()
     last_week_start = (today - timedelta(days=today.weekday() + 7)).isoformat()
+    two_weeks_ago_start = (today - timedelta(days=today.weekday() + 14)).isoformat()
+    
+    # Last week's delta rows carry both last week's totals and the change since two weeks ago
+    if recent_deltas is None:
+        last_week_deltas = query_weekly_deltas(username, since=last_week_start, until=last_week_start, replica=True)
+    else:
+        last_week_deltas = [d for d in recent_deltas if d.week_start == last_week_start]
     
     # Get last week's totals from snapshots
-    last_week_data = {}
-    for member_username, snapshots in user_history_dict.items():
-        for snapshot in snapshots:
-            if snapshot.get("week_start") == last_week_start:
-                last_week_data[member_username] = snapshot.get("totalSolved", 0)
-                break
+    last_week_data = {d.member: d.total for d in last_week_deltas}
     
-    # Fetch current live data for all members in parallel
     current_totals = {}
     members_progress = []
     
-    from concurrent.futures import ThreadPoolExecutor, as_completed
-    
-    def fetch_member_progress(member):
+    for member in user_members:
         member_username = member.get("username")
-        if not member_username:
-            return None
-            
-        try:
-            # Fetch live data
-            live_data = fetch_user_data(member_username)
-            if live_data:
-                current_total = live_data.get("totalSolved", 0)
-                
-                # Calculate this week's progress
-                last_week_total = last_week_data.get(member_username, current_total)
-                week_progress = current_total - last_week_total
-                
-                return {
-                    "username": member_username,
-                    "name": member.get("name", member_username),
-                    "current_total": current_total,
-                    "last_week_total": last_week_total,
-                    "week_progress": week_progress
-                }
-        except Exception as e:
-            logger.error(f"Error fetching data for {member_username}: {e}")
-        return None
-
-    # Use ThreadPoolExecutor for parallel fetching
-    with ThreadPoolExecutor(max_workers=10) as executor:
-        future_to_member = {executor.submit(fetch_member_progress, member): member for member in user_members}
+        live_data = profiles.get(member_username) if member_username else None
+        if not live_data:
+            continue
         
-        for future in as_completed(future_to_member):
-            result = future.result()
-            if result:
-                members_progress.append(result)
-                current_totals[result["username"]] = result["current_total"]
+        current_total = live_data.get("totalSolved", 0)
+        
+        # Calculate this week's progress
+        last_week_total = last_week_data.get(member_username, current_total)
+        members_progress.append({
+            "username": member_username,
+            "name": member.get("name", member_username),
+            "current_total": current_total,
+            "last_week_total": last_week_total,
+            "week_progress": current_total - last_week_total
+        })
+        current_totals[member_username] = current_total
     
     # Calculate team totals
     current_week_total = sum(m["week_progress"] for m in members_progress)
     previous_week_total_sum = sum(last_week_data.values())
     current_total_sum = sum(current_totals.values())
     
-    # Calculate previous week's progress (if we have data from 2 weeks ago)
-    two_weeks_ago_start = (today - timedelta(days=today.weekday() + 14)).isoformat()
-    two_weeks_ago_data = {}
-    for member_username, snapshots in user_history_dict.items():
-        for snapshot in snapshots:
-            if snapshot.get("week_start") == two_weeks_ago_start:
-                two_weeks_ago_data[member_username] = snapshot.get("totalSolved", 0)
-                break
-    
-    previous_week_total = 0
-    if two_weeks_ago_data:
-        for member_username in last_week_data.keys():
-            last_week_val = last_week_data.get(member_username, 0)
-            two_weeks_val = two_weeks_ago_data.get(member_username, last_week_val)
-            previous_week_total += (last_week_val - two_weeks_val)
+    # Calculate previous week's progress (members without a snapshot 2 weeks ago count as 0)
+    previous_week_total = sum(
+        d.solved_delta for d in last_week_deltas if d.prev_week_start == two_weeks_ago_start
+    )
     
     # Calculate week-over-week change
     weekly_change = 0
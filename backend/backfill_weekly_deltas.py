@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Rebuild the weekly_deltas table from all snapshots.
+Run after editing snapshots outside the API (restore/fix scripts).
+"""
+
+import sys
+sys.path.insert(0, '/app')
+
+import logging
+from backend.core.closed_weeks import invalidate_closed_weeks
+from backend.core.database import get_db_connection, init_db
+from backend.core.sharding import fan_out, sharding_enabled
+from backend.core.weekly_deltas import refresh_weekly_deltas
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def rebuild(owner=None) -> int:
+    """Rebuild weekly_deltas, then drop results cached from the old ones, in one transaction"""
+    with get_db_connection() as conn:
+        written = refresh_weekly_deltas(conn=conn)
+        invalidate_closed_weeks(conn=conn)
+        conn.commit()
+    return written
+
+
+if __name__ == "__main__":
+    init_db()
+    written = rebuild()
+    if sharding_enabled():
+        written += sum(fan_out(rebuild).values())
+    logger.info(f"✓ Rebuilt weekly_deltas ({written} rows)")
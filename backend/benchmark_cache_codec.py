@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Compare api_cache payload codecs on payloads shaped like the largest cached
+results (tags analysis and daily history for a team).
+
+Usage: python backend/benchmark_cache_codec.py [members]
+"""
+
+import json
+import os
+import random
+import sys
+import timeit
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.core import cache_codec
+
+TAGS = [
+    "Array", "String", "Hash Table", "Dynamic Programming", "Math", "Sorting", "Greedy",
+    "Depth-First Search", "Binary Search", "Database", "Breadth-First Search", "Tree",
+    "Matrix", "Two Pointers", "Binary Tree", "Bit Manipulation", "Heap (Priority Queue)",
+    "Stack", "Prefix Sum", "Graph", "Simulation", "Design", "Counting", "Backtracking",
+    "Sliding Window", "Union Find", "Linked List", "Trie", "Recursion", "Monotonic Stack",
+]
+
+
+def tags_analysis(members: int) -> list:
+    rng = random.Random(1)
+    result = []
+    for i in range(members):
+        counts = {tag: rng.randint(0, 60) for tag in rng.sample(TAGS, 24)}
+        top = sorted(counts.items(), key=lambda item: item[1], reverse=True)
+        result.append({
+            "member": f"member_{i}",
+            "name": f"Member Number {i}",
+            "tag_counts": counts,
+            "total_unique_tags": len(counts),
+            "top_tags": [{"tag": tag, "count": count} for tag, count in top[:10]],
+            "weak_tags": [{"tag": tag, "count": count} for tag, count in top[-8:]],
+            "tag_percentages": {tag: round(count * 100 / 450, 2) for tag, count in counts.items()},
+        })
+    return result
+
+
+def daily_history(members: int, days: int = 30) -> dict:
+    rng = random.Random(2)
+    history = []
+    for day in range(days):
+        completed = [
+            {"username": f"member_{i}", "name": f"Member Number {i}", "completedAt": f"2025-01-{day % 28 + 1:02d}T0{i % 10}:00:00"}
+            for i in range(members) if rng.random() < 0.4
+        ]
+        history.append({
+            "date": f"2025-01-{day % 28 + 1:02d}",
+            "title": f"Daily Problem {day}",
+            "titleSlug": f"daily-problem-{day}",
+            "difficulty": rng.choice(["Easy", "Medium", "Hard"]),
+            "completedBy": completed,
+            "completionRate": round(len(completed) * 100 / members, 1),
+        })
+    return {"history": history, "totalMembers": members}
+
+
+def measure(value, number: int = 200):
+    legacy = json.dumps(value)
+    rows = [("legacy json text", len(legacy.encode("utf-8")),
+             timeit.timeit(lambda: json.dumps(value), number=number) / number,
+             timeit.timeit(lambda: json.loads(legacy), number=number) / number)]
+
+    for codec in ("json", "json+zlib", "orjson", "orjson+zlib", "orjson+zstd", "msgpack", "msgpack+zlib", "msgpack+zstd"):
+        if not cache_codec.available(codec):
+            continue
+        name, payload, _ = cache_codec.encode(value, codec)
+        rows.append((codec, len(payload),
+                     timeit.timeit(lambda: cache_codec.encode(value, codec), number=number) / number,
+                     timeit.timeit(lambda: cache_codec.decode(name, payload), number=number) / number))
+    return rows
+
+
+if __name__ == "__main__":
+    members = int(sys.argv[1]) if len(sys.argv) > 1 else 25
+    for label, value in (("tags analysis", tags_analysis(members)), ("daily history", daily_history(members))):
+        rows = measure(value)
+        base_size, base_decode = rows[0][1], rows[0][3]
+        print(f"\n{label} ({members} members)")
+        print(f"{'codec':<18}{'bytes':>10}{'ratio':>8}{'encode us':>12}{'decode us':>12}{'speedup':>9}")
+        for codec, size, encode_s, decode_s in rows:
+            print(f"{codec:<18}{size:>10}{base_size / size:>7.1f}x{encode_s * 1e6:>12.1f}{decode_s * 1e6:>12.1f}{base_decode / decode_s:>8.1f}x")
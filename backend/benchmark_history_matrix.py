@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Time the HistoryMatrix analytics on a synthetic team history
+(weekly snapshots with gaps, like a team recorded for several years).
+
+Usage: python backend/benchmark_history_matrix.py [members] [weeks]
+"""
+
+import os
+import random
+import sys
+import timeit
+from datetime import date, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.core.database import SnapshotRow
+from backend.core.weekly_deltas import DeltaRow
+from backend.utils.difficulty_analyzer import matrix_difficulty_trends
+from backend.utils.history_matrix import HistoryMatrix
+from backend.utils.week_over_week import DELTA_FIELDS, week_pair
+
+
+def team_history(members: int, weeks: int) -> list:
+    rng = random.Random(3)
+    start = date(2025, 1, 6) - timedelta(weeks=weeks)
+    rows = []
+    for i in range(members):
+        easy = medium = hard = 0
+        for w in range(weeks):
+            if rng.random() < 0.1:
+                continue  # missed snapshot
+            easy += rng.randint(0, 5)
+            medium += rng.randint(0, 4)
+            hard += rng.randint(0, 1)
+            rows.append(SnapshotRow(f"member_{i}", (start + timedelta(weeks=w)).isoformat(), easy + medium + hard, easy, medium, hard, None))
+    return rows
+
+
+def delta_rows(rows: list) -> list:
+    deltas, previous = [], {}
+    for row in rows:
+        prev = previous.get(row.member)
+        deltas.append(DeltaRow(
+            row.member, row.week_start, prev.week_start if prev else None, row.total, prev.total if prev else None,
+            row.total - (prev.total if prev else 0), 0, 0, 0, 1, None
+        ))
+        previous[row.member] = row
+    return deltas
+
+
+def measure(members: int, weeks: int, number: int = 20):
+    rows = team_history(members, weeks)
+    deltas = delta_rows(rows)
+    matrix = HistoryMatrix.from_rows(rows)
+    delta_matrix = HistoryMatrix.from_rows(deltas, DELTA_FIELDS)
+    last_week = matrix.weeks[-1]
+
+    cases = (
+        ("load snapshots", lambda: HistoryMatrix.from_rows(rows)),
+        ("forward-fill totals", matrix.forward_filled),
+        ("difficulty trends", lambda: matrix_difficulty_trends(matrix)),
+        ("load weekly deltas", lambda: HistoryMatrix.from_rows(deltas, DELTA_FIELDS)),
+        ("week-over-week pair", lambda: week_pair(delta_matrix, last_week)),
+    )
+    return len(rows), [(label, timeit.timeit(fn, number=number) / number) for label, fn in cases]
+
+
+if __name__ == "__main__":
+    members = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    weeks = int(sys.argv[2]) if len(sys.argv) > 2 else 156
+    count, timings = measure(members, weeks)
+    print(f"\n{members} members x {weeks} weeks ({count} snapshots)")
+    print(f"{'operation':<24}{'ms':>10}")
+    for label, seconds in timings:
+        print(f"{label:<24}{seconds * 1e3:>10.2f}")
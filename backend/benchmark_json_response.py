@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Time response serialization for large /analytics/history, /analytics/trends
+and /notifications payloads (synthetic team, several years of history).
+
+Compares what a route's return value costs before it reaches the client:
+- models + encoder + json: one WeeklySnapshot per row, then jsonable_encoder
+  and stdlib json (the old /history path)
+- encoder + json: FastAPI's default for plain dicts (jsonable_encoder, JSONResponse)
+- encoder + fast render: jsonable_encoder, then FastJSONResponse (orjson when installed)
+- fast_json: FastJSONResponse on the payload as is
+
+Usage: python backend/benchmark_json_response.py [members] [weeks] [notifications]
+"""
+
+import os
+import random
+import sys
+import timeit
+from datetime import date, datetime, timedelta, timezone
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from backend.api.analytics import WeeklySnapshot, history_payload
+from backend.core.database import SnapshotRow
+from backend.core.json_response import FastJSONResponse, fast_json, orjson
+
+
+def history_rows(members: int, weeks: int) -> list:
+    rng = random.Random(5)
+    start = date(2025, 1, 6) - timedelta(weeks=weeks)
+    rows = []
+    for i in range(members):
+        easy = medium = hard = 0
+        for w in range(weeks):
+            easy += rng.randint(0, 5)
+            medium += rng.randint(0, 4)
+            hard += rng.randint(0, 1)
+            rows.append(SnapshotRow(f"member_{i}", (start + timedelta(weeks=w)).isoformat(), easy + medium + hard, easy, medium, hard, None))
+    return rows
+
+
+def trends_payload(rows: list) -> dict:
+    members = {}
+    for row in rows:
+        members.setdefault(row.member, []).append(
+            {"week": row.week_start, "total": row.total, "easy": row.easy, "medium": row.medium, "hard": row.hard}
+        )
+    return {"weeks": sorted({row.week_start for row in rows}), "members": members}
+
+
+def notifications_payload(count: int) -> dict:
+    created = datetime(2025, 1, 6, tzinfo=timezone.utc)
+    notifications = [
+        {
+            "id": i,
+            "type": "milestone",
+            "title": f"🎉 Member {i % 50} reached {i} problems solved!",
+            "message": f"Congratulations to Member {i % 50} on this achievement!",
+            "recipient": f"member_{i % 50}",
+            "status": "sent",
+            "created_at": (created + timedelta(minutes=i)).isoformat(),
+            "priority": "medium",
+            "member_name": f"Member {i % 50}",
+            "milestone_type": "total_solved",
+            "read": i % 3 == 0,
+        }
+        for i in range(count)
+    ]
+    return {"notifications": notifications, "count": count, "unread_count": count - count // 3}
+
+
+def measure(members: int, weeks: int, notifications: int, number: int = 5):
+    rows = history_rows(members, weeks)
+    payloads = {
+        "history": history_payload(rows),
+        "trends": trends_payload(rows),
+        "notifications": notifications_payload(notifications),
+    }
+
+    def models_path():
+        models = [
+            WeeklySnapshot(week_start=r.week_start, member=r.member, totalSolved=r.total, easy=r.easy, medium=r.medium, hard=r.hard)
+            for r in rows
+        ]
+        return JSONResponse(jsonable_encoder(models))
+
+    results = []
+    for name, payload in payloads.items():
+        cases = [
+            ("encoder + json", lambda: JSONResponse(jsonable_encoder(payload))),
+            ("encoder + fast render", lambda: FastJSONResponse(jsonable_encoder(payload))),
+            ("fast_json", lambda: fast_json(payload)),
+        ]
+        if name == "history":
+            cases.insert(0, ("models + encoder + json", models_path))
+        size = len(fast_json(payload).body)
+        results.append((name, size, [(label, timeit.timeit(fn, number=number) / number) for label, fn in cases]))
+    return len(rows), results
+
+
+if __name__ == "__main__":
+    members = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    weeks = int(sys.argv[2]) if len(sys.argv) > 2 else 156
+    notifications = int(sys.argv[3]) if len(sys.argv) > 3 else 20000
+    count, results = measure(members, weeks, notifications)
+    print(f"\n{members} members x {weeks} weeks ({count} snapshots), {notifications} notifications")
+    print(f"renderer: {'orjson' if orjson is not None else 'json (orjson not installed)'}")
+    for name, size, timings in results:
+        print(f"\n{name} ({size / 1024:.0f} KiB)")
+        print(f"{'path':<26}{'ms':>10}")
+        for label, seconds in timings:
+            print(f"{label:<26}{seconds * 1e3:>10.2f}")
@@ -0,0 +1,430 @@
+"""
+Bulk persistence helpers for multi-row writes.
+
+Each helper takes a list of rows, writes them with a single executemany
+inside one transaction and returns one RowOutcome per input row (in input
+order). Rows that fail validation are reported as errors without aborting
+the rest of the batch.
+"""
+
+import json
+import logging
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from backend.core.closed_weeks import current_week_start, invalidate_closed_weeks
+from backend.core.data_version import (
+    bump_member_versions,
+    bump_owner_versions,
+    bump_recipient_versions,
+    owners_of,
+)
+from backend.core.database import PROMOTED_METADATA_FIELDS, get_db_connection
+from backend.core.db_backend import is_postgres
+from backend.core.weekly_deltas import refresh_weekly_deltas
+
+logger = logging.getLogger(__name__)
+
+
+# Error of a bulk_upsert_members row whose username another team already has
+OWNED_BY_ANOTHER_TEAM = "member belongs to another team"
+
+
+class RowOutcome(NamedTuple):
+    """Result of writing one row in a bulk call"""
+    key: Any
+    status: str  # inserted, updated, skipped or error
+    error: Optional[str] = None
+
+
+@contextmanager
+def transaction(conn=None):
+    """
+    Run the enclosed writes in one IMMEDIATE transaction.
+
+    If conn is given the caller owns the transaction and nothing is
+    committed here, so several bulk calls can share one commit.
+    """
+    if conn is not None:
+        yield conn
+        return
+
+    with get_db_connection() as new_conn:
+        # Take the write lock up front so the existence checks and the
+        # executemany see the same state (PostgreSQL connections are already
+        # inside a transaction and rely on ON CONFLICT instead)
+        if not is_postgres():
+            new_conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield new_conn
+            new_conn.commit()
+        except Exception:
+            new_conn.rollback()
+            raise
+
+
+def _existing_keys(cursor, table: str, key_columns: Tuple[str, ...], keys: List[tuple]) -> set:
+    """Return which composite keys already exist in table (chunked to stay under SQLite's variable limit)"""
+    existing = set()
+    if not keys:
+        return existing
+
+    per_row = len(key_columns)
+    chunk_size = max(1, 900 // per_row)
+    placeholder = "(" + ", ".join(["?"] * per_row) + ")"
+    columns = ", ".join(key_columns)
+
+    for i in range(0, len(keys), chunk_size):
+        chunk = keys[i:i + chunk_size]
+        cursor.execute(
+            f"SELECT {columns} FROM {table} WHERE ({columns}) IN (VALUES {', '.join([placeholder] * len(chunk))})",
+            [value for key in chunk for value in key]
+        )
+        existing.update(tuple(row) for row in cursor.fetchall())
+    return existing
+
+
+def _run_bulk(
+    table: str,
+    key_columns: Tuple[str, ...],
+    prepared: List[Tuple[Any, Optional[tuple], Optional[str]]],
+    sql: str,
+    overwrite: bool,
+    conn=None,
+    after_write: Optional[Callable[[Any], None]] = None,
+) -> List[RowOutcome]:
+    """
+    Shared executor: prepared holds (key, params or None, error) per input row.
+    Duplicate keys inside one batch are written once (last one wins).
+    after_write(cursor) runs in the same transaction once the rows are written.
+
+    A failed write is reported as per-row errors, except when conn is given:
+    the caller owns that transaction, so the exception is re-raised for it
+    to roll back instead of committing a half-written batch.
+    """
+    outcomes: List[Optional[RowOutcome]] = [None] * len(prepared)
+    valid: Dict[Any, Tuple[int, tuple]] = {}
+
+    for index, (key, params, error) in enumerate(prepared):
+        if error:
+            outcomes[index] = RowOutcome(key, "error", error)
+            continue
+        if key in valid:
+            earlier, _ = valid[key]
+            outcomes[earlier] = RowOutcome(key, "skipped", "superseded by a later row in the same batch")
+        valid[key] = (index, params)
+
+    if valid:
+        try:
+            with transaction(conn) as tx:
+                cursor = tx.cursor()
+                existing = _existing_keys(cursor, table, key_columns, list(valid))
+                cursor.executemany(sql, [params for _, params in valid.values()])
+                if after_write is not None:
+                    after_write(cursor)
+
+                for key, (index, _) in valid.items():
+                    if key not in existing:
+                        status = "inserted"
+                    else:
+                        status = "updated" if overwrite else "skipped"
+                    outcomes[index] = RowOutcome(key, status)
+        except Exception as e:
+            logger.error(f"Bulk write to {table} failed ({len(valid)} rows): {e}")
+            if conn is not None:
+                raise
+            for key, (index, _) in valid.items():
+                outcomes[index] = RowOutcome(key, "error", str(e))
+
+    return outcomes
+
+
+def _failed_outcomes(prepared: List[Tuple[Any, Optional[tuple], Optional[str]]], error: Exception) -> List[RowOutcome]:
+    """Per-row errors for a batch whose transaction was rolled back"""
+    return [RowOutcome(key, "error", row_error or str(error)) for key, _, row_error in prepared]
+
+
+def bulk_insert_snapshots(
+    rows: Iterable[Dict[str, Any]],
+    overwrite: bool = False,
+    conn=None,
+) -> List[RowOutcome]:
+    """
+    Write weekly snapshots.
+
+    Args:
+        rows: Dicts with username, week_start, totalSolved, easy, medium, hard
+              and optional timestamp
+        overwrite: Replace counts of an existing (username, week_start) row
+                   instead of keeping the first snapshot of the week
+        conn: Optional connection whose transaction the write joins
+    """
+    now = datetime.utcnow().isoformat()
+    prepared = []
+
+    for row in rows:
+        key = (row.get("username"), row.get("week_start"))
+        if not key[0] or not key[1]:
+            prepared.append((key, None, "username and week_start are required"))
+            continue
+        try:
+            params = (
+                key[0],
+                key[1],
+                int(row.get("totalSolved", 0) or 0),
+                int(row.get("easy", 0) or 0),
+                int(row.get("medium", 0) or 0),
+                int(row.get("hard", 0) or 0),
+                row.get("timestamp") or now,
+            )
+        except (TypeError, ValueError) as e:
+            prepared.append((key, None, f"invalid counts: {e}"))
+            continue
+        prepared.append((key, params, None))
+
+    conflict = """
+        DO UPDATE SET
+            total_solved = excluded.total_solved,
+            easy = excluded.easy,
+            medium = excluded.medium,
+            hard = excluded.hard,
+            timestamp = excluded.timestamp
+    """ if overwrite else "DO NOTHING"
+
+    sql = f"""
+        INSERT INTO snapshots (username, week_start, total_solved, easy, medium, hard, timestamp)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(username, week_start) {conflict}
+    """
+    try:
+        with transaction(conn) as tx:
+            outcomes = _run_bulk("snapshots", ("username", "week_start"), prepared, sql, overwrite, tx)
+
+            # Keep the materialized deltas and the teams' data versions in step, in the same transaction
+            written_keys = [o.key for o in outcomes if o.status in ("inserted", "updated")]
+            written = {username for username, _ in written_keys}
+            if written:
+                refresh_weekly_deltas(usernames=written, since=min(week for _, week in written_keys), conn=tx)
+                bump_member_versions(tx.cursor(), written)
+
+            # Rows for closed weeks are normally immutable; drop what was cached from them
+            this_week = current_week_start()
+            rewritten = {o.key[0] for o in outcomes if o.status in ("inserted", "updated") and o.key[1] < this_week}
+            if rewritten:
+                invalidate_closed_weeks(owners=owners_of(tx.cursor(), rewritten), conn=tx)
+    except Exception as e:
+        if conn is not None:
+            raise
+        return _failed_outcomes(prepared, e)
+
+    return outcomes
+
+
+def bulk_upsert_last_state(
+    owner_username: str,
+    member_data: Dict[str, Dict[str, Any]],
+    conn=None,
+) -> List[RowOutcome]:
+    """
+    Upsert last_state rows for members of owner_username ({member: fetch_user_data() dict}).
+
+    The owner's data version only moves when a member is new or their solved
+    counts changed, so refreshing an unchanged team keeps cached results valid.
+    """
+    prepared = []
+
+    for member_username, data in member_data.items():
+        member = data.get("username", member_username)
+        key = (owner_username, member)
+        if not member:
+            prepared.append((key, None, "member username is required"))
+            continue
+        prepared.append((key, (
+            owner_username,
+            member,
+            data.get("totalSolved", 0),
+            data.get("easy", 0),
+            data.get("medium", 0),
+            data.get("hard", 0),
+            data.get("ranking"),
+            data.get("realName"),
+            data.get("avatar"),
+            data.get("acceptanceRate"),
+        ), None))
+
+    sql = """
+        INSERT INTO last_state
+        (owner_username, member_username, total_solved, easy, medium, hard,
+         ranking, real_name, avatar, acceptance_rate, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT(owner_username, member_username) DO UPDATE SET
+            total_solved = excluded.total_solved,
+            easy = excluded.easy,
+            medium = excluded.medium,
+            hard = excluded.hard,
+            ranking = excluded.ranking,
+            real_name = excluded.real_name,
+            avatar = excluded.avatar,
+            acceptance_rate = excluded.acceptance_rate,
+            updated_at = CURRENT_TIMESTAMP
+    """
+    # Counts already stored were versioned by whoever wrote them, so reading
+    # them outside the write transaction cannot miss a change
+    with (transaction(conn) if conn is not None else get_db_connection()) as lookup:
+        cursor = lookup.cursor()
+        cursor.execute(
+            "SELECT member_username, total_solved, easy, medium, hard FROM last_state WHERE owner_username = ?",
+            (owner_username,)
+        )
+        previous = {row[0]: tuple(int(v or 0) for v in row[1:]) for row in cursor.fetchall()}
+
+    changed = any(
+        params is not None and previous.get(params[1]) != tuple(int(v or 0) for v in params[2:6])
+        for _, params, _ in prepared
+    )
+    return _run_bulk(
+        "last_state", ("owner_username", "member_username"), prepared, sql, True, conn,
+        after_write=(lambda cursor: bump_owner_versions(cursor, [owner_username])) if changed else None,
+    )
+
+
+def bulk_upsert_members(
+    owner_username: str,
+    members: Iterable[Dict[str, Any]],
+    overwrite: bool = False,
+    conn=None,
+) -> List[RowOutcome]:
+    """
+    Add members to owner_username's team.
+
+    Args:
+        members: Dicts with username and optional name, status, avatar
+        overwrite: Update name/status/avatar of existing members instead of skipping them
+    """
+    now = datetime.utcnow().isoformat()
+    members = list(members)
+    prepared = []
+
+    # Usernames are unique across teams; never touch another owner's member
+    usernames = [(m["username"],) for m in members if m.get("username")]
+    with (transaction(conn) if conn is not None else get_db_connection()) as lookup:
+        cursor = lookup.cursor()
+        owned_elsewhere = set()
+        for i in range(0, len(usernames), 900):
+            chunk = usernames[i:i + 900]
+            cursor.execute(
+                f"SELECT username FROM members WHERE username IN ({','.join(['?'] * len(chunk))}) AND team_owner != ?",
+                [u for (u,) in chunk] + [owner_username]
+            )
+            owned_elsewhere.update(row[0] for row in cursor.fetchall())
+
+    for member in members:
+        username = member.get("username")
+        if not username:
+            prepared.append(((username,), None, "username is required"))
+            continue
+        if username in owned_elsewhere:
+            prepared.append(((username,), None, OWNED_BY_ANOTHER_TEAM))
+            continue
+        prepared.append(((username,), (
+            username,
+            member.get("name") or username,
+            member.get("avatar"),
+            owner_username,
+            member.get("status", "active"),
+            member.get("created_at") or now,
+        ), None))
+
+    conflict = """
+        DO UPDATE SET
+            name = excluded.name,
+            avatar = COALESCE(excluded.avatar, members.avatar),
+            status = excluded.status
+    """ if overwrite else "DO NOTHING"
+
+    sql = f"""
+        INSERT INTO members (username, name, avatar, team_owner, status, created_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT(username) {conflict}
+    """
+    return _run_bulk(
+        "members", ("username",), prepared, sql, overwrite, conn,
+        after_write=lambda cursor: bump_owner_versions(cursor, [owner_username]),
+    )
+
+
+NOTIFICATION_INSERT_COLUMNS = (
+    "type, title, message, recipient, status, metadata, created_at, sent_at, "
+    "priority, member_name, milestone_type, link, action"
+)
+
+
+def notification_row(notification: Dict[str, Any], status: str = "pending") -> tuple:
+    """Build the notifications table row (in NOTIFICATION_INSERT_COLUMNS order) for a notification dict"""
+    # Queried fields get their own columns; the rest goes into the metadata blob
+    core_fields = {"type", "title", "message", "member", "created_at", *PROMOTED_METADATA_FIELDS}
+    metadata = {k: v for k, v in notification.items() if k not in core_fields}
+
+    # Channel-wide notifications have no member
+    recipient = notification.get("member") or "channel"
+
+    sent_at = datetime.now(timezone.utc).isoformat() if status == "sent" else None
+
+    return (
+        notification.get("type"),
+        notification.get("title"),
+        notification.get("message"),
+        recipient,
+        status,
+        json.dumps(metadata),
+        notification.get("created_at", datetime.now(timezone.utc).isoformat()),
+        sent_at,
+        notification.get("priority") or "medium",
+        notification.get("member_name"),
+        notification.get("milestone_type"),
+        notification.get("link"),
+        notification.get("action"),
+    )
+
+
+def bulk_insert_notifications(
+    notifications: Iterable[Tuple[Dict[str, Any], str]],
+    conn=None,
+) -> List[RowOutcome]:
+    """
+    Insert notifications in one transaction.
+
+    Args:
+        notifications: (notification dict, status) pairs
+
+    Returns:
+        One outcome per pair; the key is the position in the input
+    """
+    outcomes: List[RowOutcome] = []
+    params = []
+
+    for index, (notification, status) in enumerate(notifications):
+        if not notification.get("type") or not notification.get("title"):
+            outcomes.append(RowOutcome(index, "error", "type and title are required"))
+            continue
+        params.append(notification_row(notification, status))
+        outcomes.append(RowOutcome(index, "inserted"))
+
+    if not params:
+        return outcomes
+
+    try:
+        with transaction(conn) as tx:
+            cursor = tx.cursor()
+            cursor.executemany(f"""
+                INSERT INTO notifications ({NOTIFICATION_INSERT_COLUMNS})
+                VALUES ({", ".join(["?"] * len(params[0]))})
+            """, params)
+            # params[3] is the recipient column
+            bump_recipient_versions(cursor, [row[3] for row in params])
+    except Exception as e:
+        logger.error(f"Bulk notification insert failed ({len(params)} rows): {e}")
+        outcomes = [o if o.status == "error" else RowOutcome(o.key, "error", str(e)) for o in outcomes]
+
+    return outcomes
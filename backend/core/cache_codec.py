@@ -0,0 +1,127 @@
+"""
+Pluggable encoding of api_cache payloads.
+
+A codec is a serializer optionally followed by a compressor, named like
+"msgpack+zstd" or "orjson". The name is stored in the row's codec column so
+every row can be decoded no matter which codec wrote it; rows written before
+the column existed have no codec and hold JSON text in the data column.
+
+CACHE_CODEC picks the codec for new rows. "auto" uses the best one whose
+packages are installed: msgpack+zstd, orjson+zstd, orjson+zlib, then json+zlib
+(msgpack, zstandard and orjson are optional). Payloads smaller than
+CACHE_COMPRESS_MIN_BYTES are stored uncompressed.
+"""
+
+import json
+import logging
+import zlib
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+
+from backend.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Serializer(NamedTuple):
+    dumps: Callable[[Any], bytes]
+    loads: Callable[[bytes], Any]
+
+
+class Compressor(NamedTuple):
+    compress: Callable[[bytes], bytes]
+    decompress: Callable[[bytes], bytes]
+
+
+SERIALIZERS: Dict[str, Serializer] = {
+    "json": Serializer(
+        lambda value: json.dumps(value, separators=(",", ":")).encode("utf-8"),
+        lambda payload: json.loads(bytes(payload)),
+    ),
+}
+COMPRESSORS: Dict[str, Compressor] = {
+    "zlib": Compressor(lambda raw: zlib.compress(raw, 6), zlib.decompress),
+}
+
+try:
+    import orjson
+    # Non-string keys become strings, as with json
+    SERIALIZERS["orjson"] = Serializer(lambda value: orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS), orjson.loads)
+except ImportError:
+    pass
+
+try:
+    import msgpack
+    SERIALIZERS["msgpack"] = Serializer(
+        lambda value: msgpack.packb(value, use_bin_type=True),
+        # Non-string keys come back as stored (json would turn them into strings)
+        lambda payload: msgpack.unpackb(payload, raw=False, strict_map_key=False),
+    )
+except ImportError:
+    pass
+
+try:
+    import zstandard
+    _zstd_compressor = zstandard.ZstdCompressor(level=3)
+    _zstd_decompressor = zstandard.ZstdDecompressor()
+    COMPRESSORS["zstd"] = Compressor(_zstd_compressor.compress, _zstd_decompressor.decompress)
+except ImportError:
+    pass
+
+_AUTO_PREFERENCE = ("msgpack+zstd", "orjson+zstd", "orjson+zlib", "json+zlib")
+
+
+def register_serializer(name: str, dumps: Callable[[Any], bytes], loads: Callable[[bytes], Any]):
+    """Make a serializer available to CACHE_CODEC (and to decoding rows that use it)"""
+    SERIALIZERS[name] = Serializer(dumps, loads)
+
+
+def register_compressor(name: str, compress: Callable[[bytes], bytes], decompress: Callable[[bytes], bytes]):
+    COMPRESSORS[name] = Compressor(compress, decompress)
+
+
+def _split(codec: str) -> Tuple[str, Optional[str]]:
+    serializer, _, compressor = codec.partition("+")
+    return serializer, compressor or None
+
+
+def available(codec: str) -> bool:
+    serializer, compressor = _split(codec)
+    return serializer in SERIALIZERS and (compressor is None or compressor in COMPRESSORS)
+
+
+def default_codec() -> str:
+    """Codec used for new rows (CACHE_CODEC, resolving "auto")"""
+    configured = settings.CACHE_CODEC
+    if configured != "auto":
+        if available(configured):
+            return configured
+        logger.warning(f"Cache codec {configured} is not available, using auto")
+    return next(codec for codec in _AUTO_PREFERENCE if available(codec))
+
+
+def encode(value: Any, codec: Optional[str] = None) -> Tuple[str, bytes, int]:
+    """
+    Encode a value for api_cache.
+
+    Returns:
+        (codec name to store, payload, serialized size before compression)
+    """
+    serializer, compressor = _split(codec or default_codec())
+    raw = SERIALIZERS[serializer].dumps(value)
+    if compressor is None or len(raw) < settings.CACHE_COMPRESS_MIN_BYTES:
+        return serializer, raw, len(raw)
+    return f"{serializer}+{compressor}", COMPRESSORS[compressor].compress(raw), len(raw)
+
+
+def decode(codec: Optional[str], payload) -> Tuple[Any, int]:
+    """
+    Decode a stored payload (codec None means a legacy JSON text row).
+
+    Returns:
+        (value, serialized size before compression)
+    """
+    if codec is None:
+        return json.loads(payload), len(payload)
+    serializer, compressor = _split(codec)
+    raw = COMPRESSORS[compressor].decompress(payload) if compressor else payload
+    return SERIALIZERS[serializer].loads(raw), len(raw)
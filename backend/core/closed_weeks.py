@@ -0,0 +1,111 @@
+"""
+Permanent caching of analytics computed from closed weeks.
+
+Snapshots of weeks before the current one do not change, so results derived
+from them (week-over-week pairs, trend and progress series, streak history)
+are stored in api_cache once and only the open current week is recomputed
+per request.
+
+Keys carry a fingerprint of the team's member list, so adding, removing or
+renaming a member moves to fresh entries. Writes that do touch past weeks
+invalidate explicitly. Cached results are recomputed from weekly_deltas, so
+the invalidation has to follow the delta refresh in the same transaction,
+or the stale deltas are cached again: bulk_insert_snapshots does both for
+past-week rows (restore_history.py writes through it; force_update_member.py
+and force_snapshot_jadie.py do too, but only write the open week), while
+fix_missing_members.py and backfill_weekly_deltas.py call
+refresh_weekly_deltas() and then invalidate_closed_weeks() themselves.
+
+Values passed to set_closed_week are computed from the primary database,
+never the read replica: right after an invalidation the replica may still
+hold the pre-repair rows, which would otherwise be cached for the full TTL.
+"""
+
+import hashlib
+import logging
+from datetime import date, timedelta
+from typing import Any, Iterable, Optional
+
+from backend.core.config import settings
+from backend.core.database import delete_cached_prefix, get_cached_data, get_team_members_from_db, set_cached_data
+
+logger = logging.getLogger(__name__)
+
+CLOSED_WEEK_PREFIX = "closed_week_"
+
+
+def current_week_start(today: Optional[date] = None) -> str:
+    """Monday of the open week (ISO date)"""
+    today = today or date.today()
+    return (today - timedelta(days=today.weekday())).isoformat()
+
+
+def last_closed_day(today: Optional[date] = None) -> str:
+    """Sunday before the open week, the inclusive upper bound for closed-week queries"""
+    return (date.fromisoformat(current_week_start(today)) - timedelta(days=1)).isoformat()
+
+
+def team_fingerprint(members: Iterable[dict]) -> str:
+    """Short digest of the team's member usernames (suspended members included)"""
+    usernames = sorted(m["username"] for m in members)
+    return hashlib.sha1("\n".join(usernames).encode("utf-8")).hexdigest()[:12]
+
+
+def closed_week_fingerprint(owner_username: str) -> str:
+    """team_fingerprint of the team as the primary database has it"""
+    return team_fingerprint(get_team_members_from_db(owner_username))
+
+
+def closed_week_key(owner_username: str, kind: str, *parts) -> str:
+    suffix = "".join(f"_{part}" for part in parts)
+    return f"{CLOSED_WEEK_PREFIX}{owner_username}_{kind}{suffix}"
+
+
+def get_closed_week(owner_username: str, kind: str, *parts) -> Any:
+    """Cached closed-week result, or None"""
+    return get_cached_data(closed_week_key(owner_username, kind, *parts), ttl_seconds=settings.CACHE_CLOSED_WEEK_TTL_SECONDS)
+
+
+def set_closed_week(owner_username: str, kind: str, value: Any, *parts):
+    set_cached_data(closed_week_key(owner_username, kind, *parts), value, ttl_seconds=settings.CACHE_CLOSED_WEEK_TTL_SECONDS)
+
+
+def invalidate_closed_weeks(owners: Optional[Iterable[str]] = None, conn=None) -> int:
+    """
+    Drop cached closed-week results after past snapshots were edited.
+
+    Call it after refresh_weekly_deltas() and on the same connection: the
+    dropped results are rebuilt from weekly_deltas on the next request.
+
+    Args:
+        owners: Teams to invalidate (all teams when omitted)
+        conn: Optional connection whose transaction the delete joins; scripts
+              editing a database file directly pass their own connection
+
+    Returns:
+        Number of cache rows deleted
+    """
+    if owners is None:
+        prefixes = [CLOSED_WEEK_PREFIX]
+    else:
+        prefixes = [f"{CLOSED_WEEK_PREFIX}{owner}_" for owner in sorted(set(owners))]
+        if not prefixes:
+            return 0
+
+    if conn is not None:
+        return delete_cached_prefix(prefixes, conn=conn)
+
+    deleted = delete_cached_prefix(prefixes)
+
+    # With sharding each team's cache rows live in its own shard
+    from backend.core.sharding import current_owner, fan_out, owner_scope, sharding_enabled
+    if sharding_enabled() and current_owner() is None:
+        if owners is None:
+            deleted += sum(fan_out(lambda owner: delete_cached_prefix(prefixes)).values())
+        else:
+            for owner in sorted(set(owners)):
+                with owner_scope(owner):
+                    deleted += delete_cached_prefix([f"{CLOSED_WEEK_PREFIX}{owner}_"])
+
+    logger.info(f"Invalidated {deleted} closed-week cache rows")
+    return deleted
@@ -0,0 +1,92 @@
+"""
+Per-owner data versions for derived-result cache keys.
+
+data_versions holds one counter per team owner. Every write that can change
+what a team's analytics show bumps it in the same transaction:
+member add/update/delete, snapshot inserts, last_state changes and new
+notifications. Endpoints fold the current version into their api_cache key
+(see versioned_cache_key), so a cached result stays valid until the team's
+data changes instead of expiring on a guessed TTL.
+"""
+
+import logging
+from typing import Iterable, Optional, Set
+
+from backend.core.database import get_read_connection
+
+logger = logging.getLogger(__name__)
+
+_BUMP_SQL = """
+    INSERT INTO data_versions (owner_username, version, updated_at)
+    VALUES (?, 1, CURRENT_TIMESTAMP)
+    ON CONFLICT(owner_username) DO UPDATE SET
+        version = data_versions.version + 1,
+        updated_at = CURRENT_TIMESTAMP
+"""
+
+
+def bump_owner_versions(cursor, owners: Iterable[str]):
+    """Advance the data version of each owner (call inside the writing transaction)"""
+    owners = sorted({owner for owner in owners if owner})
+    if owners:
+        cursor.executemany(_BUMP_SQL, [(owner,) for owner in owners])
+
+
+def owners_of(cursor, usernames: Iterable[str]) -> Set[str]:
+    """Team owners of these members"""
+    usernames = list({username for username in usernames if username})
+    owners = set()
+    for i in range(0, len(usernames), 900):
+        chunk = usernames[i:i + 900]
+        cursor.execute(
+            f"SELECT DISTINCT team_owner FROM members WHERE username IN ({','.join(['?'] * len(chunk))})",
+            chunk
+        )
+        owners.update(row[0] for row in cursor.fetchall())
+    return owners
+
+
+def bump_member_versions(cursor, usernames: Iterable[str]):
+    """Advance the data version of the teams these members belong to"""
+    bump_owner_versions(cursor, owners_of(cursor, usernames))
+
+
+def bump_all_versions(cursor):
+    """Advance every known owner's version (for writes that concern all teams)"""
+    cursor.execute("UPDATE data_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP")
+
+
+def bump_recipient_versions(cursor, recipients: Iterable[str]):
+    """Advance versions for new notifications (channel-wide ones concern every team)"""
+    recipients = set(recipients)
+    if "channel" in recipients:
+        bump_all_versions(cursor)
+    else:
+        bump_member_versions(cursor, recipients)
+
+
+def get_data_version(owner_username: str, replica: bool = False) -> int:
+    """
+    Current data version of owner_username's team (0 before its first write).
+
+    With replica=True the version is the one in the read replica's copy,
+    i.e. the version of the data that replica reads return.
+    """
+    with get_read_connection(replica) as conn:
+        row = conn.execute(
+            "SELECT version FROM data_versions WHERE owner_username = ?", (owner_username,)
+        ).fetchone()
+        return row[0] if row else 0
+
+
+def versioned_cache_key(name: str, owner_username: str, *parts, version: Optional[int] = None) -> str:
+    """
+    api_cache key for a result derived from owner_username's data.
+
+    Example: versioned_cache_key("tags_analysis", "alice", 100) ->
+    "tags_analysis_alice_100_v7"
+    """
+    if version is None:
+        version = get_data_version(owner_username)
+    suffix = "".join(f"_{part}" for part in parts)
+    return f"{name}_{owner_username}{suffix}_v{version}"
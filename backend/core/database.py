@@ -1,15 +1,55 @@
 import sqlite3
 import logging
 from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
 from backend.core.config import settings
+from backend.core.db_backend import OperationalError, is_postgres, postgres_connection
+from backend.core import cache_codec
 import os
 
 logger = logging.getLogger(__name__)
 
 DB_PATH = os.path.join(settings.DATA_DIR, "leetcode.db")
 
+# Notification metadata fields stored in their own columns instead of the JSON blob
+PROMOTED_METADATA_FIELDS = ("priority", "member_name", "milestone_type", "link", "action")
+
+# Columns added to notifications after the table was first created
+NOTIFICATION_COLUMNS = {
+    "priority": "TEXT DEFAULT 'medium'",
+    "member_name": "TEXT",
+    "milestone_type": "TEXT",
+    "link": "TEXT",
+    "action": "TEXT",
+    "read": "INTEGER DEFAULT 0",
+}
+
+def _ensure_columns(cursor, table: str, columns: Dict[str, str]) -> List[str]:
+    """Add any missing columns to table; returns the names added (always empty on PostgreSQL)"""
+    if is_postgres():
+        # Translated to ADD COLUMN IF NOT EXISTS
+        for name, ddl in columns.items():
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {ddl}")
+        return []
+    
+    cursor.execute(f"PRAGMA table_info({table})")
+    existing = {row[1] for row in cursor.fetchall()}
+    added = [name for name in columns if name not in existing]
+    for name in added:
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {columns[name]}")
+    return added
+
 def init_db():
-    """Initialize the database with tables"""
+    """Initialize the database with tables (the catalog plus every team shard when sharding)"""
+    with _catalog_scope():
+        init_schema()
+
+    from backend.core.sharding import init_shards, sharding_enabled
+    if sharding_enabled():
+        init_shards()
+
+def init_schema():
+    """Create/migrate tables in the database the current owner scope routes to"""
     with get_db_connection() as conn:
         cursor = conn.cursor()
         
@@ -51,16 +91,53 @@ def init_db():
         # Create indices for performance
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_snapshots_username ON snapshots(username)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_snapshots_week ON snapshots(week_start)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_members_team_owner ON members(team_owner)")
         
         # API Cache table
         cursor.execute("""
         CREATE TABLE IF NOT EXISTS api_cache (
             key TEXT PRIMARY KEY,
             data TEXT,
-            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            expires_at REAL,
+            last_accessed REAL,
+            size_bytes INTEGER DEFAULT 0,
+            codec TEXT,
+            payload BLOB
         )
         """)
         
+        # Ensure TTL/LRU columns exist (migration for existing DBs)
+        try:
+            cursor.execute("SELECT expires_at, last_accessed, size_bytes FROM api_cache LIMIT 1")
+        except sqlite3.OperationalError:
+            logger.info("Adding TTL/LRU columns to api_cache table")
+            cursor.execute("ALTER TABLE api_cache ADD COLUMN expires_at REAL")
+            cursor.execute("ALTER TABLE api_cache ADD COLUMN last_accessed REAL")
+            cursor.execute("ALTER TABLE api_cache ADD COLUMN size_bytes INTEGER DEFAULT 0")
+            # Legacy rows get the default TTL counted from when they were written
+            cursor.execute("""
+                UPDATE api_cache
+                SET last_accessed = CAST(strftime('%s', timestamp, 'utc') AS REAL),
+                    expires_at = CAST(strftime('%s', timestamp, 'utc') AS REAL) + ?,
+                    size_bytes = length(data)
+            """, (settings.CACHE_DEFAULT_TTL_SECONDS,))
+        
+        # Encoded payloads (see backend.core.cache_codec); rows without a codec keep JSON text in data
+        _ensure_columns(cursor, "api_cache", {"codec": "TEXT", "payload": "BLOB"})
+        
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_api_cache_expires_at ON api_cache(expires_at)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_api_cache_last_accessed ON api_cache(last_accessed)")
+        
+        # Write generation of api_cache, checked by the in-process cache tier of every process
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS api_cache_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            generation INTEGER NOT NULL DEFAULT 0
+        )
+        """)
+        cursor.execute("INSERT INTO api_cache_state (id, generation) VALUES (1, 0) ON CONFLICT(id) DO NOTHING")
+        
         # System Settings table
         cursor.execute("""
         CREATE TABLE IF NOT EXISTS system_settings (
@@ -81,27 +158,211 @@ def init_db():
             status TEXT,
             metadata TEXT,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            sent_at TIMESTAMP
+            sent_at TIMESTAMP,
+            priority TEXT DEFAULT 'medium',
+            member_name TEXT,
+            milestone_type TEXT,
+            link TEXT,
+            action TEXT,
+            read INTEGER DEFAULT 0
+        )
+        """)
+        
+        # Promote frequently queried metadata fields to columns (migration for existing DBs)
+        added = _ensure_columns(cursor, "notifications", NOTIFICATION_COLUMNS)
+        if added and not is_postgres():
+            logger.info(f"Adding {', '.join(added)} columns to notifications table")
+            cursor.execute(f"""
+                UPDATE notifications SET
+                    {", ".join(f"{column} = COALESCE(json_extract(metadata, '$.{column}'), {column})" for column in PROMOTED_METADATA_FIELDS)}
+                WHERE json_valid(metadata)
+            """)
+        
+        # Users table (accounts)
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            username TEXT PRIMARY KEY,
+            email TEXT,
+            full_name TEXT,
+            hashed_password TEXT NOT NULL,
+            disabled INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_seen_at REAL
+        )
+        """)
+        # When the user last called the API (picks the teams the cache warmer prepares)
+        _ensure_columns(cursor, "users", {"last_seen_at": "REAL"})
+        
+        # Last known member state per owner (notification tracking)
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS last_state (
+            owner_username TEXT NOT NULL,
+            member_username TEXT NOT NULL,
+            total_solved INTEGER DEFAULT 0,
+            easy INTEGER DEFAULT 0,
+            medium INTEGER DEFAULT 0,
+            hard INTEGER DEFAULT 0,
+            ranking INTEGER,
+            real_name TEXT,
+            avatar TEXT,
+            acceptance_rate REAL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (owner_username, member_username)
+        )
+        """)
+        
+        # Materialized week-over-week deltas (maintained by backend.core.weekly_deltas)
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS weekly_deltas (
+            username TEXT NOT NULL,
+            week_start TEXT NOT NULL,
+            prev_week_start TEXT,
+            total_solved INTEGER DEFAULT 0,
+            prev_total INTEGER,
+            solved_delta INTEGER DEFAULT 0,
+            easy_delta INTEGER DEFAULT 0,
+            medium_delta INTEGER DEFAULT 0,
+            hard_delta INTEGER DEFAULT 0,
+            team_rank INTEGER,
+            rank_delta INTEGER,
+            PRIMARY KEY (username, week_start)
+        )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_weekly_deltas_week ON weekly_deltas(week_start)")
+        
+        # Backfill deltas for history recorded before the table existed
+        cursor.execute("SELECT 1 FROM weekly_deltas LIMIT 1")
+        if cursor.fetchone() is None:
+            cursor.execute("SELECT 1 FROM snapshots LIMIT 1")
+            if cursor.fetchone() is not None:
+                from backend.core.weekly_deltas import refresh_weekly_deltas
+                logger.info(f"Backfilled {refresh_weekly_deltas(conn=conn)} weekly_deltas rows")
+        
+        # Accepted problems observed per member and running per-tag counts (see backend.core.tag_stats)
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS member_solved_problems (
+            username TEXT NOT NULL,
+            title_slug TEXT NOT NULL,
+            solved_at INTEGER,
+            PRIMARY KEY (username, title_slug)
+        )
+        """)
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS member_tag_stats (
+            username TEXT NOT NULL,
+            tag TEXT NOT NULL,
+            solved_count INTEGER NOT NULL DEFAULT 0,
+            last_solved_at INTEGER,
+            PRIMARY KEY (username, tag)
+        )
+        """)
+        # When a member's recent accepted submissions were last folded in (NULL: never synced)
+        _ensure_columns(cursor, "members", {"tags_synced_at": "TEXT"})
+        # Members with problems recorded before the column existed were synced already
+        cursor.execute("""
+            UPDATE members SET tags_synced_at = CURRENT_TIMESTAMP
+            WHERE tags_synced_at IS NULL
+              AND username IN (SELECT DISTINCT username FROM member_solved_problems)
+        """)
+
+        # Per-owner data versions, bumped by every write to a team's data (see backend.core.data_version)
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS data_versions (
+            owner_username TEXT PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """)
+        
+        # Owner -> shard file routing (only used in the catalog, see backend.core.sharding)
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS shard_routes (
+            owner_username TEXT PRIMARY KEY,
+            shard_file TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """)
+        
+        # Cross-process caches and state (catalog only, see backend.core.shared_state)
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS shared_state (
+            key TEXT PRIMARY KEY,
+            codec TEXT,
+            payload BLOB,
+            expires_at REAL
+        )
+        """)
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS shared_lists (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            key TEXT NOT NULL,
+            codec TEXT,
+            payload BLOB
+        )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_shared_lists_key ON shared_lists(key, id)")
+
+        # Scheduled maintenance history (see backend.core.maintenance)
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS maintenance_runs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            database_name TEXT,
+            started_at REAL,
+            duration_seconds REAL,
+            size_before INTEGER,
+            size_after INTEGER,
+            freed_pages INTEGER DEFAULT 0,
+            steps TEXT,
+            status TEXT
         )
         """)
         
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_notifications_created_at ON notifications(created_at)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_notifications_status ON notifications(status)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_notifications_recipient ON notifications(recipient, created_at)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_notifications_priority ON notifications(priority, created_at)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_notifications_member_name ON notifications(member_name)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_notifications_milestone_type ON notifications(milestone_type)")
         
         # Insert default settings if not exist
-        cursor.execute("INSERT OR IGNORE INTO system_settings (key, value) VALUES ('weekly_goal', '100')")
-        cursor.execute("INSERT OR IGNORE INTO system_settings (key, value) VALUES ('team_name', '\"LeetCode Team\"')")
-        cursor.execute("INSERT OR IGNORE INTO system_settings (key, value) VALUES ('snapshot_schedule_day', '\"monday\"')")
-        cursor.execute("INSERT OR IGNORE INTO system_settings (key, value) VALUES ('snapshot_schedule_time', '\"07:30\"')")  # Changed from 00:00 to 07:30 to align with LeetCode's UTC 00:00 (GMT+7 07:00)
-        cursor.execute("INSERT OR IGNORE INTO system_settings (key, value) VALUES ('notification_check_interval', '15')")
-        cursor.execute("INSERT OR IGNORE INTO system_settings (key, value) VALUES ('problems_per_member_weekly', '3')")
+        cursor.execute("INSERT INTO system_settings (key, value) VALUES ('weekly_goal', '100') ON CONFLICT(key) DO NOTHING")
+        cursor.execute("INSERT INTO system_settings (key, value) VALUES ('team_name', '\"LeetCode Team\"') ON CONFLICT(key) DO NOTHING")
+        cursor.execute("INSERT INTO system_settings (key, value) VALUES ('snapshot_schedule_day', '\"monday\"') ON CONFLICT(key) DO NOTHING")
+        cursor.execute("INSERT INTO system_settings (key, value) VALUES ('snapshot_schedule_time', '\"07:30\"') ON CONFLICT(key) DO NOTHING")  # Changed from 00:00 to 07:30 to align with LeetCode's UTC 00:00 (GMT+7 07:00)
+        cursor.execute("INSERT INTO system_settings (key, value) VALUES ('notification_check_interval', '15') ON CONFLICT(key) DO NOTHING")
+        cursor.execute("INSERT INTO system_settings (key, value) VALUES ('problems_per_member_weekly', '3') ON CONFLICT(key) DO NOTHING")
         
         conn.commit()
         logger.info("Database initialized successfully")
 
-@contextmanager
+def _catalog_scope():
+    from backend.core.sharding import owner_scope
+    return owner_scope(None)
+
 def get_db_connection():
-    """Get database connection with row factory"""
+    """
+    Get database connection with row factory.
+
+    Uses the pooled PostgreSQL connection when DATABASE_URL is set. With
+    SHARDING_ENABLED, code running inside an owner scope gets that team's
+    shard; everything else gets the catalog (leetcode.db).
+    """
+    if not is_postgres() and settings.SHARDING_ENABLED:
+        from backend.core.sharding import current_owner, shard_connection
+        owner = current_owner()
+        if owner is not None:
+            return shard_connection(owner)
+    return get_catalog_connection()
+
+@contextmanager
+def get_catalog_connection():
+    """Connection to the main database, ignoring the owner scope (users, settings, shard routes)"""
+    if is_postgres():
+        with postgres_connection() as conn:
+            yield conn
+        return
+    
     conn = sqlite3.connect(DB_PATH)
     conn.row_factory = sqlite3.Row  # Return rows as dict-like objects
     try:
@@ -109,95 +370,467 @@ def get_db_connection():
     finally:
         conn.close()
 
-def get_user_history_from_db(owner_username: str) -> dict:
+def get_read_connection(replica: bool = False):
+    """
+    Connection for read-only queries.
+
+    With replica=True the query runs against the in-memory read replica when
+    it is running (READ_REPLICA_ENABLED), otherwise against the database file.
+    """
+    if replica:
+        from backend.core.read_replica import read_replica
+        return read_replica.connection()
+    return get_db_connection()
+
+class SnapshotRow(NamedTuple):
+    """Compact weekly snapshot record returned by query_history"""
+    member: str
+    week_start: str
+    total: int
+    easy: int
+    medium: int
+    hard: int
+    timestamp: Optional[str]
+
+
+def owner_week_filters(
+    owner_username: str,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    members: Optional[Iterable[str]] = None,
+    alias: str = "s",
+):
+    """
+    Build the WHERE clause shared by per-owner weekly queries.
+
+    The queried table (alias) must have username and week_start columns and
+    be joined to members as m. Returns (where, params), or None when members
+    is an empty collection (nothing can match).
+    """
+    conditions = ["m.team_owner = ?"]
+    params: list = [owner_username]
+
+    if since:
+        conditions.append(f"{alias}.week_start >= ?")
+        params.append(since)
+    if until:
+        conditions.append(f"{alias}.week_start <= ?")
+        params.append(until)
+    if members is not None:
+        members = list(members)
+        if not members:
+            return None
+        conditions.append(f"{alias}.username IN ({','.join(['?'] * len(members))})")
+        params.extend(members)
+
+    return " AND ".join(conditions), params
+
+
+def query_history(
+    owner_username: str,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    members: Optional[Iterable[str]] = None,
+    last_n: Optional[int] = None,
+    replica: bool = False,
+    after: Optional[Tuple[str, str]] = None,
+    limit: Optional[int] = None,
+) -> List[SnapshotRow]:
+    """
+    Fetch snapshots for a team owner with filters pushed down into SQL.
+
+    Args:
+        owner_username: Team owner whose members' snapshots are returned
+        since: Inclusive lower bound on week_start (ISO date)
+        until: Inclusive upper bound on week_start (ISO date)
+        members: Optional subset of member usernames
+        last_n: Keep only the N most recent snapshots per member (after the week filters)
+        replica: Read from the in-memory read replica if it is running
+        after: (member, week_start) of the last row already seen; only later rows are returned
+        limit: Return at most this many rows (pages with after)
+
+    Returns:
+        List of SnapshotRow ordered by member, then week_start ascending
+    """
+    built = _history_query(owner_username, since, until, members, last_n, after, limit)
+    if built is None:
+        return []
+    query, params = built
+
+    with get_read_connection(replica) as conn:
+        cursor = conn.cursor()
+        # Plain tuples are cheaper than sqlite3.Row and map straight onto SnapshotRow
+        cursor.row_factory = None
+        cursor.execute(query, params)
+        return list(map(SnapshotRow._make, cursor.fetchall()))
+
+
+def iter_history(owner_username: str, batch_rows: int = 500, **filters) -> Iterator[SnapshotRow]:
+    """
+    Stream query_history rows (same filters) from a cursor, batch_rows at a
+    time, so exports never hold the whole result.
+    """
+    replica = filters.pop("replica", False)
+    built = _history_query(owner_username, **filters)
+    if built is None:
+        return
+    query, params = built
+
+    with get_read_connection(replica) as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = None
+        cursor.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(batch_rows)
+            if not rows:
+                return
+            yield from map(SnapshotRow._make, rows)
+
+
+def _history_query(
+    owner_username: str,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    members: Optional[Iterable[str]] = None,
+    last_n: Optional[int] = None,
+    after: Optional[Tuple[str, str]] = None,
+    limit: Optional[int] = None,
+) -> Optional[Tuple[str, list]]:
+    """SQL and parameters of query_history (None when nothing can match)"""
+    filters = owner_week_filters(owner_username, since, until, members, alias="s")
+    if filters is None:
+        return None
+    where, params = filters
+    columns = "s.username, s.week_start, s.total_solved, s.easy, s.medium, s.hard, s.timestamp"
+
+    # Keyset pagination over the (member, week_start) order
+    def after_condition(prefix: str) -> str:
+        if after is None:
+            return ""
+        return f" AND ({prefix}username > ? OR ({prefix}username = ? AND {prefix}week_start > ?))"
+
+    if last_n is not None:
+        query = f"""
+            SELECT username, week_start, total_solved, easy, medium, hard, timestamp
+            FROM (
+                SELECT {columns},
+                       ROW_NUMBER() OVER (PARTITION BY s.username ORDER BY s.week_start DESC) AS rn
+                FROM snapshots s
+                JOIN members m ON m.username = s.username
+                WHERE {where}
+            ) latest
+            WHERE rn <= ?{after_condition("")}
+            ORDER BY username, week_start
+        """
+        params.append(max(0, int(last_n)))
+    else:
+        query = f"""
+            SELECT {columns}
+            FROM snapshots s
+            JOIN members m ON m.username = s.username
+            WHERE {where}{after_condition("s.")}
+            ORDER BY s.username, s.week_start
+        """
+
+    if after is not None:
+        params.extend([after[0], after[0], after[1]])
+    if limit is not None:
+        query += " LIMIT ?"
+        params.append(max(0, int(limit)))
+    return query, params
+
+
+def group_history_rows(rows: Iterable[SnapshotRow]) -> Dict[str, List[SnapshotRow]]:
+    """Group query_history rows into {member: [rows oldest first]}"""
+    grouped: Dict[str, List[SnapshotRow]] = {}
+    for row in rows:
+        grouped.setdefault(row.member, []).append(row)
+    return grouped
+
+
+def get_user_history_from_db(owner_username: str, **filters) -> dict:
     """
     Fetch history for all members of a team owner.
     Returns data in the legacy dictionary format: {username: [snapshots]}
+
+    Accepts the same keyword filters as query_history.
     """
     history = {}
-    
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
-        
-        # Get members belonging to this owner
-        cursor.execute("SELECT username FROM members WHERE team_owner = ?", (owner_username,))
-        members = [row["username"] for row in cursor.fetchall()]
-        
-        if not members:
-            return {}
-            
-        # Get snapshots for these members
-        placeholders = ",".join(["?"] * len(members))
-        cursor.execute(f"""
-            SELECT * FROM snapshots 
-            WHERE username IN ({placeholders})
-            ORDER BY week_start ASC
-        """, members)
-        
-        rows = cursor.fetchall()
-        
-        for row in rows:
-            username = row["username"]
-            if username not in history:
-                history[username] = []
-                
-            snapshot = {
-                "week_start": row["week_start"],
-                "member": username,
-                "totalSolved": row["total_solved"],
-                "easy": row["easy"],
-                "medium": row["medium"],
-                "hard": row["hard"],
-                "timestamp": row["timestamp"]
-            }
-            history[username].append(snapshot)
-            
+
+    for row in query_history(owner_username, **filters):
+        history.setdefault(row.member, []).append({
+            "week_start": row.week_start,
+            "member": row.member,
+            "totalSolved": row.total,
+            "easy": row.easy,
+            "medium": row.medium,
+            "hard": row.hard,
+            "timestamp": row.timestamp
+        })
+
     return history
 
+def _cache_namespace() -> tuple:
+    """Identifies the database api_cache calls go to (the owner's shard when sharding)"""
+    if settings.SHARDING_ENABLED and not is_postgres():
+        from backend.core.sharding import current_owner
+        return (DB_PATH, current_owner())
+    return (DB_PATH, None)
+
+def _read_cache_generation() -> int:
+    with get_db_connection() as conn:
+        row = conn.execute("SELECT generation FROM api_cache_state WHERE id = 1").fetchone()
+        return row[0] if row else 0
+
+def _bump_cache_generation(cursor) -> int:
+    cursor.execute("UPDATE api_cache_state SET generation = generation + 1 WHERE id = 1 RETURNING generation")
+    row = cursor.fetchone()
+    return row[0] if row else 0
+
 def get_cached_data(key: str, ttl_seconds: int = 3600) -> dict | list | None:
-    """Get data from cache if valid"""
-    import json
-    from datetime import datetime, timedelta
+    """
+    Get data from cache if valid.
+    
+    Reads through the in-process tier (backend.core.memory_cache) first;
+    the returned value may be shared with other callers and must not be mutated.
+    """
+    import time
+    from datetime import datetime
+    from backend.core.memory_cache import memory_cache
+    
+    now = time.time()
+    namespace = None
+    if settings.CACHE_L1_ENABLED:
+        namespace = _cache_namespace()
+        memory_cache.validate(namespace, _read_cache_generation)
+        entry = memory_cache.get(namespace, key, now)
+        if entry is not None:
+            # The reader's TTL still applies on top of the stored expiry
+            if now - entry.written_at >= ttl_seconds:
+                return None
+            if entry.touched_at < now - settings.CACHE_ACCESS_RESOLUTION_SECONDS:
+                _touch_cached_row(key, now)
+                memory_cache.touch(namespace, key, now)
+            return entry.value
     
     with get_db_connection() as conn:
         cursor = conn.cursor()
-        cursor.execute("SELECT data, timestamp FROM api_cache WHERE key = ?", (key,))
+        cursor.execute("SELECT data, codec, payload, timestamp, expires_at, last_accessed FROM api_cache WHERE key = ?", (key,))
         row = cursor.fetchone()
         
         if row:
-            # Check expiry
+            if row["expires_at"] is not None and row["expires_at"] <= now:
+                # Expired, left for the sweeper to delete
+                return None
+            
+            # The reader's TTL still applies on top of the stored expiry
             # timestamp is string in SQLite usually
-            cached_time = datetime.fromisoformat(row["timestamp"])
-            if datetime.now() - cached_time < timedelta(seconds=ttl_seconds):
+            written_at = datetime.fromisoformat(row["timestamp"]).timestamp()
+            if now - written_at >= ttl_seconds:
+                return None
+            
+            # Track recency for LRU eviction, at most once per resolution window
+            if (row["last_accessed"] or 0) < now - settings.CACHE_ACCESS_RESOLUTION_SECONDS:
                 try:
-                    return json.loads(row["data"])
-                except:
-                    return None
-            else:
-                # Expired
+                    cursor.execute("UPDATE api_cache SET last_accessed = ? WHERE key = ?", (now, key))
+                    conn.commit()
+                except OperationalError as e:
+                    logger.debug(f"Skipped last_accessed update for {key}: {e}")
+            
+            try:
+                if row["codec"] is None:
+                    # Legacy row: JSON text in data
+                    value, size = cache_codec.decode(None, row["data"])
+                else:
+                    value, size = cache_codec.decode(row["codec"], row["payload"])
+            except Exception as e:
+                logger.debug(f"Undecodable cache row {key}: {e}")
                 return None
+            
+            if namespace is not None:
+                expires_at = row["expires_at"] if row["expires_at"] is not None else float("inf")
+                memory_cache.put(namespace, key, value, size, written_at, expires_at)
+            return value
     return None
 
-def set_cached_data(key: str, data: dict | list):
-    """Save data to cache"""
-    import json
+def _touch_cached_row(key: str, now: float):
+    try:
+        with get_db_connection() as conn:
+            conn.execute("UPDATE api_cache SET last_accessed = ? WHERE key = ?", (now, key))
+            conn.commit()
+    except OperationalError as e:
+        logger.debug(f"Skipped last_accessed update for {key}: {e}")
+
+def set_cached_data(key: str, data: dict | list, ttl_seconds: Optional[int] = None):
+    """
+    Save data to cache, expiring after ttl_seconds (CACHE_DEFAULT_TTL_SECONDS if omitted).
+    
+    The payload is encoded with the configured codec (backend.core.cache_codec).
+    """
+    import time
     from datetime import datetime
+    from backend.core.memory_cache import memory_cache
     
-    json_data = json.dumps(data)
-    now = datetime.now().isoformat()
+    codec, payload, raw_size = cache_codec.encode(data)
+    written = datetime.now()
+    now_ts = time.time()
+    ttl = ttl_seconds if ttl_seconds is not None else settings.CACHE_DEFAULT_TTL_SECONDS
     
     with get_db_connection() as conn:
         cursor = conn.cursor()
         cursor.execute("""
-        INSERT OR REPLACE INTO api_cache (key, data, timestamp)
-        VALUES (?, ?, ?)
-        """, (key, json_data, now))
+        INSERT INTO api_cache (key, data, codec, payload, timestamp, expires_at, last_accessed, size_bytes)
+        VALUES (?, NULL, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(key) DO UPDATE SET
+            data = NULL,
+            codec = excluded.codec,
+            payload = excluded.payload,
+            timestamp = excluded.timestamp,
+            expires_at = excluded.expires_at,
+            last_accessed = excluded.last_accessed,
+            size_bytes = excluded.size_bytes
+        """, (key, codec, payload, written.isoformat(), now_ts + ttl, now_ts, len(payload)))
+        # No generation bump: that would drop every other process's in-process
+        # tier. Their copy of an overwritten key ages out after CACHE_L1_MAX_TTL_SECONDS.
         conn.commit()
+    
+    if settings.CACHE_L1_ENABLED:
+        namespace = _cache_namespace()
+        memory_cache.validate(namespace, _read_cache_generation)
+        # Cache the decoded copy, so readers see exactly what the database tier would return
+        memory_cache.put(namespace, key, cache_codec.decode(codec, payload)[0], raw_size, written.timestamp(), now_ts + ttl)
 
-def get_team_members_from_db(owner_username: str) -> list:
-    """Fetch all members for a team owner"""
+def delete_cached_data(key: str):
+    """Invalidate one cache entry in the database and in-process tiers"""
+    from backend.core.memory_cache import memory_cache
+    
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM api_cache WHERE key = ?", (key,))
+        # Only a deleted row can be held in another process's tier
+        generation = _bump_cache_generation(cursor) if cursor.rowcount > 0 else None
+        conn.commit()
+    
+    if settings.CACHE_L1_ENABLED:
+        namespace = _cache_namespace()
+        if generation is not None:
+            memory_cache.note_write(namespace, generation)
+        memory_cache.discard(namespace, key)
+
+def delete_cached_prefix(prefixes: Iterable[str], conn=None) -> int:
+    """
+    Invalidate every cache entry whose key starts with one of prefixes.
+    
+    Joins conn's transaction when given (the caller commits); returns the
+    number of rows deleted.
+    """
+    from backend.core.memory_cache import memory_cache
+    
+    prefixes = list(prefixes)
+    if conn is None:
+        with get_db_connection() as new_conn:
+            deleted = delete_cached_prefix(prefixes, conn=new_conn)
+            new_conn.commit()
+            return deleted
+    
+    cursor = conn.cursor()
+    deleted = 0
+    for prefix in prefixes:
+        cursor.execute("DELETE FROM api_cache WHERE substr(key, 1, ?) = ?", (len(prefix), prefix))
+        deleted += max(cursor.rowcount, 0)
+    generation = None
+    if deleted:
+        # Other processes drop their in-process tier on the next generation check
+        generation = _bump_cache_generation(cursor)
+    
+    if settings.CACHE_L1_ENABLED:
+        namespace = _cache_namespace()
+        for prefix in prefixes:
+            memory_cache.discard_prefix(namespace, prefix)
+        if generation is not None:
+            memory_cache.note_write(namespace, generation)
+    return deleted
+
+def sweep_api_cache(batch_size: Optional[int] = None, max_bytes: Optional[int] = None) -> Dict[str, int]:
+    """
+    Delete expired api_cache rows in batches, then evict least recently
+    accessed rows until the total payload size is under max_bytes.
+    
+    Each batch is committed separately so readers and writers are never
+    blocked for long.
+    
+    Returns:
+        Dict with expired, evicted and remaining_bytes counts
+    """
+    import time
+    
+    batch_size = batch_size or settings.CACHE_SWEEP_BATCH_SIZE
+    max_bytes = settings.CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    expired = 0
+    evicted = 0
+    
     with get_db_connection() as conn:
         cursor = conn.cursor()
+        
+        # 1. Expired rows
+        now = time.time()
+        while True:
+            cursor.execute("""
+                DELETE FROM api_cache WHERE key IN (
+                    SELECT key FROM api_cache WHERE expires_at <= ? LIMIT ?
+                )
+            """, (now, batch_size))
+            conn.commit()
+            expired += cursor.rowcount
+            if cursor.rowcount < batch_size:
+                break
+        
+        # 2. Size cap (LRU)
+        cursor.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM api_cache")
+        total_bytes = cursor.fetchone()[0]
+        
+        while total_bytes > max_bytes:
+            cursor.execute("""
+                SELECT key, size_bytes FROM api_cache
+                ORDER BY last_accessed ASC
+                LIMIT ?
+            """, (batch_size,))
+            candidates = cursor.fetchall()
+            if not candidates:
+                break
+            
+            victims = []
+            for row in candidates:
+                if total_bytes <= max_bytes:
+                    break
+                victims.append(row["key"])
+                total_bytes -= row["size_bytes"] or 0
+            
+            cursor.execute(
+                f"DELETE FROM api_cache WHERE key IN ({','.join(['?'] * len(victims))})",
+                victims
+            )
+            conn.commit()
+            evicted += cursor.rowcount
+        
+        if evicted:
+            # Evicted rows are still live in other processes' in-memory tiers (expired ones expire there too)
+            _bump_cache_generation(cursor)
+            conn.commit()
+    
+    if evicted and settings.CACHE_L1_ENABLED:
+        from backend.core.memory_cache import memory_cache
+        memory_cache.clear(_cache_namespace())
+    
+    if expired or evicted:
+        logger.info(f"api_cache sweep: {expired} expired, {evicted} evicted, {total_bytes} bytes remaining")
+    
+    return {"expired": expired, "evicted": evicted, "remaining_bytes": total_bytes}
+
+def get_team_members_from_db(owner_username: str, replica: bool = False) -> list:
+    """Fetch all members for a team owner"""
+    with get_read_connection(replica) as conn:
+        cursor = conn.cursor()
         cursor.execute("SELECT username, name, team_owner, status FROM members WHERE team_owner = ?", (owner_username,))
         rows = cursor.fetchall()
         return [dict(row) for row in rows]
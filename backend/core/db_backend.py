@@ -0,0 +1,261 @@
+"""
+Storage backend selection.
+
+SQLite (DATA_DIR/leetcode.db) is the default. Setting DATABASE_URL to a
+postgresql:// URL runs every module on PostgreSQL instead, through a bounded
+psycopg connection pool shared by all threads of the process.
+
+Queries across the codebase are written in SQLite's dialect ("?"
+placeholders, sqlite-style DDL). PostgresConnection rewrites them on the way
+through and hands back rows that index like sqlite3.Row, so callers do not
+need to know which backend they are on. psycopg prepares a statement
+server-side once it has been executed DB_PREPARE_THRESHOLD times on a
+connection, which covers the hot per-request queries.
+"""
+
+import logging
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Optional, Sequence
+
+from backend.core.config import settings
+
+try:
+    import psycopg
+    from psycopg.rows import tuple_row
+    from psycopg_pool import ConnectionPool
+except ImportError:  # Only needed when DATABASE_URL points at PostgreSQL
+    psycopg = None
+    tuple_row = None
+    ConnectionPool = None
+
+logger = logging.getLogger(__name__)
+
+# Exceptions callers can catch regardless of backend
+OperationalError = (sqlite3.OperationalError,) + ((psycopg.OperationalError,) if psycopg else ())
+IntegrityError = (sqlite3.IntegrityError,) + ((psycopg.IntegrityError,) if psycopg else ())
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def is_postgres() -> bool:
+    """True when DATABASE_URL selects the PostgreSQL backend"""
+    return settings.DATABASE_URL.startswith(("postgres://", "postgresql://"))
+
+
+# --- SQL translation ---------------------------------------------------------
+
+# Same text format as SQLite's CURRENT_TIMESTAMP, so timestamp columns stay strings
+_PG_NOW = "(to_char(timezone('utc', now()), 'YYYY-MM-DD HH24:MI:SS'))"
+
+_DDL_REWRITES = [
+    (re.compile(r"\bINTEGER PRIMARY KEY AUTOINCREMENT\b"), "BIGSERIAL PRIMARY KEY"),
+    (re.compile(r"\bREAL\b"), "DOUBLE PRECISION"),
+    (re.compile(r"\bBLOB\b"), "BYTEA"),
+    # Dates and timestamps are stored and compared as ISO strings throughout
+    (re.compile(r"\b(?:TIMESTAMP|DATE)\b"), "TEXT"),
+    # SQLite never enforced these (foreign_keys is off) and history rows
+    # intentionally outlive deleted members
+    (re.compile(r",\s*FOREIGN KEY\s*\([^)]*\)\s*REFERENCES\s+\w+\s*\([^)]*\)"), ""),
+    (re.compile(r"\bADD COLUMN\b(?! IF NOT EXISTS)"), "ADD COLUMN IF NOT EXISTS"),
+]
+_CURRENT_TIMESTAMP = re.compile(r"\bCURRENT_TIMESTAMP\b")
+_DDL_STATEMENT = re.compile(r"^\s*(CREATE|ALTER)\s+TABLE\b", re.IGNORECASE)
+
+_translated: Dict[tuple, str] = {}
+
+
+def translate_sql(sql: str, has_params: bool = True) -> str:
+    """
+    Rewrite a SQLite-dialect statement for PostgreSQL.
+
+    "?" placeholders outside string literals become "%s" (and literal "%"
+    is escaped when parameters are bound), sqlite column types in CREATE/ALTER
+    TABLE map to their PostgreSQL equivalents and CURRENT_TIMESTAMP keeps
+    SQLite's text format.
+    """
+    cache_key = (sql, has_params)
+    cached = _translated.get(cache_key)
+    if cached is not None:
+        return cached
+
+    statement = sql
+    if _DDL_STATEMENT.match(statement):
+        for pattern, replacement in _DDL_REWRITES:
+            statement = pattern.sub(replacement, statement)
+    statement = _CURRENT_TIMESTAMP.sub(_PG_NOW, statement)
+
+    if has_params:
+        out = []
+        quote = None
+        for char in statement:
+            if quote:
+                if char == quote:
+                    quote = None
+            elif char in ("'", '"'):
+                quote = char
+            elif char == "?":
+                out.append("%s")
+                continue
+            out.append("%%" if char == "%" else char)
+        statement = "".join(out)
+
+    # Statements are static strings (plus a handful of IN-list shapes), so this stays small
+    if len(_translated) < 4096:
+        _translated[cache_key] = statement
+    return statement
+
+
+# --- Connection adapter ------------------------------------------------------
+
+class Row(tuple):
+    """Result row indexable by position or column name, like sqlite3.Row"""
+
+    def __new__(cls, values: Sequence[Any], index: Dict[str, int]):
+        row = super().__new__(cls, values)
+        row._index = index
+        return row
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return tuple.__getitem__(self, self._index[key])
+        return tuple.__getitem__(self, key)
+
+    def keys(self):
+        return list(self._index)
+
+
+def _named_row(cursor):
+    if cursor.description is None:
+        return tuple
+    index = {column.name: i for i, column in enumerate(cursor.description)}
+    return lambda values: Row(values, index)
+
+
+_NAMED = object()
+
+
+class PostgresCursor:
+    """Wraps a psycopg cursor with the subset of the sqlite3 cursor API used here"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        # Set to None for plain tuples, as with sqlite3 cursors
+        self.row_factory = _NAMED
+
+    def execute(self, sql: str, params: Optional[Sequence[Any]] = None):
+        self._cursor.row_factory = _named_row if self.row_factory is not None else tuple_row
+        self._cursor.execute(translate_sql(sql, params is not None), params)
+        return self
+
+    def executemany(self, sql: str, seq_of_params: Iterable[Sequence[Any]]):
+        self._cursor.executemany(translate_sql(sql, True), list(seq_of_params))
+        return self
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def fetchmany(self, size: int = 1):
+        return self._cursor.fetchmany(size)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    @property
+    def rowcount(self) -> int:
+        return self._cursor.rowcount
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def lastrowid(self):
+        # Not available on PostgreSQL; use INSERT ... RETURNING instead
+        return None
+
+    def close(self):
+        self._cursor.close()
+
+
+class PostgresConnection:
+    """Pooled psycopg connection exposing the sqlite3 connection API used here"""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self) -> PostgresCursor:
+        return PostgresCursor(self._conn.cursor())
+
+    def execute(self, sql: str, params: Optional[Sequence[Any]] = None) -> PostgresCursor:
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql: str, seq_of_params: Iterable[Sequence[Any]]) -> PostgresCursor:
+        return self.cursor().executemany(sql, seq_of_params)
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        # Returned to the pool by postgres_connection()
+        pass
+
+
+# --- Pool --------------------------------------------------------------------
+
+def _get_pool():
+    global _pool
+    if _pool is not None:
+        return _pool
+
+    with _pool_lock:
+        if _pool is None:
+            if ConnectionPool is None:
+                raise RuntimeError(
+                    "DATABASE_URL points at PostgreSQL but psycopg is not installed "
+                    "(pip install 'psycopg[binary,pool]')"
+                )
+            _pool = ConnectionPool(
+                settings.DATABASE_URL,
+                min_size=settings.DB_POOL_MIN_SIZE,
+                max_size=settings.DB_POOL_MAX_SIZE,
+                timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+                kwargs={"prepare_threshold": settings.DB_PREPARE_THRESHOLD},
+                name="leetcode-db",
+                open=True,
+            )
+            logger.info(
+                f"PostgreSQL pool opened (min {settings.DB_POOL_MIN_SIZE}, max {settings.DB_POOL_MAX_SIZE})"
+            )
+    return _pool
+
+
+@contextmanager
+def postgres_connection():
+    """
+    Borrow a connection from the pool.
+
+    Waits up to DB_POOL_TIMEOUT_SECONDS when all DB_POOL_MAX_SIZE connections
+    are in use. Anything left uncommitted is committed on a clean exit and
+    rolled back if the block raises.
+    """
+    with _get_pool().connection() as conn:
+        yield PostgresConnection(conn)
+
+
+def close_pool():
+    """Close the PostgreSQL pool (no-op on SQLite)"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
@@ -0,0 +1,48 @@
+"""
+Fast JSON serialization for API responses.
+
+FastJSONResponse is the app's default response class and renders with
+orjson when it is installed (stdlib json otherwise). FastAPI still runs
+jsonable_encoder over whatever a route returns before rendering it, so
+routes with large payloads that are already plain JSON data (typed straight
+from SQL) return fast_json(payload) instead, which skips that walk. Values
+orjson cannot serialize natively (Pydantic models, Decimal, ...) fall back
+to jsonable_encoder one value at a time.
+"""
+
+import json
+from typing import Any, Dict, Optional
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    # Non-string keys become strings and NumPy values are native, as after jsonable_encoder
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def dumps_json(value: Any) -> bytes:
+        """Compact UTF-8 JSON"""
+        return orjson.dumps(value, default=jsonable_encoder, option=_ORJSON_OPTIONS)
+else:
+    def dumps_json(value: Any) -> bytes:
+        """Compact UTF-8 JSON"""
+        return json.dumps(
+            value, default=jsonable_encoder, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+        ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with dumps_json"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps_json(content)
+
+
+def fast_json(content: Any, headers: Optional[Dict[str, str]] = None, status_code: int = 200) -> FastJSONResponse:
+    """Respond with plain JSON data as is, without FastAPI's jsonable_encoder pass"""
+    return FastJSONResponse(content, status_code=status_code, headers=headers)
@@ -4,6 +4,7 @@ Database helper functions for last_state management (notification tracking)
 
 from typing import Dict, Any
 from backend.core.database import get_db_connection
+from backend.core.bulk_db import bulk_upsert_last_state
 import logging
 
 logger = logging.getLogger(__name__)
@@ -42,32 +43,9 @@ def get_last_state(owner_username: str) -> Dict[str, Dict[str, Any]]:
 
 
 def update_last_state(owner_username: str, member_data: Dict[str, Dict[str, Any]]) -> bool:
-    """Update last state for members"""
-    try:
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            
-            for member_username, data in member_data.items():
-                cursor.execute("""
-                    INSERT OR REPLACE INTO last_state 
-                    (owner_username, member_username, total_solved, easy, medium, hard,
-                     ranking, real_name, avatar, acceptance_rate, updated_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-                """, (
-                    owner_username,
-                    data.get("username", member_username),
-                    data.get("totalSolved", 0),
-                    data.get("easy", 0),
-                    data.get("medium", 0),
-                    data.get("hard", 0),
-                    data.get("ranking"),
-                    data.get("realName"),
-                    data.get("avatar"),
-                    data.get("acceptanceRate")
-                ))
-            
-            conn.commit()
-            return True
-    except Exception as e:
-        logger.error(f"Error updating last_state for {owner_username}: {e}")
-        return False
+    """Update last state for members (one transaction for the whole team)"""
+    outcomes = bulk_upsert_last_state(owner_username, member_data)
+    failed = [o for o in outcomes if o.status == "error"]
+    for outcome in failed:
+        logger.error(f"Error updating last_state for {owner_username}/{outcome.key[1]}: {outcome.error}")
+    return not failed
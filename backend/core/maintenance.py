@@ -0,0 +1,215 @@
+"""
+Routine SQLite maintenance.
+
+notifications, api_cache and point_transactions churn constantly, which
+leaves free pages in the file and the query planner with stale statistics.
+run_maintenance() refreshes statistics (ANALYZE / PRAGMA optimize), returns
+free pages to the filesystem with incremental vacuum and checkpoints the WAL
+when one is in use. Work is split into small steps under a time budget so a
+run never holds the write lock for long, and it is skipped entirely while
+the API is serving requests.
+
+Every run is recorded in the catalog's maintenance_runs table.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import time
+from typing import Any, Dict, List, Optional
+
+from backend.core import database
+from backend.core.config import settings
+from backend.core.db_backend import is_postgres
+
+logger = logging.getLogger(__name__)
+
+# Touched by the API on each request (at most once per second)
+ACTIVITY_FILE = ".api_activity"
+
+_AUTO_VACUUM_INCREMENTAL = 2
+
+# database_name of the maintenance_runs row written when a whole run is skipped
+SKIPPED_RUN_NAME = "all"
+
+_last_activity_marks: Dict[str, float] = {}
+
+
+def _activity_path() -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(database.DB_PATH)), ACTIVITY_FILE)
+
+
+def mark_api_activity():
+    """Record that the API is handling a request (shared with the scheduler process via file mtime)"""
+    path = _activity_path()
+    now = time.time()
+    if now - _last_activity_marks.get(path, 0.0) < 1.0:
+        return
+    _last_activity_marks[path] = now
+    try:
+        if os.path.exists(path):
+            os.utime(path, (now, now))
+        else:
+            open(path, "a").close()
+    except OSError as e:
+        logger.debug(f"Could not record API activity: {e}")
+
+
+def api_busy(idle_seconds: Optional[float] = None) -> bool:
+    """True when the API handled a request within the last idle_seconds"""
+    idle = settings.MAINTENANCE_IDLE_SECONDS if idle_seconds is None else idle_seconds
+    try:
+        return time.time() - os.path.getmtime(_activity_path()) < idle
+    except OSError:
+        return False
+
+
+def _file_stats(conn: sqlite3.Connection) -> Dict[str, int]:
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    freelist = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    return {"bytes": page_size * page_count, "free_pages": freelist}
+
+
+def maintain_file(path: str, deadline: float) -> Dict[str, Any]:
+    """
+    Run maintenance steps on one database file until done or past deadline.
+
+    Returns:
+        Dict with size_before, size_after, freed_pages, steps ({step: seconds}) and status
+        ("ok", "partial" when the budget ran out, "locked" when another writer held the lock)
+    """
+    steps: Dict[str, float] = {}
+    # Autocommit, so VACUUM is allowed and every step commits on its own
+    conn = sqlite3.connect(path, timeout=1.0, isolation_level=None)
+    try:
+        before = _file_stats(conn)
+        status = "ok"
+
+        def step(name: str, sql: str) -> bool:
+            nonlocal status
+            if time.monotonic() >= deadline:
+                status = "partial"
+                return False
+            started = time.monotonic()
+            conn.execute(sql).fetchall()
+            steps[name] = steps.get(name, 0.0) + round(time.monotonic() - started, 4)
+            return True
+
+        try:
+            # Bounds the rows ANALYZE samples per index, so statistics stay cheap on big tables
+            conn.execute(f"PRAGMA analysis_limit = {int(settings.MAINTENANCE_ANALYSIS_LIMIT)}")
+            analyzed = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'"
+            ).fetchone()
+            if analyzed is None:
+                step("analyze", "ANALYZE")
+            # Re-analyzes only the tables whose contents changed enough to matter
+            step("optimize", "PRAGMA optimize")
+
+            auto_vacuum = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+            if auto_vacuum != _AUTO_VACUUM_INCREMENTAL:
+                # Switching modes takes one full VACUUM; only done when the file is small enough
+                if before["bytes"] <= settings.MAINTENANCE_FULL_VACUUM_MAX_BYTES:
+                    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                    step("vacuum", "VACUUM")
+                else:
+                    logger.info(
+                        f"{path} needs a one-off VACUUM to enable incremental vacuum "
+                        f"({before['bytes']} bytes is over MAINTENANCE_FULL_VACUUM_MAX_BYTES)"
+                    )
+
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == _AUTO_VACUUM_INCREMENTAL:
+                pages = int(settings.MAINTENANCE_VACUUM_PAGES)
+                while conn.execute("PRAGMA freelist_count").fetchone()[0] > 0:
+                    if not step("incremental_vacuum", f"PRAGMA incremental_vacuum({pages})"):
+                        break
+
+            if conn.execute("PRAGMA journal_mode").fetchone()[0].lower() == "wal":
+                step("wal_checkpoint", "PRAGMA wal_checkpoint(TRUNCATE)")
+        except sqlite3.OperationalError as e:
+            if "locked" not in str(e):
+                raise
+            status = "locked"
+
+        after = _file_stats(conn)
+    finally:
+        conn.close()
+
+    return {
+        "size_before": before["bytes"],
+        "size_after": after["bytes"],
+        "freed_pages": max(0, before["free_pages"] - after["free_pages"]),
+        "steps": steps,
+        "status": status,
+    }
+
+
+def _database_files() -> List[tuple]:
+    files = [("catalog", database.DB_PATH)]
+    from backend.core.sharding import list_owners, shard_path, sharding_enabled
+    if sharding_enabled():
+        files.extend((owner, shard_path(owner)) for owner in list_owners())
+    return files
+
+
+def _record_run(name: str, started_at: float, duration: float, result: Dict[str, Any]):
+    with database.get_catalog_connection() as conn:
+        conn.execute("""
+            INSERT INTO maintenance_runs
+            (database_name, started_at, duration_seconds, size_before, size_after, freed_pages, steps, status)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            name, started_at, round(duration, 4),
+            result.get("size_before"), result.get("size_after"), result.get("freed_pages", 0),
+            json.dumps(result.get("steps", {})), result["status"],
+        ))
+        conn.commit()
+
+
+def run_maintenance(budget_seconds: Optional[float] = None, force: bool = False) -> List[Dict[str, Any]]:
+    """
+    Maintain the catalog and every shard within one time budget.
+
+    Args:
+        budget_seconds: Total time allowed (default MAINTENANCE_BUDGET_SECONDS)
+        force: Run even if the API is busy
+
+    Returns:
+        One result dict per database file (empty when skipped)
+    """
+    if is_postgres():
+        logger.info("Database maintenance skipped: PostgreSQL runs its own autovacuum/analyze")
+        return []
+    if not force and api_busy():
+        logger.info("Database maintenance skipped: API is busy")
+        # No database was touched; the row only records that a run was due
+        _record_run(SKIPPED_RUN_NAME, time.time(), 0.0, {"status": "skipped"})
+        return []
+
+    budget = settings.MAINTENANCE_BUDGET_SECONDS if budget_seconds is None else budget_seconds
+    deadline = time.monotonic() + budget
+    results = []
+
+    for name, path in _database_files():
+        if time.monotonic() >= deadline:
+            logger.info(f"Database maintenance budget used up before '{name}'")
+            break
+        if not os.path.exists(path):
+            continue
+
+        started_at = time.time()
+        started = time.monotonic()
+        result = maintain_file(path, deadline)
+        duration = time.monotonic() - started
+        _record_run(name, started_at, duration, result)
+
+        result.update({"database": name, "duration_seconds": round(duration, 4)})
+        results.append(result)
+        logger.info(
+            f"Maintained '{name}' in {duration:.2f}s ({result['status']}): "
+            f"{result['size_before']} -> {result['size_after']} bytes, steps {result['steps']}"
+        )
+
+    return results
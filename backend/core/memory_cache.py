@@ -0,0 +1,157 @@
+"""
+In-process LRU tier in front of the api_cache table.
+
+get_cached_data() reads through this tier and set_cached_data() writes
+through it, so a warm hit is a dictionary lookup instead of a SELECT plus
+json.loads. Entries are bounded by CACHE_L1_MAX_BYTES (sized by their JSON
+length) and keep the row's expiry, capped at CACHE_L1_MAX_TTL_SECONDS.
+
+Other processes (the scheduler, other API workers) write to the same table,
+so every database keeps a generation counter in api_cache_state that is
+bumped by deletes, prefix invalidations and sweep evictions. The tier
+re-reads it at most once per CACHE_L1_GENERATION_CHECK_SECONDS and drops its
+entries for that database when someone else has removed rows. Plain writes
+do not bump it, so routine cache fills in one process leave the others'
+tiers intact; a key another process overwrote is served from memory for at
+most CACHE_L1_MAX_TTL_SECONDS.
+
+Cached values are shared between callers and must be treated as read-only.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, NamedTuple, Optional
+
+from backend.core.config import settings
+
+
+class CacheEntry(NamedTuple):
+    """A decoded api_cache row held in memory"""
+    value: Any
+    size_bytes: int
+    written_at: float  # When the row was written (reader TTLs count from here)
+    expires_at: float  # Row expiry, capped at CACHE_L1_MAX_TTL_SECONDS after loading
+    touched_at: float  # Last time last_accessed was pushed to the database row
+
+
+class MemoryCacheTier:
+    """Byte-bounded LRU of decoded cache rows, grouped by database (namespace)"""
+
+    def __init__(self):
+        self._entries: "OrderedDict[tuple, CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        # namespace -> (generation last seen, when it was checked)
+        self._generations: Dict[Hashable, tuple] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, namespace: Hashable, key: str, now: Optional[float] = None) -> Optional[CacheEntry]:
+        """Entry for key if present and not expired (counts a hit or a miss)"""
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._entries.get((namespace, key))
+            if entry is None or entry.expires_at <= now:
+                if entry is not None:
+                    self._remove((namespace, key))
+                self.misses += 1
+                return None
+            self._entries.move_to_end((namespace, key))
+            self.hits += 1
+            return entry
+
+    def put(self, namespace: Hashable, key: str, value: Any, size_bytes: int, written_at: float, expires_at: float):
+        """Store a decoded row, evicting least recently used entries past CACHE_L1_MAX_BYTES"""
+        max_bytes = settings.CACHE_L1_MAX_BYTES
+        # One oversized value would flush everything else
+        if size_bytes > max_bytes // 4:
+            self.discard(namespace, key)
+            return
+
+        now = time.time()
+        entry = CacheEntry(value, size_bytes, written_at, min(expires_at, now + settings.CACHE_L1_MAX_TTL_SECONDS), now)
+        with self._lock:
+            self._remove((namespace, key))
+            self._entries[(namespace, key)] = entry
+            self._bytes += size_bytes
+            while self._bytes > max_bytes and self._entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def touch(self, namespace: Hashable, key: str, now: float):
+        """Record that last_accessed was just pushed to the database for key"""
+        with self._lock:
+            entry = self._entries.get((namespace, key))
+            if entry is not None:
+                self._entries[(namespace, key)] = entry._replace(touched_at=now)
+
+    def discard(self, namespace: Hashable, key: str):
+        with self._lock:
+            self._remove((namespace, key))
+
+    def discard_prefix(self, namespace: Hashable, prefix: str):
+        """Drop the namespace's entries whose key starts with prefix"""
+        with self._lock:
+            for cache_key in [k for k in self._entries if k[0] == namespace and k[1].startswith(prefix)]:
+                self._remove(cache_key)
+
+    def clear(self, namespace: Optional[Hashable] = None):
+        """Drop every entry (of one namespace when given)"""
+        with self._lock:
+            if namespace is None:
+                self._entries.clear()
+                self._bytes = 0
+                self._generations.clear()
+                return
+            for cache_key in [k for k in self._entries if k[0] == namespace]:
+                self._remove(cache_key)
+
+    def _remove(self, cache_key: tuple):
+        entry = self._entries.pop(cache_key, None)
+        if entry is not None:
+            self._bytes -= entry.size_bytes
+
+    def validate(self, namespace: Hashable, read_generation: Callable[[], int]):
+        """Drop the namespace's entries if its database generation moved (checked at most once per interval)"""
+        now = time.monotonic()
+        known = self._generations.get(namespace)
+        if known is not None and now - known[1] < settings.CACHE_L1_GENERATION_CHECK_SECONDS:
+            return
+
+        generation = read_generation()
+        with self._lock:
+            known = self._generations.get(namespace)
+            if known is not None and known[0] != generation:
+                for cache_key in [k for k in self._entries if k[0] == namespace]:
+                    self._remove(cache_key)
+            self._generations[namespace] = (generation, now)
+
+    def note_write(self, namespace: Hashable, generation: int):
+        """
+        Record the generation produced by this process's own delete.
+
+        If it is exactly one past the last generation seen, nobody else wrote
+        in between and the tier stays valid; otherwise it is dropped.
+        """
+        with self._lock:
+            known = self._generations.get(namespace)
+            if known is None or known[0] != generation - 1:
+                for cache_key in [k for k in self._entries if k[0] == namespace]:
+                    self._remove(cache_key)
+            self._generations[namespace] = (generation, known[1] if known else time.monotonic())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+# Global tier used by get_cached_data / set_cached_data
+memory_cache = MemoryCacheTier()
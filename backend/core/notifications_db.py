@@ -0,0 +1,140 @@
+"""
+Database helper functions for listing notifications
+
+priority, member_name, milestone_type, link and action are real (indexed)
+columns, so filters run in SQL and list views never decode the metadata
+JSON unless it is asked for.
+"""
+
+import json
+import logging
+from typing import Any, Dict, Iterator, List, Optional
+
+from backend.core.database import get_db_connection
+from backend.core.db_backend import is_postgres
+
+logger = logging.getLogger(__name__)
+
+LIST_COLUMNS = """id, type, title, message, recipient, status, created_at, sent_at,
+                  priority, member_name, milestone_type, link, action, read"""
+
+
+def _filters(
+    member: Optional[str] = None,
+    include_read: bool = True,
+    status: Optional[str] = None,
+    type: Optional[str] = None,
+    priority: Optional[str] = None,
+    member_name: Optional[str] = None,
+    milestone_type: Optional[str] = None,
+):
+    conditions = []
+    params: list = []
+
+    if member:
+        # Channel-wide notifications are shown to every member
+        conditions.append("(recipient = ? OR recipient = 'channel')")
+        params.append(member)
+    if not include_read:
+        conditions.append("(read IS NULL OR read = 0)")
+    for column, value in (
+        ("status", status),
+        ("type", type),
+        ("priority", priority),
+        ("member_name", member_name),
+        ("milestone_type", milestone_type),
+    ):
+        if value:
+            conditions.append(f"{column} = ?")
+            params.append(value)
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return where, params
+
+
+def _decode_metadata(row: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        row["metadata"] = json.loads(row["metadata"]) if row["metadata"] else {}
+    except ValueError:
+        row["metadata"] = {}
+    return row
+
+
+def query_notifications(
+    limit: int = 50,
+    offset: int = 0,
+    include_metadata: bool = False,
+    **filters,
+) -> List[Dict[str, Any]]:
+    """
+    List notifications, newest first.
+
+    Args:
+        limit, offset: Page of rows to return
+        include_metadata: Also decode the metadata JSON of each row
+        **filters: member, include_read, status, type, priority, member_name, milestone_type
+
+    Returns:
+        One dict of column values per row (plus "metadata" when requested)
+    """
+    where, params = _filters(**filters)
+    columns = LIST_COLUMNS + (", metadata" if include_metadata else "")
+
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT {columns}
+            FROM notifications
+            {where}
+            ORDER BY created_at DESC
+            LIMIT ? OFFSET ?
+        """, params + [limit, offset])
+        rows = [dict(row) for row in cursor.fetchall()]
+
+    if include_metadata:
+        for row in rows:
+            _decode_metadata(row)
+    return rows
+
+
+def iter_notifications(
+    limit: Optional[int] = None,
+    offset: int = 0,
+    include_metadata: bool = False,
+    batch_rows: int = 500,
+    **filters,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Stream the rows of query_notifications (same filters; every match
+    without a limit) from a cursor, batch_rows at a time.
+    """
+    where, params = _filters(**filters)
+    columns = LIST_COLUMNS + (", metadata" if include_metadata else "")
+
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        # No upper bound: LIMIT -1 on SQLite, LIMIT NULL on PostgreSQL
+        unbounded = None if is_postgres() else -1
+        cursor.execute(f"""
+            SELECT {columns}
+            FROM notifications
+            {where}
+            ORDER BY created_at DESC
+            LIMIT ? OFFSET ?
+        """, params + [limit if limit is not None else unbounded, offset])
+        while True:
+            rows = cursor.fetchmany(batch_rows)
+            if not rows:
+                return
+            for row in rows:
+                row = dict(row)
+                yield _decode_metadata(row) if include_metadata else row
+
+
+def count_notifications(**filters) -> int:
+    """Number of notifications matching the same filters as query_notifications"""
+    where, params = _filters(**filters)
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT COUNT(*) FROM notifications {where}", params)
+        return cursor.fetchone()[0]
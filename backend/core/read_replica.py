@@ -0,0 +1,188 @@
+"""
+In-memory read replica of the SQLite database.
+
+When enabled, the API process keeps a private in-memory copy of leetcode.db
+that read-only analytics queries run against, so they never wait on disk
+I/O or on write locks held by the scheduler. A background thread watches
+SQLite's data_version (the write-generation counter, which changes whenever
+any other connection or process commits). When it moves, the thread checks
+the data_versions table, which every write the analytics read bumps, and
+re-copies the database with the backup API only if that changed too. The
+API's own bookkeeping writes (last_seen_at, api_cache, shared_state locks)
+land on every request and do not cause a copy.
+
+Each refresh builds a new shared-cache memory database and swaps it in.
+Readers open their connection under the same lock as the swap, so they
+always attach to a copy that is still alive, and readers that are
+mid-query keep using the copy they started with.
+"""
+
+import itertools
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional, Tuple
+
+from backend.core import database
+from backend.core.config import settings
+from backend.core.db_backend import is_postgres
+
+logger = logging.getLogger(__name__)
+
+_replica_ids = itertools.count(1)
+
+
+class ReadReplica:
+    """In-memory copy of the database, refreshed when the write generation changes"""
+
+    def __init__(self):
+        self._lock = threading.Lock()  # Guards the current copy (swap, connect, stop)
+        self._refresh_lock = threading.Lock()  # One refresh at a time
+        self._watcher: Optional[sqlite3.Connection] = None
+        self._keeper: Optional[sqlite3.Connection] = None  # Keeps the current memory DB alive
+        self._uri: Optional[str] = None
+        self._write_generation: Optional[int] = None
+        self._generation: Optional[Tuple[int, int]] = None
+        self._refreshed_at: Optional[float] = None
+        self._last_duration: Optional[float] = None
+        self._refreshes = 0
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @property
+    def active(self) -> bool:
+        return self._uri is not None
+
+    def start(self, interval_seconds: Optional[float] = None):
+        """Take the first copy synchronously, then keep it fresh from a daemon thread"""
+        if self._thread is not None:
+            return
+        if is_postgres():
+            logger.info("Read replica is SQLite-only; analytics reads use the PostgreSQL pool")
+            return
+        if settings.SHARDING_ENABLED:
+            # Team data lives in the shards, which the copy of the catalog would not include
+            logger.info("Read replica is disabled while SHARDING_ENABLED is set")
+            return
+
+        interval = interval_seconds or settings.READ_REPLICA_REFRESH_SECONDS
+        self.refresh()
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval,), name="read-replica", daemon=True)
+        self._thread.start()
+        logger.info(f"Read replica started (refresh check every {interval}s)")
+
+    def stop(self):
+        """Stop refreshing and drop the in-memory copy (reads fall back to the file)"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+        with self._refresh_lock, self._lock:
+            for conn in (self._keeper, self._watcher):
+                if conn is not None:
+                    conn.close()
+            self._keeper = self._watcher = None
+            self._uri = None
+            self._write_generation = self._generation = None
+
+    def _run(self, interval: float):
+        while not self._stop.wait(interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Read replica refresh failed: {e}")
+
+    def _current_write_generation(self) -> int:
+        if self._watcher is None:
+            # Never writes, so its data_version moves on every commit made elsewhere
+            self._watcher = sqlite3.connect(database.DB_PATH, check_same_thread=False)
+        return self._watcher.execute("PRAGMA data_version").fetchone()[0]
+
+    def _current_generation(self) -> Tuple[int, int]:
+        """Fingerprint of data_versions; versions only grow, so any bump changes it"""
+        row = self._watcher.execute("SELECT COUNT(*), COALESCE(SUM(version), 0) FROM data_versions").fetchone()
+        return tuple(row)
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Re-copy the database if team data changed since the last copy.
+
+        Returns:
+            True if a new copy was taken
+        """
+        with self._refresh_lock:
+            write_generation = self._current_write_generation()
+            if not force and self._uri is not None and write_generation == self._write_generation:
+                return False
+
+            generation = self._current_generation()
+            if not force and self._uri is not None and generation == self._generation:
+                # Only bookkeeping was committed since the copy
+                self._write_generation = write_generation
+                return False
+
+            started = time.perf_counter()
+            uri = f"file:leetcode_replica_{next(_replica_ids)}?mode=memory&cache=shared"
+            keeper = sqlite3.connect(uri, uri=True, check_same_thread=False)
+
+            source = sqlite3.connect(database.DB_PATH)
+            try:
+                source.backup(keeper)
+            except Exception:
+                keeper.close()
+                raise
+            finally:
+                source.close()
+
+            with self._lock:
+                old_keeper = self._keeper
+                self._keeper, self._uri = keeper, uri
+                # Both read before the copy, so a commit landing mid-backup triggers another refresh
+                self._write_generation, self._generation = write_generation, generation
+                self._refreshed_at = time.time()
+                self._last_duration = time.perf_counter() - started
+                self._refreshes += 1
+
+                if old_keeper is not None:
+                    # No reader can attach to the old copy any more; those already on it keep it alive
+                    old_keeper.close()
+        return True
+
+    @contextmanager
+    def connection(self):
+        """Read-only connection to the replica, or to the database file when the replica is not running"""
+        with self._lock:
+            # Connecting under the lock: a refresh cannot close the copy between reading its URI and attaching
+            uri = self._uri
+            conn = sqlite3.connect(uri, uri=True) if uri is not None else None
+
+        if conn is None:
+            with database.get_db_connection() as conn:
+                yield conn
+            return
+
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA query_only = ON")
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def status(self) -> Dict[str, Any]:
+        """Replica state for diagnostics"""
+        return {
+            "active": self.active,
+            "generation": self._generation,
+            "refreshed_at": self._refreshed_at,
+            "last_refresh_seconds": self._last_duration,
+            "refreshes": self._refreshes,
+        }
+
+
+# Global replica instance (started by the API on startup when READ_REPLICA_ENABLED)
+read_replica = ReadReplica()
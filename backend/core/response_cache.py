@@ -0,0 +1,207 @@
+"""
+ETags, 304s and cached response bytes for polled GET endpoints.
+
+The frontend polls /analytics/* and /team/* on a timer, and most polls find
+nothing changed. Endpoints marked with @conditional_get get a strong ETag
+derived from the team's data version (backend.core.data_version), the path,
+the query string and today's date (many results depend on the current week).
+Endpoints that also show live LeetCode data pass live_seconds, which adds a
+time window to the ETag so their responses turn over at least that often.
+
+Routers holding such endpoints use route_class=ConditionalGetRoute, which
+computes the ETag before dependencies and the endpoint run:
+
+- If-None-Match matching it is answered with 304 without running the handler.
+  ETags are the same in every process, so this works across API workers.
+- Otherwise a response stored under that ETag is replayed from memory, gzipped
+  ahead of time for clients that accept it.
+- On a miss the handler runs and its 200 JSON response is stored.
+
+Stored bodies live in a per-process LRU bounded by RESPONSE_CACHE_MAX_BYTES.
+Keys include the data version, so entries never need invalidating; entries
+for superseded versions age out.
+"""
+
+import gzip
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import urlencode
+
+from fastapi.routing import APIRoute
+from starlette.requests import Request
+from starlette.responses import Response
+
+from backend.core.config import settings
+from backend.core.data_version import get_data_version
+from backend.core.security import decode_access_token
+from backend.core.sharding import owner_scope
+from backend.core.streaming import wants_ndjson
+
+
+def conditional_get(live_seconds: Optional[int] = None) -> Callable:
+    """
+    Mark a GET endpoint as answerable from its ETag (its router must use
+    route_class=ConditionalGetRoute).
+
+    Args:
+        live_seconds: For endpoints that also show live LeetCode data, the
+                      longest a response may be reused for the same data version
+    """
+    def decorator(fn: Callable) -> Callable:
+        fn.conditional_get_live_seconds = live_seconds or 0
+        return fn
+    return decorator
+
+
+class StoredResponse(NamedTuple):
+    body: bytes
+    gzipped: Optional[bytes]  # None when the body is too small to be worth compressing
+    headers: List[Tuple[str, str]]
+    stored_at: float
+    data_age: Optional[float]  # X-Data-Age when stored (stale-while-revalidate endpoints)
+
+
+class ResponseStore:
+    """Byte-bounded LRU of response bodies keyed by ETag"""
+
+    def __init__(self):
+        self._entries: "OrderedDict[str, StoredResponse]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.not_modified = 0
+        self.misses = 0
+
+    @staticmethod
+    def _size(entry: StoredResponse) -> int:
+        return len(entry.body) + len(entry.gzipped or b"")
+
+    def get(self, etag: str) -> Optional[StoredResponse]:
+        with self._lock:
+            entry = self._entries.get(etag)
+            if entry is not None:
+                self._entries.move_to_end(etag)
+            return entry
+
+    def put(self, etag: str, entry: StoredResponse):
+        size = self._size(entry)
+        if size > settings.RESPONSE_CACHE_MAX_BYTES:
+            return
+        with self._lock:
+            old = self._entries.pop(etag, None)
+            if old is not None:
+                self._bytes -= self._size(old)
+            self._entries[etag] = entry
+            self._bytes += size
+            while self._bytes > settings.RESPONSE_CACHE_MAX_BYTES:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= self._size(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "not_modified": self.not_modified,
+                "misses": self.misses,
+            }
+
+
+response_store = ResponseStore()
+
+
+def _request_owner(request: Request) -> Optional[str]:
+    """Team owner from the bearer token (the handler's get_current_user repeats this check)"""
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    payload = decode_access_token(token)
+    return payload.get("sub") if payload else None
+
+
+def compute_etag(owner: str, version: int, path: str, query: List[Tuple[str, str]], live_seconds: int = 0) -> str:
+    parts = [owner, str(version), path, urlencode(sorted(query)), date.today().isoformat()]
+    if live_seconds:
+        parts.append(str(int(time.time() // live_seconds)))
+    return '"' + hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def _replay(entry: StoredResponse, etag: str, accepts_gzip: bool) -> Response:
+    headers = dict(entry.headers)
+    if entry.data_age is not None:
+        headers["x-data-age"] = str(int(entry.data_age + time.time() - entry.stored_at))
+    headers.update({"etag": etag, "cache-control": "private, no-cache", "vary": "Authorization, Accept-Encoding"})
+    if accepts_gzip and entry.gzipped is not None:
+        headers["content-encoding"] = "gzip"
+        return Response(entry.gzipped, status_code=200, headers=headers)
+    return Response(entry.body, status_code=200, headers=headers)
+
+
+async def _respond_conditionally(request: Request, handler: Callable, live_seconds: int) -> Response:
+    owner = _request_owner(request)
+    # Streamed NDJSON bodies are neither stored nor answered from a JSON body's ETag
+    if owner is None or not settings.RESPONSE_CACHE_ENABLED or wants_ndjson(request):
+        return await handler(request)
+
+    with owner_scope(owner):
+        # Handlers read from the replica, so the ETag takes the version of that copy:
+        # a body is never stored under a version newer than the data it was built from
+        version = get_data_version(owner, replica=True)
+    etag = compute_etag(owner, version, request.url.path, request.query_params.multi_items(), live_seconds)
+
+    if _etag_matches(request.headers.get("if-none-match", ""), etag):
+        response_store.not_modified += 1
+        return Response(status_code=304, headers={"etag": etag, "cache-control": "private, no-cache"})
+
+    accepts_gzip = "gzip" in request.headers.get("accept-encoding", "")
+    entry = response_store.get(etag)
+    if entry is not None:
+        response_store.hits += 1
+        return _replay(entry, etag, accepts_gzip)
+
+    response_store.misses += 1
+    response = await handler(request)
+    json_body = response.headers.get("content-type", "").startswith("application/json") and hasattr(response, "body")
+    if response.status_code != 200 or not json_body:
+        return response
+
+    headers = [(k, v) for k, v in response.headers.items() if k not in ("content-length", "x-data-age")]
+    data_age = response.headers.get("x-data-age")
+    entry = StoredResponse(
+        body=response.body,
+        gzipped=gzip.compress(response.body, 6) if len(response.body) >= settings.RESPONSE_GZIP_MIN_BYTES else None,
+        headers=headers,
+        stored_at=time.time(),
+        data_age=float(data_age) if data_age is not None else None,
+    )
+    response_store.put(etag, entry)
+    return _replay(entry, etag, accepts_gzip)
+
+
+class ConditionalGetRoute(APIRoute):
+    """Route class answering @conditional_get endpoints from their ETag (see module docstring)"""
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        live_seconds = getattr(self.endpoint, "conditional_get_live_seconds", None)
+        if live_seconds is None or "GET" not in self.methods:
+            return handler
+
+        async def conditional_handler(request: Request) -> Response:
+            return await _respond_conditionally(request, handler, live_seconds)
+        return conditional_handler
@@ -7,9 +7,12 @@ from typing import Optional
 from jose import JWTError, jwt
 import bcrypt
 from fastapi import Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
 
 from backend.core.config import settings
+from backend.core.sharding import set_current_owner
+from backend.core.user_db import last_seen_due, touch_last_seen
 
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
@@ -66,4 +69,9 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> dict:
     if username is None:
         raise credentials_exception
 
+    # Database access for the rest of the request goes to this team's shard
+    set_current_owner(username)
+    if last_seen_due(username):
+        # A blocking SQLite write; keep it off the event loop
+        await run_in_threadpool(touch_last_seen, username)
     return {"username": username}
@@ -0,0 +1,282 @@
+"""
+Optional per-team database sharding (SQLite only).
+
+With SHARDING_ENABLED each team owner's data (members, snapshots, weekly
+deltas, tag stats, notifications, last_state, gamification rows and cached
+API responses) lives in its own SQLite file under <data dir>/SHARD_DIR, so
+busy teams no longer queue behind one file's write lock. The main leetcode.db
+becomes the catalog: it keeps users, system settings and the owner -> shard
+routing table (shard_routes).
+
+Connections are routed by owner scope. get_current_user sets it for API
+requests and the scheduler sets it per team; inside a scope
+get_db_connection() returns a cached connection to that team's shard.
+Code that has to see every team uses fan_out().
+"""
+
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional
+
+from backend.core import database
+from backend.core.config import settings
+from backend.core.db_backend import is_postgres
+
+logger = logging.getLogger(__name__)
+
+# Tables that only make sense in the catalog
+CATALOG_TABLES = {"users", "system_settings", "shard_routes", "shared_state", "shared_lists"}
+
+_current_owner: ContextVar[Optional[str]] = ContextVar("shard_owner", default=None)
+
+
+def sharding_enabled() -> bool:
+    """True when team data is split across shard files"""
+    return settings.SHARDING_ENABLED and not is_postgres()
+
+
+def current_owner() -> Optional[str]:
+    """Owner whose shard get_db_connection() currently routes to (None = catalog)"""
+    return _current_owner.get()
+
+
+def set_current_owner(owner: Optional[str]):
+    """Route the rest of the current request/context to owner's shard"""
+    _current_owner.set(owner)
+
+
+@contextmanager
+def owner_scope(owner: Optional[str]):
+    """Route database access inside the block to owner's shard (None = catalog)"""
+    token = _current_owner.set(owner)
+    try:
+        yield
+    finally:
+        _current_owner.reset(token)
+
+
+def catalog_only(fn: Callable) -> Callable:
+    """Run a function against the catalog regardless of the caller's owner scope"""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        with owner_scope(None):
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+# --- Routing -----------------------------------------------------------------
+
+_routes: Dict[tuple, str] = {}
+_routes_lock = threading.Lock()
+_initialized: set = set()
+_initializing: set = set()
+_init_lock = threading.RLock()
+
+
+def _shard_dir() -> str:
+    # Shards sit next to the catalog file
+    return os.path.join(os.path.dirname(os.path.abspath(database.DB_PATH)), settings.SHARD_DIR)
+
+
+def _shard_file_name(owner: str) -> str:
+    safe = re.sub(r"[^A-Za-z0-9_-]", "_", owner)[:40]
+    digest = hashlib.sha1(owner.encode("utf-8")).hexdigest()[:8]
+    return f"{safe}_{digest}.db"
+
+
+def _load_or_create_route(owner: str) -> str:
+    with database.get_catalog_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT shard_file FROM shard_routes WHERE owner_username = ?", (owner,))
+        row = cursor.fetchone()
+        if row:
+            return row["shard_file"]
+
+        # Another process may create the route concurrently; the first insert wins
+        cursor.execute("""
+            INSERT INTO shard_routes (owner_username, shard_file) VALUES (?, ?)
+            ON CONFLICT(owner_username) DO NOTHING
+        """, (owner, _shard_file_name(owner)))
+        conn.commit()
+        cursor.execute("SELECT shard_file FROM shard_routes WHERE owner_username = ?", (owner,))
+        logger.info(f"Created shard route for team '{owner}'")
+        return cursor.fetchone()["shard_file"]
+
+
+def shard_path(owner: str) -> str:
+    """Path of owner's shard file (the route is created on first use)"""
+    key = (database.DB_PATH, owner)
+    route = _routes.get(key)
+    if route is None:
+        with _routes_lock:
+            route = _routes.get(key)
+            if route is None:
+                route = _load_or_create_route(owner)
+                _routes[key] = route
+    return os.path.join(_shard_dir(), route)
+
+
+def list_owners() -> List[str]:
+    """All owners that have a shard"""
+    with database.get_catalog_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT owner_username FROM shard_routes ORDER BY owner_username")
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _initialize_shard(owner: str, path: str):
+    """Create or migrate a shard's schema (once per process)"""
+    if path in _initialized:
+        return
+    with _init_lock:
+        # init_schema() connects to the shard itself, which re-enters here
+        if path in _initialized or path in _initializing:
+            return
+        _initializing.add(path)
+        try:
+            with owner_scope(owner):
+                database.init_schema()
+                _copy_extra_tables()
+            _initialized.add(path)
+        finally:
+            _initializing.discard(path)
+
+
+def _copy_extra_tables():
+    """Create tables/indexes that exist in the catalog but not in this shard (e.g. gamification)"""
+    with database.get_catalog_connection() as catalog:
+        schema = catalog.execute("""
+            SELECT type, name, tbl_name, sql FROM sqlite_master
+            WHERE type IN ('table', 'index') AND sql IS NOT NULL AND name NOT LIKE 'sqlite_%'
+            ORDER BY type = 'index'
+        """).fetchall()
+
+    with database.get_db_connection() as conn:
+        existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master")}
+        for row in schema:
+            if row["tbl_name"] in CATALOG_TABLES or row["name"] in existing:
+                continue
+            conn.execute(row["sql"])
+        conn.commit()
+
+
+def init_shards():
+    """Run schema creation/migrations on every known shard"""
+    for owner in list_owners():
+        _initialize_shard(owner, shard_path(owner))
+
+
+# --- Connection cache --------------------------------------------------------
+
+class _ShardConnectionCache:
+    """
+    Idle connections per shard file, kept open between uses.
+
+    Each borrow gets a connection nobody else is using (nested borrows open
+    another one), so transactions never leak between callers. At most
+    SHARD_IDLE_CONNECTIONS are kept per shard and SHARD_MAX_CACHED shards
+    stay open, least recently used first out.
+    """
+
+    def __init__(self):
+        self._idle: "OrderedDict[str, List[sqlite3.Connection]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, path: str) -> sqlite3.Connection:
+        with self._lock:
+            conns = self._idle.get(path)
+            if conns:
+                self._idle.move_to_end(path)
+                return conns.pop()
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = sqlite3.connect(path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def release(self, path: str, conn: sqlite3.Connection):
+        # Whatever the caller left uncommitted is discarded, as with a fresh connection
+        if conn.in_transaction:
+            conn.rollback()
+
+        to_close = []
+        with self._lock:
+            conns = self._idle.setdefault(path, [])
+            self._idle.move_to_end(path)
+            if len(conns) < settings.SHARD_IDLE_CONNECTIONS:
+                conns.append(conn)
+            else:
+                to_close.append(conn)
+
+            while len(self._idle) > settings.SHARD_MAX_CACHED:
+                _, evicted = self._idle.popitem(last=False)
+                to_close.extend(evicted)
+
+        for stale in to_close:
+            stale.close()
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, OrderedDict()
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
+
+
+_connections = _ShardConnectionCache()
+
+
+@contextmanager
+def shard_connection(owner: str):
+    """Borrow a cached connection to owner's shard"""
+    path = shard_path(owner)
+    _initialize_shard(owner, path)
+
+    conn = _connections.acquire(path)
+    try:
+        yield conn
+    finally:
+        _connections.release(path, conn)
+
+
+def close_shard_connections():
+    """Close every cached shard connection"""
+    _connections.close_all()
+
+
+# --- Fan-out -----------------------------------------------------------------
+
+def fan_out(fn: Callable[[str], Any], max_workers: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Run fn(owner) inside each team's owner scope, in parallel.
+
+    Returns:
+        {owner: result}; teams whose call raised are logged and left out
+    """
+    owners = list_owners()
+    if not owners:
+        return {}
+
+    def run(owner: str):
+        with owner_scope(owner):
+            return fn(owner)
+
+    results = {}
+    workers = max(1, min(max_workers or settings.SHARD_FANOUT_WORKERS, len(owners)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {owner: executor.submit(run, owner) for owner in owners}
+        for owner, future in futures.items():
+            try:
+                results[owner] = future.result()
+            except Exception as e:
+                logger.error(f"Shard query failed for team '{owner}': {e}")
+    return results
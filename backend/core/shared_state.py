@@ -0,0 +1,295 @@
+"""
+Cache and state shared by every process of a deployment.
+
+In-process caches (async_lru_cache, module globals) diverge between uvicorn
+workers and the scheduler: each process fetches the same LeetCode data on its
+own and keeps its own copy of in-app notifications. State that has to be
+consistent across processes goes through a SharedStore instead:
+
+- DatabaseStore keeps entries in the main database (shared_state and
+  shared_lists tables in the catalog), so it works with no extra services.
+- RedisStore keeps them in Redis (STATE_BACKEND=redis, REDIS_URL), which
+  suits several API workers better; the redis package is only needed then.
+
+Values are encoded with the api_cache codecs (backend.core.cache_codec).
+shared_cached() puts a store in front of an upstream fetch: a result fetched
+by one process is reused by the others, and while one process fetches a key
+the others wait for its result instead of calling upstream too.
+"""
+
+import logging
+import os
+from abc import ABC, abstractmethod
+import threading
+import time
+from functools import wraps
+from typing import Any, Callable, Iterable, List, Optional, Union
+
+from backend.core import cache_codec
+from backend.core.config import settings
+from backend.core.database import get_catalog_connection
+
+try:
+    import redis
+except ImportError:  # Only needed when STATE_BACKEND=redis
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+
+class SharedStore(ABC):
+    """Key/value entries with expiry, plus bounded lists"""
+
+    @abstractmethod
+    def get(self, key: str) -> Any:
+        """Value for key, or None when missing or expired"""
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl_seconds: float):
+        """Store value under key for ttl_seconds"""
+
+    @abstractmethod
+    def add(self, key: str, value: Any, ttl_seconds: float) -> bool:
+        """Set key only if it is missing or expired; True if this call set it"""
+
+    @abstractmethod
+    def delete(self, key: str):
+        """Remove key if present"""
+
+    @abstractmethod
+    def list_push(self, key: str, value: Any, max_length: int):
+        """Append to a list, keeping only its newest max_length items"""
+
+    @abstractmethod
+    def list_items(self, key: str) -> List[Any]:
+        """Items of a list, oldest first"""
+
+    @abstractmethod
+    def list_replace(self, key: str, values: Iterable[Any]):
+        """Replace a list's items with values"""
+
+
+class DatabaseStore(SharedStore):
+    """Shared state in the main database (SQLite, or PostgreSQL with DATABASE_URL)"""
+
+    def get(self, key: str) -> Any:
+        with get_catalog_connection() as conn:
+            row = conn.execute(
+                "SELECT codec, payload, expires_at FROM shared_state WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or row["expires_at"] <= time.time():
+            return None
+        return cache_codec.decode(row["codec"], row["payload"])[0]
+
+    def set(self, key: str, value: Any, ttl_seconds: float):
+        codec, payload, _ = cache_codec.encode(value)
+        with get_catalog_connection() as conn:
+            conn.execute("""
+            INSERT INTO shared_state (key, codec, payload, expires_at) VALUES (?, ?, ?, ?)
+            ON CONFLICT(key) DO UPDATE SET
+                codec = excluded.codec,
+                payload = excluded.payload,
+                expires_at = excluded.expires_at
+            """, (key, codec, payload, time.time() + ttl_seconds))
+            conn.commit()
+
+    def add(self, key: str, value: Any, ttl_seconds: float) -> bool:
+        codec, payload, _ = cache_codec.encode(value)
+        now = time.time()
+        with get_catalog_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM shared_state WHERE key = ? AND expires_at <= ?", (key, now))
+            cursor.execute("""
+            INSERT INTO shared_state (key, codec, payload, expires_at) VALUES (?, ?, ?, ?)
+            ON CONFLICT(key) DO NOTHING
+            """, (key, codec, payload, now + ttl_seconds))
+            added = cursor.rowcount == 1
+            conn.commit()
+        return added
+
+    def delete(self, key: str):
+        with get_catalog_connection() as conn:
+            conn.execute("DELETE FROM shared_state WHERE key = ?", (key,))
+            conn.commit()
+
+    def list_push(self, key: str, value: Any, max_length: int):
+        codec, payload, _ = cache_codec.encode(value)
+        with get_catalog_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("INSERT INTO shared_lists (key, codec, payload) VALUES (?, ?, ?)", (key, codec, payload))
+            cursor.execute("""
+            DELETE FROM shared_lists WHERE key = ? AND id NOT IN (
+                SELECT id FROM shared_lists WHERE key = ? ORDER BY id DESC LIMIT ?
+            )
+            """, (key, key, max_length))
+            conn.commit()
+
+    def list_items(self, key: str) -> List[Any]:
+        with get_catalog_connection() as conn:
+            rows = conn.execute("SELECT codec, payload FROM shared_lists WHERE key = ? ORDER BY id", (key,)).fetchall()
+        return [cache_codec.decode(row["codec"], row["payload"])[0] for row in rows]
+
+    def list_replace(self, key: str, values: Iterable[Any]):
+        rows = [(key,) + cache_codec.encode(value)[:2] for value in values]
+        with get_catalog_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM shared_lists WHERE key = ?", (key,))
+            if rows:
+                cursor.executemany("INSERT INTO shared_lists (key, codec, payload) VALUES (?, ?, ?)", rows)
+            conn.commit()
+
+    def sweep_expired(self) -> int:
+        """Delete expired entries (the scheduler calls this with the api_cache sweep)"""
+        with get_catalog_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM shared_state WHERE expires_at <= ?", (time.time(),))
+            deleted = cursor.rowcount
+            conn.commit()
+        return deleted
+
+
+class RedisStore(SharedStore):
+    """Shared state in Redis (or anything speaking its protocol)"""
+
+    def __init__(self, client, prefix: str = ""):
+        self.client = client
+        self.prefix = prefix
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}{key}"
+
+    @staticmethod
+    def _pack(value: Any) -> bytes:
+        codec, payload, _ = cache_codec.encode(value)
+        return codec.encode("ascii") + b"\0" + payload
+
+    @staticmethod
+    def _unpack(blob: bytes) -> Any:
+        codec, _, payload = blob.partition(b"\0")
+        return cache_codec.decode(codec.decode("ascii"), payload)[0]
+
+    def get(self, key: str) -> Any:
+        blob = self.client.get(self._key(key))
+        return None if blob is None else self._unpack(blob)
+
+    def set(self, key: str, value: Any, ttl_seconds: float):
+        self.client.set(self._key(key), self._pack(value), px=max(1, int(ttl_seconds * 1000)))
+
+    def add(self, key: str, value: Any, ttl_seconds: float) -> bool:
+        return bool(self.client.set(self._key(key), self._pack(value), px=max(1, int(ttl_seconds * 1000)), nx=True))
+
+    def delete(self, key: str):
+        self.client.delete(self._key(key))
+
+    def list_push(self, key: str, value: Any, max_length: int):
+        pipe = self.client.pipeline()
+        pipe.rpush(self._key(key), self._pack(value))
+        pipe.ltrim(self._key(key), -max_length, -1)
+        pipe.execute()
+
+    def list_items(self, key: str) -> List[Any]:
+        return [self._unpack(blob) for blob in self.client.lrange(self._key(key), 0, -1)]
+
+    def list_replace(self, key: str, values: Iterable[Any]):
+        blobs = [self._pack(value) for value in values]
+        pipe = self.client.pipeline()
+        pipe.delete(self._key(key))
+        if blobs:
+            pipe.rpush(self._key(key), *blobs)
+        pipe.execute()
+
+
+_store: Optional[SharedStore] = None
+_store_lock = threading.Lock()
+
+
+def _create_store() -> SharedStore:
+    backend = settings.STATE_BACKEND
+    if backend == "redis":
+        if redis is None:
+            raise RuntimeError("STATE_BACKEND=redis but the redis package is not installed (pip install redis)")
+        return RedisStore(redis.Redis.from_url(settings.REDIS_URL), settings.REDIS_KEY_PREFIX)
+    if backend != "database":
+        logger.warning(f"Unknown STATE_BACKEND {backend}, using the database")
+    return DatabaseStore()
+
+
+def get_shared_store() -> SharedStore:
+    """The process-wide store selected by STATE_BACKEND"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = _create_store()
+    return _store
+
+
+def set_shared_store(store: Optional[SharedStore]):
+    """Replace the process-wide store (None = recreate from settings on next use)"""
+    global _store
+    with _store_lock:
+        _store = store
+
+
+def shared_cached(
+    name: str,
+    ttl: Union[float, Callable[..., float]],
+    negative: Optional[Callable[[Any], bool]] = None,
+    lock_seconds: float = 30.0,
+):
+    """
+    Cache a function's results in the shared store.
+
+    Args:
+        name: Key prefix; arguments are appended to it
+        ttl: Seconds a result is kept, or a callable receiving the arguments
+        negative: Flags results that must not be shared (None never is)
+        lock_seconds: How long other processes wait for a fetch in progress
+                      before calling the function themselves
+
+    Store errors are logged and the function is called directly, so an
+    unavailable backend degrades to per-process caching.
+    """
+    def decorator(fn: Callable) -> Callable:
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = ":".join([name] + [str(arg) for arg in args] + [f"{k}={v}" for k, v in sorted(kwargs.items())])
+            lock_key = f"{key}:lock"
+            try:
+                store = get_shared_store()
+                value = store.get(key)
+                if value is not None:
+                    return value
+                deadline = time.monotonic() + lock_seconds
+                while not store.add(lock_key, os.getpid(), lock_seconds):
+                    # Another process is fetching this key
+                    time.sleep(0.1)
+                    value = store.get(key)
+                    if value is not None:
+                        return value
+                    if time.monotonic() >= deadline:
+                        return fn(*args, **kwargs)
+                # The previous holder may have stored the value just before releasing the lock
+                value = store.get(key)
+                if value is not None:
+                    store.delete(lock_key)
+                    return value
+            except Exception as e:
+                logger.warning(f"Shared store unavailable for {key}: {e}")
+                return fn(*args, **kwargs)
+
+            try:
+                value = fn(*args, **kwargs)
+                if value is not None and not (negative and negative(value)):
+                    try:
+                        store.set(key, value, ttl(*args, **kwargs) if callable(ttl) else ttl)
+                    except Exception as e:
+                        logger.warning(f"Could not share {key}: {e}")
+                return value
+            finally:
+                try:
+                    store.delete(lock_key)
+                except Exception as e:
+                    logger.warning(f"Could not release {lock_key}: {e}")
+        return wrapper
+    return decorator
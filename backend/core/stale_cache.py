@@ -0,0 +1,115 @@
+"""
+Stale-while-revalidate caching for slow analytics endpoints.
+
+Results are stored in api_cache as an envelope holding the team's data
+version (backend.core.data_version) and the time they were computed. A
+result is fresh while the version matches and it is younger than
+fresh_seconds. After that it is still returned immediately, while one
+background task per key recomputes it, until it is older than
+SWR_MAX_STALE_SECONDS (or the caller's max_stale_seconds); only then does a
+request wait for the recompute.
+
+Endpoints report the age of what they return in the X-Data-Age header.
+"""
+
+import contextvars
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, Tuple
+
+from backend.core.config import settings
+from backend.core.data_version import get_data_version
+from backend.core.database import get_cached_data, set_cached_data
+
+logger = logging.getLogger(__name__)
+
+_executor = ThreadPoolExecutor(max_workers=settings.SWR_WORKERS, thread_name_prefix="revalidate")
+_refreshing = set()
+_refreshing_lock = threading.Lock()
+
+
+def _store(key: str, version: int, value: Any, max_stale_seconds: float):
+    # Empty results (usually upstream failures) are recomputed rather than served
+    if value:
+        set_cached_data(
+            key,
+            {"version": version, "computed_at": time.time(), "data": value},
+            ttl_seconds=max_stale_seconds,
+        )
+
+
+def _refresh(key: str, version: int, compute: Callable[[], Any], max_stale_seconds: float):
+    try:
+        _store(key, version, compute(), max_stale_seconds)
+    except Exception as e:
+        logger.error(f"Background refresh of {key} failed: {e}")
+    finally:
+        with _refreshing_lock:
+            _refreshing.discard(key)
+
+
+def _schedule_refresh(key: str, version: int, compute: Callable[[], Any], max_stale_seconds: float) -> bool:
+    """Start a background recompute of key unless one is already running"""
+    with _refreshing_lock:
+        if key in _refreshing:
+            return False
+        _refreshing.add(key)
+    # The owner scope (shard routing) is a context variable; carry it over
+    context = contextvars.copy_context()
+    try:
+        _executor.submit(context.run, _refresh, key, version, compute, max_stale_seconds)
+    except RuntimeError:
+        # Shutting down: keep serving the stale value
+        with _refreshing_lock:
+            _refreshing.discard(key)
+        return False
+    return True
+
+
+def get_or_revalidate(
+    key: str,
+    owner_username: str,
+    compute: Callable[[], Any],
+    fresh_seconds: float,
+    wait_for_new_version: bool = False,
+    max_stale_seconds: Optional[float] = None,
+) -> Tuple[Any, float]:
+    """
+    Cached result for key, recomputing in the background once it is stale.
+
+    Args:
+        key: api_cache key (without the data version)
+        owner_username: Team whose data version the result depends on
+        compute: Produces the result; runs in a worker thread when revalidating
+        fresh_seconds: Age after which a result of the current version is refreshed
+        wait_for_new_version: Recompute in the request, instead of serving the
+                              old result, once the data version moved
+        max_stale_seconds: Age after which a result is no longer served
+                           (default SWR_MAX_STALE_SECONDS)
+
+    Returns:
+        (result, age in seconds); age is 0 for a result computed by this call
+    """
+    if max_stale_seconds is None:
+        max_stale_seconds = settings.SWR_MAX_STALE_SECONDS
+    version = get_data_version(owner_username)
+    entry = get_cached_data(key, ttl_seconds=max_stale_seconds)
+    if entry and wait_for_new_version and entry["version"] != version:
+        entry = None
+
+    if entry:
+        age = max(0.0, time.time() - entry["computed_at"])
+        if entry["version"] != version or age >= fresh_seconds:
+            _schedule_refresh(key, version, compute, max_stale_seconds)
+        return entry["data"], age
+
+    value = compute()
+    _store(key, version, value, max_stale_seconds)
+    return value, 0.0
+
+
+def shutdown():
+    """Stop accepting refreshes (running ones finish in the background)"""
+    _executor.shutdown(wait=False, cancel_futures=True)
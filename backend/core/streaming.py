@@ -0,0 +1,121 @@
+"""
+NDJSON streaming for large exports.
+
+Requests sent with Accept: application/x-ndjson get one JSON object per
+line instead of one JSON array. The rows come from a generator that walks a
+database cursor (fetchmany batches), so memory stays bounded by a few chunks
+whatever the size of the export.
+
+The generator runs in its own thread (SQLite connections stay in the thread
+that opened them) with the request's context, so owner scopes still route
+to the right shard. Encoded chunks go through a bounded queue: when the
+client reads slowly the reader waits instead of buffering (backpressure),
+and when the client disconnects the reader stops at its next chunk and
+closes its cursor.
+"""
+
+import asyncio
+import concurrent.futures
+import contextvars
+import logging
+import threading
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Optional
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+
+from backend.core.config import settings
+from backend.core.json_response import dumps_json
+
+logger = logging.getLogger(__name__)
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+_END = object()
+
+
+def wants_ndjson(request: Request) -> bool:
+    """True when the client asked for a streamed NDJSON body"""
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def _encode(row: Any) -> bytes:
+    return dumps_json(row) + b"\n"
+
+
+async def _ndjson_chunks(rows: Callable[[], Iterable[Any]], batch_rows: int, context: contextvars.Context) -> AsyncIterator[bytes]:
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=settings.STREAM_QUEUE_CHUNKS)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        """Hand a chunk to the response, waiting while the queue is full; False once the client is gone"""
+        if stop.is_set():
+            return False
+        future = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+        while True:
+            try:
+                future.result(timeout=0.5)
+                return True
+            except concurrent.futures.TimeoutError:
+                if stop.is_set():
+                    future.cancel()
+                    return False
+
+    def read():
+        batch = []
+        iterator = None
+        try:
+            iterator = iter(rows())
+            for row in iterator:
+                batch.append(_encode(row))
+                if len(batch) >= batch_rows:
+                    if not put(b"".join(batch)):
+                        return
+                    batch = []
+            if batch and not put(b"".join(batch)):
+                return
+        except Exception as e:
+            # The status line is already sent; end the body with an error line
+            logger.error(f"NDJSON stream failed: {e}")
+            if not put(b"".join(batch) + _encode({"error": "stream aborted"})):
+                return
+        finally:
+            # Closes the rows' cursor right away, also when the client left early
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+        put(_END)
+
+    thread = threading.Thread(target=context.run, args=(read,), name="ndjson-stream", daemon=True)
+    thread.start()
+    try:
+        while True:
+            chunk = await queue.get()
+            if chunk is _END:
+                break
+            yield chunk
+    finally:
+        # Client disconnected or the response finished: let the reader stop
+        stop.set()
+
+
+def ndjson_response(
+    rows: Callable[[], Iterable[Any]],
+    headers: Optional[Dict[str, str]] = None,
+    batch_rows: Optional[int] = None,
+) -> StreamingResponse:
+    """
+    Stream rows as NDJSON.
+
+    Args:
+        rows: Called in the reader thread; returns the (lazy) rows to send
+        headers: Extra response headers
+        batch_rows: Rows per chunk (default STREAM_BATCH_ROWS)
+    """
+    # The handler's context (owner scope) is the one the rows are read in
+    return StreamingResponse(
+        _ndjson_chunks(rows, batch_rows or settings.STREAM_BATCH_ROWS, contextvars.copy_context()),
+        media_type=NDJSON_MEDIA_TYPE,
+        headers=headers,
+    )
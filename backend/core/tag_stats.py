@@ -0,0 +1,192 @@
+"""
+Persistent per-member problem tag aggregates.
+
+member_solved_problems remembers every accepted problem observed for a
+member and member_tag_stats keeps a running solved count per (member, tag).
+members.tags_synced_at records the last sync of each member, including
+members with nothing solved, so each member is backfilled exactly once.
+Newly observed accepted submissions are folded in incrementally (see
+backend.services.tag_sync), so tag analysis, the team heatmap and tag-based
+recommendations are SQL aggregations over local rows instead of one
+LeetCode fan-out per view.
+"""
+
+import logging
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+from backend.core.data_version import bump_member_versions
+from backend.core.database import get_db_connection, get_read_connection
+
+logger = logging.getLogger(__name__)
+
+_RECORD_PROBLEM_SQL = """
+    INSERT INTO member_solved_problems (username, title_slug, solved_at)
+    VALUES (?, ?, ?)
+    ON CONFLICT(username, title_slug) DO NOTHING
+"""
+
+_ADD_TAG_SQL = """
+    INSERT INTO member_tag_stats (username, tag, solved_count, last_solved_at)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT(username, tag) DO UPDATE SET
+        solved_count = member_tag_stats.solved_count + excluded.solved_count,
+        last_solved_at = CASE
+            WHEN member_tag_stats.last_solved_at IS NULL OR excluded.last_solved_at > member_tag_stats.last_solved_at
+            THEN excluded.last_solved_at ELSE member_tag_stats.last_solved_at END
+"""
+
+
+def _member_filters(owner_username: str, members: Optional[Iterable[str]], alias: str):
+    """
+    WHERE clause for the given members of a team (default: its active members).
+    None when members is empty.
+    """
+    conditions = ["m.team_owner = ?"]
+    params: list = [owner_username]
+    if members is None:
+        conditions.append("COALESCE(m.status, 'active') != 'suspended'")
+    else:
+        members = list(members)
+        if not members:
+            return None
+        conditions.append(f"{alias}.username IN ({','.join(['?'] * len(members))})")
+        params.extend(members)
+    return " AND ".join(conditions), params
+
+
+def record_accepted_problems(username: str, submissions: Iterable[Dict[str, Any]], conn=None) -> int:
+    """
+    Fold a member's accepted submissions into the tag aggregates.
+
+    Problems already recorded for the member are skipped, so overlapping
+    batches (recent submission lists fetched on every check) count each
+    problem once. The member is marked as synced even when nothing was new.
+
+    Args:
+        username: Member the submissions belong to
+        submissions: Dicts with titleSlug, timestamp and tags (fetch_submissions_with_tags)
+        conn: Optional connection whose transaction the write joins
+
+    Returns:
+        Number of newly recorded problems
+    """
+    if conn is None:
+        with get_db_connection() as new_conn:
+            recorded = record_accepted_problems(username, submissions, conn=new_conn)
+            new_conn.commit()
+            return recorded
+
+    cursor = conn.cursor()
+    counts: Counter = Counter()
+    latest: Dict[str, int] = {}
+    recorded = 0
+    for sub in submissions:
+        title_slug = sub.get("titleSlug")
+        if not title_slug:
+            continue
+        solved_at = int(sub.get("timestamp") or 0) or None
+        cursor.execute(_RECORD_PROBLEM_SQL, (username, title_slug, solved_at))
+        if cursor.rowcount <= 0:
+            continue
+        recorded += 1
+        for tag in set(sub.get("tags") or []):
+            counts[tag] += 1
+            if solved_at and solved_at > latest.get(tag, 0):
+                latest[tag] = solved_at
+
+    cursor.execute(
+        "UPDATE members SET tags_synced_at = ? WHERE username = ?",
+        (datetime.now(timezone.utc).isoformat(), username)
+    )
+    if recorded:
+        cursor.executemany(_ADD_TAG_SQL, [(username, tag, count, latest.get(tag)) for tag, count in counts.items()])
+        bump_member_versions(cursor, [username])
+    return recorded
+
+
+def members_never_synced(usernames: Iterable[str]) -> List[str]:
+    """Members whose accepted submissions were never recorded (new members, or teams from before tag stats)"""
+    usernames = list(usernames)
+    never_synced = set()
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        for i in range(0, len(usernames), 900):
+            chunk = usernames[i:i + 900]
+            cursor.execute(
+                f"SELECT username FROM members WHERE username IN ({','.join(['?'] * len(chunk))}) AND tags_synced_at IS NULL",
+                chunk
+            )
+            never_synced.update(row[0] for row in cursor.fetchall())
+    return [username for username in usernames if username in never_synced]
+
+
+def query_member_tag_counts(
+    owner_username: str,
+    members: Optional[Iterable[str]] = None,
+    replica: bool = False,
+) -> Dict[str, Counter]:
+    """
+    Solved count per tag for the given members of a team (default: its active members).
+
+    Returns:
+        {member: Counter(tag -> solved problems)}, each Counter in
+        descending count order (ties by tag name)
+    """
+    filters = _member_filters(owner_username, members, "t")
+    if filters is None:
+        return {}
+    where, params = filters
+    with get_read_connection(replica=replica) as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT t.username, t.tag, t.solved_count
+            FROM member_tag_stats t
+            JOIN members m ON m.username = t.username
+            WHERE {where} AND t.solved_count > 0
+            ORDER BY t.username, t.solved_count DESC, t.tag
+        """, params)
+        result: Dict[str, Counter] = {}
+        for username, tag, count in cursor.fetchall():
+            result.setdefault(username, Counter())[tag] = count
+    return result
+
+
+def query_member_problem_totals(
+    owner_username: str,
+    members: Optional[Iterable[str]] = None,
+    replica: bool = False,
+) -> Dict[str, int]:
+    """Recorded accepted problems for the given members of a team (default: its active members)"""
+    filters = _member_filters(owner_username, members, "p")
+    if filters is None:
+        return {}
+    where, params = filters
+    with get_read_connection(replica=replica) as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT p.username, COUNT(*)
+            FROM member_solved_problems p
+            JOIN members m ON m.username = p.username
+            WHERE {where}
+            GROUP BY p.username
+        """, params)
+        return {username: count for username, count in cursor.fetchall()}
+
+
+def query_team_tag_counts(owner_username: str, replica: bool = False) -> Counter:
+    """Solved count per tag summed over a team's active members, highest first"""
+    where, params = _member_filters(owner_username, None, "t")
+    with get_read_connection(replica=replica) as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT t.tag, SUM(t.solved_count) AS solved
+            FROM member_tag_stats t
+            JOIN members m ON m.username = t.username
+            WHERE {where}
+            GROUP BY t.tag
+            HAVING SUM(t.solved_count) > 0
+            ORDER BY solved DESC, t.tag
+        """, params)
+        return Counter({tag: count for tag, count in cursor.fetchall()})
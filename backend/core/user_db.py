@@ -2,17 +2,22 @@
 Database helper functions for user management
 """
 
-from typing import Optional, Dict, Any
-from backend.core.database import get_db_connection
+from typing import Optional, Dict, Any, List
+from backend.core.database import get_catalog_connection
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
+# Per-process throttle for touch_last_seen(): username -> last write
+_last_seen_writes: Dict[str, float] = {}
+LAST_SEEN_RESOLUTION_SECONDS = 60.0
+
 
 def get_user_by_username(username: str) -> Optional[Dict[str, Any]]:
     """Get user from database by username"""
     try:
-        with get_db_connection() as conn:
+        with get_catalog_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 SELECT username, email, full_name, hashed_password, disabled
@@ -38,7 +43,7 @@ def get_user_by_username(username: str) -> Optional[Dict[str, Any]]:
 def get_user_by_email(email: str) -> Optional[Dict[str, Any]]:
     """Get user from database by email"""
     try:
-        with get_db_connection() as conn:
+        with get_catalog_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 SELECT username, email, full_name, hashed_password, disabled
@@ -64,7 +69,7 @@ def get_user_by_email(email: str) -> Optional[Dict[str, Any]]:
 def create_user(username: str, email: str, hashed_password: str, full_name: Optional[str] = None) -> bool:
     """Create a new user in the database"""
     try:
-        with get_db_connection() as conn:
+        with get_catalog_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 INSERT INTO users (username, email, full_name, hashed_password, disabled)
@@ -82,7 +87,7 @@ def update_user(username: str, email: Optional[str] = None, full_name: Optional[
                 hashed_password: Optional[str] = None) -> bool:
     """Update user information"""
     try:
-        with get_db_connection() as conn:
+        with get_catalog_connection() as conn:
             cursor = conn.cursor()
             
             updates = []
@@ -117,7 +122,7 @@ def update_user(username: str, email: Optional[str] = None, full_name: Optional[
 def get_all_users() -> Dict[str, Dict[str, Any]]:
     """Get all users from database (for backward compatibility)"""
     try:
-        with get_db_connection() as conn:
+        with get_catalog_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 SELECT username, email, full_name, hashed_password, disabled
@@ -138,3 +143,39 @@ def get_all_users() -> Dict[str, Dict[str, Any]]:
     except Exception as e:
         logger.error(f"Error getting all users: {e}")
         return {}
+
+
+def last_seen_due(username: str) -> bool:
+    """True when touch_last_seen would write for this user"""
+    return time.time() - _last_seen_writes.get(username, 0.0) >= LAST_SEEN_RESOLUTION_SECONDS
+
+
+def touch_last_seen(username: str):
+    """Record that the user called the API (written at most once a minute per process)"""
+    if not last_seen_due(username):
+        return
+    now = time.time()
+    _last_seen_writes[username] = now
+    try:
+        with get_catalog_connection() as conn:
+            conn.execute("UPDATE users SET last_seen_at = ? WHERE username = ?", (now, username))
+            conn.commit()
+    except Exception as e:
+        logger.debug(f"Could not record last_seen_at for {username}: {e}")
+
+
+def get_recently_active_users(within_seconds: float, limit: int) -> List[str]:
+    """Usernames seen within the last within_seconds, most recent first"""
+    try:
+        with get_catalog_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT username FROM users
+                WHERE disabled = 0 AND last_seen_at >= ?
+                ORDER BY last_seen_at DESC
+                LIMIT ?
+            """, (time.time() - within_seconds, limit))
+            return [row["username"] for row in cursor.fetchall()]
+    except Exception as e:
+        logger.error(f"Error getting recently active users: {e}")
+        return []
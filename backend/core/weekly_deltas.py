@@ -0,0 +1,220 @@
+"""
+Materialized week-over-week deltas.
+
+weekly_deltas holds one row per snapshot with the change since the member's
+previous snapshot and the member's rank within their team that week. When
+snapshots are written (see bulk_insert_snapshots) the team's rows from the
+earliest written week on are rebuilt, so weekly analytics read precomputed
+rows instead of diffing history and a write only redoes the weeks it touched.
+"""
+
+import logging
+from typing import Iterable, List, NamedTuple, Optional
+
+from backend.core.database import get_db_connection, get_read_connection, owner_week_filters
+
+logger = logging.getLogger(__name__)
+
+
+class DeltaRow(NamedTuple):
+    """One weekly_deltas row"""
+    member: str
+    week_start: str
+    prev_week_start: Optional[str]  # Snapshot compared against (None for a member's first snapshot)
+    total: int
+    prev_total: Optional[int]
+    solved_delta: int
+    easy_delta: int
+    medium_delta: int
+    hard_delta: int
+    rank: int  # Position by total within the team that week (ties broken by username)
+    rank_delta: Optional[int]  # Previous rank minus this rank; positive means the member climbed
+
+
+# Rank is assigned per (team, week) over the whole team, then compared with
+# the rank at the member's previous snapshot. {where} limits the snapshots
+# read and {since} the rows written (after the window functions ran over the
+# snapshots read, so the first written row still sees its predecessor)
+_REBUILD_SQL = """
+    INSERT INTO weekly_deltas
+    (username, week_start, prev_week_start, total_solved, prev_total,
+     solved_delta, easy_delta, medium_delta, hard_delta, team_rank, rank_delta)
+    SELECT username, week_start, prev_week_start, total_solved, prev_total,
+           solved_delta, easy_delta, medium_delta, hard_delta, team_rank, rank_delta
+    FROM (
+        SELECT username, week_start, prev_week_start, total_solved, prev_total,
+               total_solved - COALESCE(prev_total, 0) AS solved_delta,
+               easy - COALESCE(prev_easy, 0) AS easy_delta,
+               medium - COALESCE(prev_medium, 0) AS medium_delta,
+               hard - COALESCE(prev_hard, 0) AS hard_delta,
+               team_rank,
+               LAG(team_rank) OVER (PARTITION BY username ORDER BY week_start) - team_rank AS rank_delta
+        FROM (
+            SELECT s.username, s.week_start,
+                   COALESCE(s.total_solved, 0) AS total_solved,
+                   COALESCE(s.easy, 0) AS easy,
+                   COALESCE(s.medium, 0) AS medium,
+                   COALESCE(s.hard, 0) AS hard,
+                   LAG(s.week_start) OVER member_weeks AS prev_week_start,
+                   LAG(COALESCE(s.total_solved, 0)) OVER member_weeks AS prev_total,
+                   LAG(COALESCE(s.easy, 0)) OVER member_weeks AS prev_easy,
+                   LAG(COALESCE(s.medium, 0)) OVER member_weeks AS prev_medium,
+                   LAG(COALESCE(s.hard, 0)) OVER member_weeks AS prev_hard,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY m.team_owner, s.week_start
+                       ORDER BY COALESCE(s.total_solved, 0) DESC, s.username
+                   ) AS team_rank
+            FROM snapshots s
+            JOIN members m ON m.username = s.username
+            {where}
+            WINDOW member_weeks AS (PARTITION BY s.username ORDER BY s.week_start)
+        ) ranked
+    ) deltas
+    {since}
+"""
+
+
+def refresh_weekly_deltas(
+    usernames: Optional[Iterable[str]] = None,
+    owners: Optional[Iterable[str]] = None,
+    since: Optional[str] = None,
+    conn=None,
+) -> int:
+    """
+    Recompute weekly_deltas of whole teams, from a given week on.
+
+    Ranks depend on every member of a team, so the teams of the given
+    usernames (plus any owners given) are rebuilt. A week's rows only depend
+    on that week and each member's previous snapshot, so with since only
+    rows from that week on are rewritten. With neither usernames nor owners
+    the whole table is rebuilt, which is also how existing history is
+    backfilled.
+
+    Args:
+        usernames: Members whose snapshots changed
+        owners: Team owners to rebuild
+        since: Earliest week_start that changed (default: every week)
+        conn: Optional connection whose transaction the rebuild joins
+
+    Returns:
+        Number of delta rows written
+    """
+    if conn is None:
+        with get_db_connection() as new_conn:
+            written = refresh_weekly_deltas(usernames, owners, since, conn=new_conn)
+            new_conn.commit()
+            return written
+
+    cursor = conn.cursor()
+    full_rebuild = usernames is None and owners is None
+    owner_set = set(owners or [])
+
+    if usernames is not None:
+        usernames = list(usernames)
+        for i in range(0, len(usernames), 900):
+            chunk = usernames[i:i + 900]
+            cursor.execute(
+                f"SELECT DISTINCT team_owner FROM members WHERE username IN ({','.join(['?'] * len(chunk))})",
+                chunk
+            )
+            owner_set.update(row[0] for row in cursor.fetchall())
+
+    if full_rebuild:
+        cursor.execute("DELETE FROM weekly_deltas")
+        cursor.execute(_REBUILD_SQL.format(where="", since=""))
+        return cursor.rowcount
+
+    if not owner_set:
+        return 0
+
+    owner_list = sorted(owner_set)
+    placeholders = ",".join(["?"] * len(owner_list))
+
+    if since is None:
+        # Rows of members that were removed from any team are dropped too
+        cursor.execute(f"""
+            DELETE FROM weekly_deltas
+            WHERE username IN (SELECT username FROM members WHERE team_owner IN ({placeholders}))
+               OR username NOT IN (SELECT username FROM members)
+        """, owner_list)
+        cursor.execute(_REBUILD_SQL.format(where=f"WHERE m.team_owner IN ({placeholders})", since=""), owner_list)
+        return cursor.rowcount
+
+    # Read back to the oldest snapshot any member's first rewritten row is compared with
+    # (one index seek per member), so ranks of that week are complete too
+    cursor.execute(f"""
+        SELECT MIN((
+            SELECT MAX(s.week_start) FROM snapshots s
+            WHERE s.username = m.username AND s.week_start < ?
+        ))
+        FROM members m
+        WHERE m.team_owner IN ({placeholders})
+    """, [since] + owner_list)
+    read_from = cursor.fetchone()[0] or since
+
+    cursor.execute(f"""
+        DELETE FROM weekly_deltas
+        WHERE week_start >= ?
+          AND username IN (SELECT username FROM members WHERE team_owner IN ({placeholders}))
+    """, [since] + owner_list)
+    cursor.execute(
+        _REBUILD_SQL.format(
+            where=f"WHERE m.team_owner IN ({placeholders}) AND s.week_start >= ?",
+            since="WHERE week_start >= ?",
+        ),
+        owner_list + [read_from, since]
+    )
+    return cursor.rowcount
+
+
+def query_weekly_deltas(
+    owner_username: str,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    members: Optional[Iterable[str]] = None,
+    last_n: Optional[int] = None,
+    replica: bool = False,
+) -> List[DeltaRow]:
+    """
+    Fetch weekly deltas for a team owner (same filters as query_history).
+
+    Returns:
+        List of DeltaRow ordered by member, then week_start ascending
+    """
+    filters = owner_week_filters(owner_username, since, until, members, alias="d")
+    if filters is None:
+        return []
+    where, params = filters
+
+    columns = """d.username, d.week_start, d.prev_week_start, d.total_solved, d.prev_total,
+                 d.solved_delta, d.easy_delta, d.medium_delta, d.hard_delta, d.team_rank, d.rank_delta"""
+
+    if last_n is not None:
+        query = f"""
+            SELECT username, week_start, prev_week_start, total_solved, prev_total,
+                   solved_delta, easy_delta, medium_delta, hard_delta, team_rank, rank_delta
+            FROM (
+                SELECT {columns},
+                       ROW_NUMBER() OVER (PARTITION BY d.username ORDER BY d.week_start DESC) AS rn
+                FROM weekly_deltas d
+                JOIN members m ON m.username = d.username
+                WHERE {where}
+            ) latest
+            WHERE rn <= ?
+            ORDER BY username, week_start
+        """
+        params.append(max(0, int(last_n)))
+    else:
+        query = f"""
+            SELECT {columns}
+            FROM weekly_deltas d
+            JOIN members m ON m.username = d.username
+            WHERE {where}
+            ORDER BY d.username, d.week_start
+        """
+
+    with get_read_connection(replica) as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = None
+        cursor.execute(query, params)
+        return list(map(DeltaRow._make, cursor.fetchall()))
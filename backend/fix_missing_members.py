@@ -18,6 +18,9 @@ os.chdir(project_root)
 
 from backend.core.database import DB_PATH
 from backend.core.config import settings
+from backend.core.closed_weeks import invalidate_closed_weeks
+from backend.core.data_version import bump_owner_versions
+from backend.core.weekly_deltas import refresh_weekly_deltas
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -34,6 +37,11 @@ def fix_migration():
     # Connect to DB
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
+
+    # Every team that loses or gains members below (their deltas are rebuilt
+    # and their data versions bumped at the end)
+    cursor.execute("SELECT DISTINCT team_owner FROM members")
+    affected_owners = {row[0] for row in cursor.fetchall() if row[0]} | {TARGET_OWNER}
     
     # Helper to insert/update member
     def upsert_member(username, name, avatar, status="active"):
@@ -135,11 +143,17 @@ def fix_migration():
         except Exception as e:
             logger.error(f"Error recovering history: {e}")
 
-    conn.commit()
     logger.info(f"Total processed/upserted members: {total_added}")
     
     # Force owner
     cursor.execute("UPDATE members SET team_owner = ?", (TARGET_OWNER,))
+    # Members changed teams and past weeks were rewritten, so ranks of every
+    # week change: rebuild the affected teams' deltas, then drop analytics
+    # cached from the old ones. Bumping the versions moves versioned cache
+    # keys and ETags on and lets the read replica pick the changes up.
+    refresh_weekly_deltas(owners=affected_owners, conn=conn)
+    bump_owner_versions(cursor, affected_owners)
+    invalidate_closed_weeks(conn=conn)
     conn.commit()
     
     # Verify result
@@ -7,6 +7,11 @@ import logging
 import sys
 import os
 
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.core.bulk_db import bulk_insert_snapshots
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -70,10 +75,16 @@ def force_snapshot(username):
         week_start = (today - timedelta(days=today.weekday())).isoformat()
         
         logger.info(f"Inserting snapshot for {username}: {stats}")
-        cursor.execute("""
-            INSERT INTO snapshots (username, week_start, total_solved, easy, medium, hard, timestamp)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (username, week_start, stats["total"], stats["easy"], stats["medium"], stats["hard"], today.isoformat()))
+        # Refreshes weekly_deltas in the same transaction
+        bulk_insert_snapshots([{
+            "username": username,
+            "week_start": week_start,
+            "totalSolved": stats["total"],
+            "easy": stats["easy"],
+            "medium": stats["medium"],
+            "hard": stats["hard"],
+            "timestamp": today.isoformat(),
+        }], conn=conn)
         conn.commit()
     else:
         logger.error("Could not fetch stats.")
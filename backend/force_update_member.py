@@ -9,6 +9,7 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.dirname(current_dir)
 sys.path.append(project_root)
 
+from backend.core.bulk_db import bulk_insert_snapshots
 from backend.core.database import DB_PATH
 from backend.utils.leetcodeapi import fetch_user_data
 from backend.core.config import settings
@@ -28,7 +29,6 @@ def force_update(username):
     
     # Update DB
     conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
     
     # We don't have a direct 'update member stats' function in DB that separates stats from profile
     # But usually we rely on snapshots or just cache. 
@@ -48,18 +48,16 @@ def force_update(username):
     logger.info(f"Inserting pseudo-snapshot for {week_start}...")
     
     try:
-        cursor.execute("""
-            INSERT OR IGNORE INTO snapshots (username, week_start, total_solved, easy, medium, hard, timestamp)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (
-            username, 
-            week_start,
-            data.get("totalSolved", 0),
-            data.get("easy", 0),
-            data.get("medium", 0),
-            data.get("hard", 0),
-            today.isoformat()
-        ))
+        # Keeps an existing row of the week and refreshes weekly_deltas with the write
+        bulk_insert_snapshots([{
+            "username": username,
+            "week_start": week_start,
+            "totalSolved": data.get("totalSolved", 0),
+            "easy": data.get("easy", 0),
+            "medium": data.get("medium", 0),
+            "hard": data.get("hard", 0),
+            "timestamp": today.isoformat(),
+        }], conn=conn)
         conn.commit()
         logger.info("Snapshot inserted/updated.")
         
@@ -4,15 +4,23 @@ Main application entry point
 """
 
 from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi.datastructures import Default
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from typing import List, Optional
 import os
 from dotenv import load_dotenv
 
-from backend.api import auth, team, leetcode, analytics, notifications, settings, weekly_progress, notifications_log, gamification
+from backend.api import auth, team, leetcode, analytics, notifications, settings, weekly_progress, notifications_log, gamification, dashboard
 from backend.core.config import settings as config_settings
 from backend.core.database import init_db
+from backend.core.json_response import FastJSONResponse
+from backend.core.read_replica import read_replica
+from backend.core.db_backend import close_pool
+from backend.core.sharding import close_shard_connections
+from backend.core import stale_cache
+from backend.core.maintenance import mark_api_activity
+from backend.services.cache_warmer import cache_warmer
 
 # Load environment variables
 load_dotenv()
@@ -24,7 +32,9 @@ app = FastAPI(
     version="2.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
-    root_path=os.getenv("ROOT_PATH", "")
+    root_path=os.getenv("ROOT_PATH", ""),
+    # Kept a default so routes with a response_model still serialize through Pydantic directly
+    default_response_class=Default(FastJSONResponse)
 )
 
 # Initialize database on startup
@@ -33,6 +43,27 @@ async def startup_event():
     """Initialize database and other startup tasks"""
     init_db()
     print("Database initialized successfully")
+    if config_settings.READ_REPLICA_ENABLED:
+        read_replica.start()
+        print("Read replica started")
+    if cache_warmer.start("startup"):
+        print("Cache warm-up started")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release the read replica, database pool, cached shard connections and refresh workers"""
+    read_replica.stop()
+    stale_cache.shutdown()
+    close_pool()
+    close_shard_connections()
+
+@app.middleware("http")
+async def track_api_activity(request, call_next):
+    """Let the scheduler's maintenance job know the API is busy"""
+    # Container health checks are not user traffic
+    if not request.url.path.endswith("/health"):
+        mark_api_activity()
+    return await call_next(request)
 
 # Configure CORS
 app.add_middleware(
@@ -54,6 +85,7 @@ print("Loading notifications router...")
 app.include_router(notifications.router, prefix="/notifications", tags=["Notifications"])
 app.include_router(notifications_log.router, prefix="/notifications-log", tags=["Notifications Log"])
 app.include_router(gamification.router, prefix="/gamification", tags=["Gamification"])
+app.include_router(dashboard.router, prefix="/dashboard", tags=["Dashboard"])
 
 @app.get("/")
 async def root():
@@ -1,9 +1,16 @@
 
 import sqlite3
 import os
+import sys
 import shutil
 import logging
 
+# Add project root to path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.dirname(current_dir))
+
+from backend.core.bulk_db import bulk_insert_snapshots
+
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -32,7 +39,6 @@ def merge_snapshots():
         dst_conn = sqlite3.connect(ACTIVE_DB_PATH)
         
         src_cursor = src_conn.cursor()
-        dst_cursor = dst_conn.cursor()
 
         # Get snapshots from source
         logger.info("Reading snapshots from backup database...")
@@ -43,31 +49,28 @@ def merge_snapshots():
         
         logger.info(f"Found {len(snapshots)} snapshots in backup.")
 
-        # Insert into destination
+        # Insert into destination. bulk_insert_snapshots keeps existing
+        # (username, week_start) rows and, in the same transaction, refreshes
+        # weekly_deltas, bumps the teams' data versions and drops analytics
+        # cached from the merged weeks.
         logger.info("Merging snapshots into active database...")
-        inserted_count = 0
-        for snap in snapshots:
-            try:
-                # Assuming (username, week_start) should be unique, but schema might not enforce it strictly 
-                # or might rely on ID. Let's check for existence first to avoid duplicates if no unique constraint exists.
-                username, week_start = snap[0], snap[1]
-                
-                check_sql = "SELECT 1 FROM snapshots WHERE username = ? AND week_start = ?"
-                dst_cursor.execute(check_sql, (username, week_start))
-                if dst_cursor.fetchone():
-                    # Snapshot exists, skip
-                    continue
-                
-                insert_sql = """
-                INSERT INTO snapshots (username, week_start, total_solved, easy, medium, hard, timestamp)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-                """
-                dst_cursor.execute(insert_sql, snap)
-                inserted_count += 1
-                
-            except Exception as e:
-                logger.error(f"Error inserting snapshot {snap}: {e}")
-
+        rows = [
+            {
+                "username": username,
+                "week_start": week_start,
+                "totalSolved": total_solved,
+                "easy": easy,
+                "medium": medium,
+                "hard": hard,
+                "timestamp": timestamp,
+            }
+            for username, week_start, total_solved, easy, medium, hard, timestamp in snapshots
+        ]
+        outcomes = bulk_insert_snapshots(rows, conn=dst_conn)
+        for outcome in outcomes:
+            if outcome.status == "error":
+                logger.error(f"Error inserting snapshot {outcome.key}: {outcome.error}")
+        inserted_count = sum(1 for outcome in outcomes if outcome.status == "inserted")
         dst_conn.commit()
         logger.info(f"Successfully merged {inserted_count} missing snapshots.")
         
@@ -0,0 +1,153 @@
+"""
+Cache warm-up for the dashboards of recently active teams.
+
+After a deploy or restart every cache tier is cold, and the first viewer of
+each team waits for the LeetCode fetches behind the dashboard. The warmer
+precomputes the default payloads of the slowest dashboard calls:
+
+- /team/members (stale-while-revalidate result, which outlives the warm interval)
+- /analytics/accepted-trend (stale-while-revalidate result)
+- /leetcode/daily/history
+
+It covers teams whose owner used the API within CACHE_WARM_ACTIVE_DAYS, runs
+in a background thread with CACHE_WARM_WORKERS tasks at a time, and is
+started by the API on startup and by the scheduler after each cycle. Progress
+is published to the shared store (backend.core.shared_state), so
+GET /settings/cache-warmer shows runs from any process.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from backend.core.config import settings
+from backend.core.shared_state import get_shared_store
+from backend.core.sharding import owner_scope
+from backend.core.user_db import get_recently_active_users
+
+logger = logging.getLogger(__name__)
+
+STATUS_KEY = "cache_warmer:status:{trigger}"
+STATUS_TTL_SECONDS = 7 * 86400
+
+
+def _warm_team_members(owner: str):
+    from backend.api.team import team_members_result
+    team_members_result(owner)
+
+
+def _warm_accepted_trend(owner: str):
+    from backend.api.analytics import accepted_trend_result
+    accepted_trend_result(owner)
+
+
+def _warm_daily_history(owner: str):
+    from backend.api.leetcode import daily_challenge_history
+    daily_challenge_history(owner)
+
+
+# Default dashboard payloads, in the order a dashboard requests them
+WARM_TASKS: Dict[str, Callable[[str], Any]] = {
+    "team_members": _warm_team_members,
+    "accepted_trend": _warm_accepted_trend,
+    "daily_history": _warm_daily_history,
+}
+
+
+def recently_active_owners() -> List[str]:
+    """Owners who used the API within CACHE_WARM_ACTIVE_DAYS, most recent first"""
+    return get_recently_active_users(settings.CACHE_WARM_ACTIVE_DAYS * 86400, settings.CACHE_WARM_MAX_OWNERS)
+
+
+class CacheWarmer:
+    """Runs warm-ups in a background thread, one at a time per process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._status: Dict[str, Any] = {"state": "idle"}
+
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, trigger: str, owners: Optional[Iterable[str]] = None) -> bool:
+        """Start a warm-up in the background; False if disabled or one is already running"""
+        if not settings.CACHE_WARM_ENABLED:
+            return False
+        with self._lock:
+            if self.running():
+                logger.info(f"Cache warm-up ({trigger}) skipped, one is already running")
+                return False
+            self._thread = threading.Thread(target=self.run, args=(trigger, owners), name="cache-warmer", daemon=True)
+            self._thread.start()
+        return True
+
+    def run(self, trigger: str, owners: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """Warm the given owners (default: recently active ones) and return the final status"""
+        owners = list(owners) if owners is not None else recently_active_owners()
+        status = {
+            "state": "running",
+            "trigger": trigger,
+            "started_at": time.time(),
+            "finished_at": None,
+            "owners": len(owners),
+            "tasks_total": len(owners) * len(WARM_TASKS),
+            "tasks_done": 0,
+            "tasks_failed": 0,
+            "errors": [],
+        }
+        self._publish(status)
+        logger.info(f"Cache warm-up ({trigger}) started for {len(owners)} teams")
+
+        def warm(owner: str, name: str, task: Callable[[str], Any]):
+            # Scoped so sharded deployments read and cache in the owner's shard
+            with owner_scope(owner):
+                task(owner)
+
+        with ThreadPoolExecutor(max_workers=settings.CACHE_WARM_WORKERS, thread_name_prefix="cache-warm") as executor:
+            futures = {
+                executor.submit(warm, owner, name, task): (owner, name)
+                for owner in owners
+                for name, task in WARM_TASKS.items()
+            }
+            for future in as_completed(futures):
+                owner, name = futures[future]
+                status["tasks_done"] += 1
+                try:
+                    future.result()
+                except Exception as e:
+                    status["tasks_failed"] += 1
+                    status["errors"] = (status["errors"] + [f"{owner}/{name}: {e}"])[-10:]
+                    logger.error(f"Cache warm-up of {name} for {owner} failed: {e}")
+                self._publish(status)
+
+        status.update(state="finished", finished_at=time.time())
+        self._publish(status)
+        logger.info(
+            f"Cache warm-up ({trigger}) finished: {status['tasks_done'] - status['tasks_failed']}/"
+            f"{status['tasks_total']} tasks in {status['finished_at'] - status['started_at']:.1f}s"
+        )
+        return status
+
+    def _publish(self, status: Dict[str, Any]):
+        self._status = dict(status)
+        try:
+            get_shared_store().set(STATUS_KEY.format(trigger=status["trigger"]), status, STATUS_TTL_SECONDS)
+        except Exception as e:
+            logger.debug(f"Could not publish cache warm-up status: {e}")
+
+    def status(self) -> Dict[str, Any]:
+        """This process's current run plus the last run per trigger from any process"""
+        store = get_shared_store()
+        last_runs = {}
+        for trigger in ("startup", "scheduler"):
+            try:
+                last_runs[trigger] = store.get(STATUS_KEY.format(trigger=trigger))
+            except Exception as e:
+                logger.debug(f"Could not read cache warm-up status: {e}")
+        return {"enabled": settings.CACHE_WARM_ENABLED, "running": self.running(), "current": self._status, "last_runs": last_runs}
+
+
+cache_warmer = CacheWarmer()
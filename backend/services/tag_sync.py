@@ -0,0 +1,56 @@
+"""
+Keeps the per-member tag aggregates (backend.core.tag_stats) current.
+
+The scheduler's submission check passes the members whose solved count
+moved, plus any member never synced (members.tags_synced_at is NULL); their
+recent accepted submissions are fetched with tags in one parallel batch and
+only problems not seen before are added to the counts. Tag views backfill
+never-synced members on first read, so existing teams do not wait for the
+next scheduler check.
+"""
+
+import logging
+from typing import Dict, Iterable
+
+from backend.core.tag_stats import members_never_synced, record_accepted_problems
+from backend.utils.leetcodeapi import fetch_for_members, fetch_submissions_with_tags
+
+logger = logging.getLogger(__name__)
+
+# Recent accepted submissions fetched per member (LeetCode returns at most what it keeps)
+SYNC_SUBMISSIONS_LIMIT = 100
+SYNC_WORKERS = 5
+
+
+def sync_member_tags(usernames: Iterable[str]) -> Dict[str, int]:
+    """
+    Record the recent accepted problems of these members (in the current owner scope).
+
+    Returns:
+        {member: newly recorded problems} for members whose fetch succeeded
+    """
+    usernames = list(dict.fromkeys(usernames))
+    if not usernames:
+        return {}
+    submissions = fetch_for_members(fetch_submissions_with_tags, usernames, SYNC_SUBMISSIONS_LIMIT, max_workers=SYNC_WORKERS)
+
+    recorded = {}
+    for username, subs in submissions.items():
+        if subs is None:
+            continue
+        try:
+            recorded[username] = record_accepted_problems(username, subs)
+        except Exception as e:
+            logger.error(f"Error recording tag stats for {username}: {e}")
+    return recorded
+
+
+def sync_team_tags(members: Iterable[str], changed: Iterable[str] = ()) -> Dict[str, int]:
+    """Sync the changed members and every member never synced"""
+    return sync_member_tags(list(changed) + members_never_synced(members))
+
+
+def backfill_member_tags(usernames: Iterable[str]) -> bool:
+    """Sync the members never synced; True if that recorded any problem"""
+    never_synced = members_never_synced(usernames)
+    return bool(never_synced) and any(sync_member_tags(never_synced).values())
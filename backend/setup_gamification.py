@@ -219,9 +219,10 @@ def seed_achievements():
         for achievement in achievements:
             try:
                 cursor.execute("""
-                    INSERT OR IGNORE INTO achievements 
+                    INSERT INTO achievements 
                     (achievement_key, name, description, icon, points_required, category)
                     VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(achievement_key) DO NOTHING
                 """, achievement)
             except Exception as e:
                 logger.error(f"Error inserting achievement {achievement[0]}: {e}")
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Copy each team's data from leetcode.db into its own shard file.
+Run once before turning on SHARDING_ENABLED; safe to re-run (existing rows are kept).
+Rows stay in leetcode.db, so switching SHARDING_ENABLED back off still works.
+"""
+
+import sys
+sys.path.insert(0, '/app')
+
+import logging
+import sqlite3
+from backend.core import database
+from backend.core.sharding import CATALOG_TABLES, shard_connection, shard_path
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Rebuilt on demand in each shard
+SKIP_TABLES = CATALOG_TABLES | {"api_cache", "sqlite_sequence"}
+
+TEAM_MEMBERS = "(SELECT username FROM catalog.members WHERE team_owner = ?)"
+
+
+def _team_filter(table: str, columns: list):
+    """WHERE clause selecting one team's rows of a table (None copies the whole table)"""
+    if table == "members":
+        return "team_owner = ?"
+    if table in ("last_state", "data_versions"):
+        return "owner_username = ?"
+    if table == "notifications":
+        return f"recipient IN {TEAM_MEMBERS}"
+    if "username" in columns:
+        return f"username IN {TEAM_MEMBERS}"
+    # Reference data (achievements, team challenges) is copied to every shard
+    return None
+
+
+def shard_team(owner: str) -> dict:
+    """Copy one owner's rows into their shard; returns {table: rows copied}"""
+    path = shard_path(owner)
+    with shard_connection(owner):
+        pass  # Creates the shard file and schema
+
+    copied = {}
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("ATTACH DATABASE ? AS catalog", (database.DB_PATH,))
+        tables = [row[0] for row in conn.execute(
+            "SELECT name FROM main.sqlite_master WHERE type = 'table'"
+        )]
+        for table in tables:
+            if table in SKIP_TABLES:
+                continue
+            catalog_columns = {row[1] for row in conn.execute(f"PRAGMA catalog.table_info({table})")}
+            columns = [row[1] for row in conn.execute(f"PRAGMA main.table_info({table})") if row[1] in catalog_columns]
+            if not columns:
+                continue
+
+            column_list = ", ".join(columns)
+            where = _team_filter(table, columns)
+            query = f"INSERT OR IGNORE INTO main.{table} ({column_list}) SELECT {column_list} FROM catalog.{table}"
+            cursor = conn.execute(query + (f" WHERE {where}" if where else ""), (owner,) if where else ())
+            copied[table] = cursor.rowcount
+        conn.commit()
+    finally:
+        conn.close()
+    return copied
+
+
+def shard_all_teams():
+    database.init_db()
+
+    with database.get_catalog_connection() as conn:
+        owners = [row[0] for row in conn.execute(
+            "SELECT DISTINCT team_owner FROM members WHERE team_owner IS NOT NULL ORDER BY team_owner"
+        )]
+
+    for owner in owners:
+        copied = shard_team(owner)
+        summary = ", ".join(f"{table}={count}" for table, count in copied.items() if count)
+        logger.info(f"✓ {owner} -> {shard_path(owner)} ({summary or 'nothing new'})")
+
+    logger.info(f"✓ Sharded {len(owners)} teams")
+
+
+if __name__ == "__main__":
+    shard_all_teams()
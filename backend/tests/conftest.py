@@ -0,0 +1,41 @@
+"""
+Shared fixtures for backend tests
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from backend.core import database, response_cache
+from backend.core.security import create_access_token
+from backend.main import app
+
+
+@pytest.fixture
+def temp_db(tmp_path, monkeypatch):
+    """Point the database module at a fresh, initialized SQLite file"""
+    monkeypatch.setattr(database, "DB_PATH", str(tmp_path / "test.db"))
+    database.init_db()
+    return database
+
+
+@pytest.fixture
+def client(temp_db):
+    """API client signed in as "owner", with no responses stored from earlier tests"""
+    response_cache.response_store.clear()
+    client = TestClient(app)
+    client.headers["Authorization"] = f"Bearer {create_access_token({'sub': 'owner'})}"
+    return client
+
+
+@pytest.fixture
+def snapshot_row():
+    """Build a bulk_insert_snapshots row: total problems, hard of them hard and the rest easy"""
+    def make(username, week_start, total, hard=0):
+        return {
+            "username": username,
+            "week_start": week_start,
+            "totalSolved": total,
+            "easy": total - hard,
+            "medium": 0,
+            "hard": hard,
+        }
+    return make
@@ -0,0 +1,97 @@
+"""
+Bulk write helper tests
+"""
+
+import pytest
+from backend.core import bulk_db
+from backend.utils.notification_service import NotificationService
+
+
+def test_bulk_insert_snapshots_outcomes(temp_db, snapshot_row):
+    bulk_db.bulk_insert_snapshots([snapshot_row("alice", "2025-01-06", 5)])
+
+    outcomes = bulk_db.bulk_insert_snapshots([
+        snapshot_row("alice", "2025-01-06", 50),   # already recorded this week
+        snapshot_row("bob", "2025-01-06", 1),      # superseded below
+        snapshot_row("bob", "2025-01-06", 2),
+        {"username": "carol", "week_start": "2025-01-06", "totalSolved": "many"},
+        {"username": "", "week_start": "2025-01-06"},
+    ])
+    assert [o.status for o in outcomes] == ["skipped", "skipped", "inserted", "error", "error"]
+
+    with temp_db.get_db_connection() as conn:
+        rows = dict(conn.execute("SELECT username, total_solved FROM snapshots").fetchall())
+    assert rows == {"alice": 5, "bob": 2}
+
+    outcomes = bulk_db.bulk_insert_snapshots([snapshot_row("alice", "2025-01-06", 50)], overwrite=True)
+    assert outcomes[0].status == "updated"
+
+
+def test_bulk_upsert_last_state(temp_db):
+    from backend.core.last_state_db import get_last_state
+
+    bulk_db.bulk_upsert_last_state("owner", {"alice": {"username": "alice", "totalSolved": 3}})
+    outcomes = bulk_db.bulk_upsert_last_state("owner", {
+        "alice": {"username": "alice", "totalSolved": 4},
+        "bob": {"username": "bob", "totalSolved": 1},
+    })
+    assert [o.status for o in outcomes] == ["updated", "inserted"]
+    assert get_last_state("owner")["alice"]["totalSolved"] == 4
+
+
+def test_bulk_upsert_members_respects_other_teams(temp_db):
+    bulk_db.bulk_upsert_members("other", [{"username": "carol"}])
+
+    outcomes = bulk_db.bulk_upsert_members("owner", [
+        {"username": "alice", "name": "Alice"},
+        {"username": "carol"},
+    ])
+    assert [o.status for o in outcomes] == ["inserted", "error"]
+    assert [m["username"] for m in temp_db.get_team_members_from_db("owner")] == ["alice"]
+
+
+def test_shared_transaction_rolls_back_together(temp_db, snapshot_row):
+    with pytest.raises(RuntimeError):
+        with bulk_db.transaction() as conn:
+            bulk_db.bulk_upsert_members("owner", [{"username": "alice"}], conn=conn)
+            bulk_db.bulk_insert_snapshots([snapshot_row("alice", "2025-01-06", 1)], conn=conn)
+            raise RuntimeError("abort")
+
+    assert temp_db.get_team_members_from_db("owner") == []
+    assert temp_db.query_history("owner") == []
+
+
+def test_failed_write_in_shared_transaction_is_raised(temp_db, monkeypatch, snapshot_row):
+    def fail(**kwargs):
+        raise RuntimeError("deltas failed")
+
+    monkeypatch.setattr(bulk_db, "refresh_weekly_deltas", fail)
+
+    # On its own the batch reports the failure per row and writes nothing
+    outcomes = bulk_db.bulk_insert_snapshots([snapshot_row("bob", "2025-01-06", 1), {"username": ""}])
+    assert [(o.status, o.error) for o in outcomes] == [
+        ("error", "deltas failed"), ("error", "username and week_start are required")
+    ]
+
+    # In a caller's transaction the exception reaches the caller, which rolls everything back
+    with pytest.raises(RuntimeError):
+        with bulk_db.transaction() as conn:
+            bulk_db.bulk_upsert_members("owner", [{"username": "alice"}], conn=conn)
+            bulk_db.bulk_insert_snapshots([snapshot_row("alice", "2025-01-06", 1)], conn=conn)
+
+    assert temp_db.get_team_members_from_db("owner") == []
+    assert temp_db.query_history("owner") == []
+
+
+def test_batched_notification_saves(temp_db):
+    service = NotificationService()
+
+    with service.batched_saves():
+        for i in range(3):
+            service.send_notification({"type": "milestone", "title": f"T{i}", "message": "m", "member": "alice"})
+        with temp_db.get_db_connection() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM notifications").fetchone()[0] == 0
+
+    with temp_db.get_db_connection() as conn:
+        rows = conn.execute("SELECT title, recipient, status FROM notifications ORDER BY id").fetchall()
+    assert [tuple(r) for r in rows] == [("T0", "alice", "sent"), ("T1", "alice", "sent"), ("T2", "alice", "sent")]
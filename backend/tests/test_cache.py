@@ -0,0 +1,93 @@
+"""
+async_lru_cache tests
+"""
+
+import asyncio
+import threading
+import time
+import pytest
+from backend.utils.cache import async_lru_cache
+
+
+def test_lru_eviction_respects_recency():
+    calls = []
+
+    @async_lru_cache(maxsize=2, ttl=60)
+    def square(x):
+        calls.append(x)
+        return x * x
+
+    square(1); square(2)
+    square(1)  # 1 becomes most recently used
+    square(3)  # evicts 2
+    square(1); square(2)
+
+    assert calls == [1, 2, 3, 2]
+    info = square.cache_info()
+    assert (info["hits"], info["misses"], info["evictions"]) == (2, 4, 2)
+
+
+def test_single_flight_for_concurrent_misses():
+    calls = []
+    started = threading.Event()
+
+    @async_lru_cache(ttl=60)
+    def slow(x):
+        calls.append(x)
+        started.set()
+        time.sleep(0.1)
+        return {"x": x}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(slow(1))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert calls == [1]
+    assert results == [{"x": 1}] * 5
+
+
+def test_negative_caching_and_per_key_ttl():
+    calls = []
+
+    @async_lru_cache(ttl=lambda x: 0 if x == "live" else 60, negative_ttl=60)
+    def lookup(x):
+        calls.append(x)
+        if x == "boom":
+            raise ValueError(x)
+        return None if x == "missing" else x
+
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            lookup("boom")
+        assert lookup("missing") is None
+        assert lookup("live") == "live"
+
+    # Failures were cached; the zero-TTL key was recomputed
+    assert calls == ["boom", "missing", "live", "live"]
+    assert lookup.cache_info()["negative_hits"] == 1
+
+
+def test_async_functions_and_copies():
+    calls = []
+
+    @async_lru_cache(ttl=60, copy_results=True)
+    async def fetch(x):
+        calls.append(x)
+        await asyncio.sleep(0.01)
+        return {"x": x}
+
+    async def run():
+        first, second = await asyncio.gather(fetch(1), fetch(1))
+        first["x"] = "mutated"
+        return second, await fetch(1)
+
+    second, third = asyncio.run(run())
+    assert calls == [1]
+    assert second == third == {"x": 1}
+
+    fetch.cache_invalidate(1)
+    asyncio.run(fetch(1))
+    assert calls == [1, 1]
@@ -0,0 +1,68 @@
+"""
+Cache warmer tests
+"""
+
+import time
+from backend.core import user_db
+from backend.core.sharding import current_owner
+from backend.services import cache_warmer as warmer_module
+from backend.services.cache_warmer import CacheWarmer, recently_active_owners
+
+
+def _add_users(db):
+    for username in ("active", "stale", "never"):
+        user_db.create_user(username, f"{username}@example.com", "hash")
+    user_db._last_seen_writes.clear()
+    user_db.touch_last_seen("active")
+    user_db.touch_last_seen("stale")
+    with db.get_catalog_connection() as conn:
+        conn.execute("UPDATE users SET last_seen_at = ? WHERE username = 'stale'", (time.time() - 30 * 86400,))
+        conn.commit()
+
+
+def test_recently_active_owners_are_warmed_in_their_scope(temp_db, monkeypatch):
+    _add_users(temp_db)
+    assert recently_active_owners() == ["active"]
+
+    calls = []
+
+    def failing(owner):
+        raise RuntimeError("upstream down")
+
+    monkeypatch.setattr(warmer_module, "WARM_TASKS", {
+        "members": lambda owner: calls.append((owner, current_owner())),
+        "tags": failing,
+    })
+    warmer = CacheWarmer()
+    assert warmer.start("startup")
+    warmer._thread.join(5)
+
+    assert calls == [("active", "active")]
+    status = warmer.status()
+    run = status["last_runs"]["startup"]
+    assert status["current"] == run and not status["running"]
+    assert (run["state"], run["owners"], run["tasks_done"], run["tasks_failed"]) == ("finished", 1, 2, 1)
+    assert run["errors"] == ["active/tags: upstream down"]
+
+
+def test_team_members_warm_up_is_what_the_endpoint_serves(temp_db, monkeypatch):
+    from backend.api import team
+    from backend.core.bulk_db import bulk_upsert_members
+
+    fetched = []
+
+    def fetch_user_data(username):
+        fetched.append(username)
+        return {"username": username, "totalSolved": 3}
+
+    monkeypatch.setattr(team, "fetch_user_data", fetch_user_data)
+    bulk_upsert_members("owner", [{"username": "alice"}])
+
+    warmer_module.WARM_TASKS["team_members"]("owner")
+    members, age = team.team_members_result("owner")
+    assert [m["username"] for m in members] == ["alice"] and fetched == ["alice"]
+
+    # A changed team is recomputed by the request instead of served stale
+    bulk_upsert_members("owner", [{"username": "bob"}])
+    members, age = team.team_members_result("owner")
+    assert {m["username"] for m in members} == {"alice", "bob"} and age == 0
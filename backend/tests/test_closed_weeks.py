@@ -0,0 +1,58 @@
+"""
+Closed-week cache tests
+"""
+
+from datetime import date, timedelta
+from backend.core.bulk_db import bulk_insert_snapshots, bulk_upsert_members
+from backend.core.closed_weeks import (
+    current_week_start,
+    get_closed_week,
+    invalidate_closed_weeks,
+    set_closed_week,
+    team_fingerprint,
+)
+
+
+def test_past_week_writes_invalidate_only_their_team(temp_db):
+    bulk_upsert_members("owner", [{"username": "alice"}])
+    bulk_upsert_members("other", [{"username": "bob"}])
+    set_closed_week("owner", "wow", {"current": {"alice": 10}}, "2025-01-06", "fp")
+    set_closed_week("other", "wow", {"current": {"bob": 5}}, "2025-01-06", "fp")
+
+    # The open week never feeds closed-week results
+    bulk_insert_snapshots([{"username": "alice", "week_start": current_week_start(), "totalSolved": 12}])
+    assert get_closed_week("owner", "wow", "2025-01-06", "fp") == {"current": {"alice": 10}}
+
+    last_week = (date.fromisoformat(current_week_start()) - timedelta(days=7)).isoformat()
+    bulk_insert_snapshots([{"username": "alice", "week_start": last_week, "totalSolved": 11}])
+    assert get_closed_week("owner", "wow", "2025-01-06", "fp") is None
+    assert get_closed_week("other", "wow", "2025-01-06", "fp") == {"current": {"bob": 5}}
+
+    # Repair scripts drop everything
+    assert invalidate_closed_weeks() == 1
+    assert get_closed_week("other", "wow", "2025-01-06", "fp") is None
+
+
+def test_fingerprint_follows_membership():
+    team = [{"username": "alice"}, {"username": "bob", "status": "suspended"}]
+    assert team_fingerprint(team) == team_fingerprint(list(reversed(team)))
+    assert team_fingerprint(team) != team_fingerprint(team[:1])
+
+
+def test_recompute_after_invalidation_ignores_a_stale_replica(temp_db):
+    from backend.core.read_replica import read_replica
+    from backend.utils.week_over_week import compute_week_over_week
+
+    last_week = (date.fromisoformat(current_week_start()) - timedelta(days=7)).isoformat()
+    bulk_upsert_members("owner", [{"username": "alice"}])
+    bulk_insert_snapshots([{"username": "alice", "week_start": last_week, "totalSolved": 5}])
+    read_replica.refresh()
+    try:
+        # A repair rewrites last week after the replica's copy was taken
+        bulk_insert_snapshots([{"username": "alice", "week_start": last_week, "totalSolved": 9}], overwrite=True)
+        compute_week_over_week("owner", 2, profiles={"alice": None})
+
+        pair = get_closed_week("owner", "wow", last_week, team_fingerprint([{"username": "alice"}]))
+        assert pair["current"] == {"alice": 9}
+    finally:
+        read_replica.stop()
@@ -0,0 +1,115 @@
+"""
+Dashboard bundle tests
+"""
+
+import time
+from datetime import date, timedelta
+
+import pytest
+from backend.api import dashboard, leetcode, team, weekly_progress
+from backend.core.bulk_db import bulk_insert_snapshots, bulk_upsert_members
+from backend.utils import leetcodeapi
+from backend.utils import week_over_week as wow
+
+ENDPOINTS = {
+    "members": "/team/members",
+    "stats": "/team/stats",
+    "week_over_week": "/analytics/week-over-week",
+    "current_week_progress": "/analytics/current-week-progress",
+    "streaks": "/analytics/streaks",
+    "streaks_at_risk": "/analytics/streaks/at-risk",
+    "daily": "/leetcode/daily",
+    "daily_completions": "/leetcode/daily/completions",
+    "recent": "/leetcode/recent",
+}
+
+
+@pytest.fixture
+def client(client, monkeypatch, snapshot_row):
+    """The shared client on a seeded team, with upstream fetches faked and recorded in client.calls"""
+    bulk_upsert_members("owner", [
+        {"username": "alice", "name": "Alice"},
+        {"username": "bob", "name": "Bob"},
+        {"username": "carol", "name": "Carol", "status": "suspended"},
+    ])
+    last_week = (date.today() - timedelta(days=date.today().weekday() + 7)).isoformat()
+    bulk_insert_snapshots([snapshot_row(u, last_week, t) for u, t in (("alice", 10), ("bob", 20), ("carol", 5))])
+
+    calls = []
+    totals = {"alice": 14, "bob": 21, "carol": 5}
+    now = int(time.time())
+
+    def fetch_user_data(username):
+        calls.append(("profile", username))
+        return {"username": username, "totalSolved": totals[username], "easy": totals[username], "medium": 0, "hard": 0, "avatar": f"{username}.png"}
+
+    def fetch_recent_submissions(username, limit=20):
+        calls.append(("recent", username))
+        subs = [{"title": "Two Sum", "titleSlug": "two-sum", "timestamp": str(now - 60)}] if username == "alice" else []
+        return subs + [{"title": f"P{i}", "titleSlug": f"p{i}", "timestamp": str(now - 3600 * (i + 2))} for i in range(limit - len(subs))]
+
+    def fetch_daily_challenge():
+        return {"title": "Two Sum", "titleSlug": "two-sum", "difficulty": "Easy"}
+
+    for module in (dashboard, team, weekly_progress, leetcodeapi, wow):
+        monkeypatch.setattr(module, "fetch_user_data", fetch_user_data)
+    for module in (dashboard, leetcode):
+        monkeypatch.setattr(module, "fetch_recent_submissions", fetch_recent_submissions)
+        monkeypatch.setattr(module, "fetch_daily_challenge", fetch_daily_challenge)
+
+    client.calls = calls
+    return client
+
+
+def test_bundle_matches_the_endpoints_it_replaces_with_one_fetch_per_member(client, snapshot_row):
+    this_week = (date.today() - timedelta(days=date.today().weekday())).isoformat()
+    bulk_insert_snapshots([snapshot_row("alice", this_week, 14)])
+    bundle = client.get("/dashboard/bundle").json()
+
+    assert bundle["errors"] == {}
+    assert sorted(client.calls) == sorted([("profile", u) for u in ("alice", "bob", "carol")] + [("recent", u) for u in ("alice", "bob", "carol")])
+    assert [c["username"] for c in bundle["daily_completions"]["completions"]] == ["alice"]
+
+    for section, url in ENDPOINTS.items():
+        assert bundle[section] == client.get(url).json(), section
+
+
+def test_sections_can_be_selected(client):
+    bundle = client.get("/dashboard/bundle?sections=stats,daily").json()
+    assert set(bundle) == {"stats", "daily", "errors"}
+    assert bundle["stats"] == {"totalSolved": 35, "easy": 35, "medium": 0, "hard": 0, "memberCount": 2}
+    # Only the live state the selected sections need is fetched
+    assert all(kind == "profile" for kind, _ in client.calls)
+
+    assert client.get("/dashboard/bundle?sections=stats,nope").status_code == 400
+
+
+def test_recent_deltas_are_read_once_and_failed_sources_only_blank_their_sections(client, monkeypatch):
+    from backend.api import analytics
+
+    replica_reads = []
+    for module in (dashboard, analytics, weekly_progress, wow):
+        query = module.query_weekly_deltas
+        monkeypatch.setattr(
+            module, "query_weekly_deltas",
+            lambda *a, _query=query, **kw: (replica_reads.append(kw) if kw.get("replica") else None) or _query(*a, **kw)
+        )
+
+    fetch_for_members = dashboard.fetch_for_members
+
+    def failing_submissions(fetch, usernames, *args, **kwargs):
+        if fetch is dashboard.fetch_recent_submissions:
+            raise RuntimeError("LeetCode is down")
+        return fetch_for_members(fetch, usernames, *args, **kwargs)
+
+    monkeypatch.setattr(dashboard, "fetch_for_members", failing_submissions)
+
+    bundle = client.get("/dashboard/bundle").json()
+    # Open-week delta rows come from one query shared by the sections
+    assert len(replica_reads) == 1
+    assert bundle["recent"] is None and bundle["daily_completions"] is None
+    assert bundle["errors"] == {"recent": "LeetCode is down", "daily_completions": "LeetCode is down"}
+    assert bundle["stats"]["memberCount"] == 2 and bundle["streaks"] is not None
+
+    assert client.get("/dashboard/bundle?weeks=0").status_code == 400
+    assert client.get("/dashboard/bundle?recent_limit=100000").status_code == 400
@@ -0,0 +1,41 @@
+"""
+Per-owner data version tests
+"""
+
+from backend.core.bulk_db import bulk_insert_snapshots, bulk_upsert_last_state, bulk_upsert_members
+from backend.core.data_version import get_data_version, versioned_cache_key
+from backend.utils.notification_service import NotificationService
+
+
+def test_team_writes_bump_the_owner_version(temp_db):
+    assert get_data_version("owner") == 0
+
+    bulk_upsert_members("owner", [{"username": "alice"}])
+    assert get_data_version("owner") == 1
+
+    bulk_insert_snapshots([{"username": "alice", "week_start": "2025-01-06", "totalSolved": 10}])
+    assert get_data_version("owner") == 2
+
+    state = {"alice": {"totalSolved": 10, "easy": 5, "medium": 5, "hard": 0, "ranking": 1000}}
+    bulk_upsert_last_state("owner", state)
+    assert get_data_version("owner") == 3
+
+    # Unchanged counts (even with a new ranking) keep cached results valid
+    bulk_upsert_last_state("owner", {"alice": {**state["alice"], "ranking": 900}})
+    assert get_data_version("owner") == 3
+
+    service = NotificationService()
+    service.save_notification_to_db(service.create_milestone_notification("alice", "Alice", "total_solved", 10), "sent")
+    assert get_data_version("owner") == 4
+
+    # Other teams are untouched
+    assert get_data_version("other") == 0
+
+
+def test_versioned_cache_key_follows_the_data(temp_db):
+    bulk_upsert_members("owner", [{"username": "alice"}])
+    before = versioned_cache_key("tags_analysis", "owner", 100)
+    assert before == "tags_analysis_owner_100_v1"
+
+    bulk_insert_snapshots([{"username": "alice", "week_start": "2025-01-06", "totalSolved": 10}])
+    assert versioned_cache_key("tags_analysis", "owner", 100) != before
@@ -0,0 +1,223 @@
+"""
+Database helper tests
+"""
+
+import json
+import time
+from datetime import datetime
+import pytest
+from backend.core.config import settings
+from backend.core.data_version import bump_owner_versions
+
+
+def _seed(db, owner="owner", members=("alice", "bob"), weeks=("2025-01-06", "2025-01-13", "2025-01-20")):
+    with db.get_db_connection() as conn:
+        cursor = conn.cursor()
+        for member in members:
+            cursor.execute(
+                "INSERT INTO members (username, name, team_owner, status) VALUES (?, ?, ?, 'active')",
+                (member, member.title(), owner)
+            )
+            for i, week in enumerate(weeks):
+                cursor.execute(
+                    "INSERT INTO snapshots (username, week_start, total_solved, easy, medium, hard) VALUES (?, ?, ?, ?, ?, ?)",
+                    (member, week, 10 * (i + 1), i + 1, i, 0)
+                )
+        bump_owner_versions(cursor, [owner])
+        conn.commit()
+
+
+def test_query_history_scopes_to_owner(temp_db):
+    _seed(temp_db)
+    _seed(temp_db, owner="other", members=("carol",))
+
+    rows = temp_db.query_history("owner")
+    assert {r.member for r in rows} == {"alice", "bob"}
+    assert len(rows) == 6
+    assert isinstance(rows[0], temp_db.SnapshotRow)
+
+
+def test_query_history_filters(temp_db):
+    _seed(temp_db)
+
+    rows = temp_db.query_history("owner", since="2025-01-13", members=["alice"])
+    assert [(r.member, r.week_start) for r in rows] == [("alice", "2025-01-13"), ("alice", "2025-01-20")]
+
+    rows = temp_db.query_history("owner", until="2025-01-13", last_n=1)
+    assert [(r.member, r.week_start, r.total) for r in rows] == [
+        ("alice", "2025-01-13", 20),
+        ("bob", "2025-01-13", 20),
+    ]
+
+    assert temp_db.query_history("owner", members=[]) == []
+
+
+def test_query_history_keyset_pages(temp_db):
+    _seed(temp_db)
+
+    first = temp_db.query_history("owner", limit=4)
+    rest = temp_db.query_history("owner", after=(first[-1].member, first[-1].week_start), limit=4)
+    assert [(r.member, r.week_start) for r in first + rest] == [(r.member, r.week_start) for r in temp_db.query_history("owner")]
+    assert len(rest) == 2
+
+    rows = temp_db.query_history("owner", last_n=2, after=("alice", "2025-01-20"))
+    assert [(r.member, r.week_start) for r in rows] == [("bob", "2025-01-13"), ("bob", "2025-01-20")]
+
+
+def test_get_user_history_from_db_legacy_format(temp_db):
+    _seed(temp_db, members=("alice",))
+
+    history = temp_db.get_user_history_from_db("owner", last_n=2)
+    assert list(history) == ["alice"]
+    assert [s["week_start"] for s in history["alice"]] == ["2025-01-13", "2025-01-20"]
+    assert history["alice"][-1]["totalSolved"] == 30
+
+
+def test_cache_expiry_and_sweep(temp_db):
+    temp_db.set_cached_data("fresh", {"a": 1}, ttl_seconds=3600)
+    temp_db.set_cached_data("stale", {"b": 2}, ttl_seconds=-1)
+
+    assert temp_db.get_cached_data("fresh") == {"a": 1}
+    assert temp_db.get_cached_data("stale") is None
+
+    result = temp_db.sweep_api_cache(batch_size=1)
+    assert result["expired"] == 1
+    with temp_db.get_db_connection() as conn:
+        keys = [row["key"] for row in conn.execute("SELECT key FROM api_cache")]
+    assert keys == ["fresh"]
+
+
+def test_cache_size_cap_evicts_least_recently_used(temp_db):
+    for key in ("old", "mid", "new"):
+        temp_db.set_cached_data(key, {"payload": "x" * 100})
+    with temp_db.get_db_connection() as conn:
+        for i, key in enumerate(("old", "mid", "new")):
+            conn.execute("UPDATE api_cache SET last_accessed = ? WHERE key = ?", (1000 + i, key))
+        conn.commit()
+        row_size = conn.execute("SELECT size_bytes FROM api_cache WHERE key = 'new'").fetchone()[0]
+
+    result = temp_db.sweep_api_cache(max_bytes=row_size * 2)
+    assert result["evicted"] == 1
+    assert temp_db.get_cached_data("old") is None
+    assert temp_db.get_cached_data("new") is not None
+
+
+def test_read_replica_follows_write_generation(temp_db):
+    from backend.core.read_replica import ReadReplica
+
+    _seed(temp_db, members=("alice",))
+    replica = ReadReplica()
+    assert replica.refresh() is True
+    try:
+        assert len(temp_db.query_history("owner", replica=False)) == 3
+
+        with replica.connection() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM snapshots").fetchone()[0] == 3
+
+        # Nothing written, or only bookkeeping: no new copy
+        assert replica.refresh() is False
+        temp_db.set_cached_data("session_cache", {"a": 1})
+        assert replica.refresh() is False
+
+        _seed(temp_db, owner="owner", members=("bob",))
+        with replica.connection() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM snapshots").fetchone()[0] == 3
+
+        assert replica.refresh() is True
+        with replica.connection() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM snapshots").fetchone()[0] == 6
+            with pytest.raises(Exception):
+                conn.execute("DELETE FROM snapshots")
+    finally:
+        replica.stop()
+
+
+def test_memory_tier_serves_warm_hits(temp_db, monkeypatch):
+    monkeypatch.setattr(settings, "CACHE_L1_GENERATION_CHECK_SECONDS", 3600)
+    temp_db.set_cached_data("warm", {"a": [1, 2]})
+
+    def no_db():
+        raise AssertionError("warm hit went to the database")
+
+    monkeypatch.setattr(temp_db, "get_db_connection", no_db)
+    assert temp_db.get_cached_data("warm") == {"a": [1, 2]}
+    assert temp_db.get_cached_data("warm", ttl_seconds=0) is None
+
+
+def test_memory_tier_drops_entries_written_elsewhere(temp_db, monkeypatch):
+    monkeypatch.setattr(settings, "CACHE_L1_GENERATION_CHECK_SECONDS", 0)
+    temp_db.set_cached_data("shared", {"v": 1})
+    assert temp_db.get_cached_data("shared") == {"v": 1}
+
+    # Another process rewrites the row (as legacy JSON text) and bumps the generation
+    with temp_db.get_db_connection() as conn:
+        conn.execute("UPDATE api_cache SET data = ?, codec = NULL, payload = NULL WHERE key = 'shared'", ('{"v": 2}',))
+        conn.execute("UPDATE api_cache_state SET generation = generation + 1")
+        conn.commit()
+    assert temp_db.get_cached_data("shared") == {"v": 2}
+
+    temp_db.delete_cached_data("shared")
+    assert temp_db.get_cached_data("shared") is None
+
+
+def test_cache_writes_leave_other_tiers_alone(temp_db, monkeypatch):
+    monkeypatch.setattr(settings, "CACHE_L1_GENERATION_CHECK_SECONDS", 0)
+    generation = temp_db._read_cache_generation()
+
+    # Routine fills and overwrites do not move the generation other processes check
+    temp_db.set_cached_data("a", {"v": 1})
+    temp_db.set_cached_data("a", {"v": 2})
+    assert temp_db._read_cache_generation() == generation
+
+    # Deleting a missing key does not either; removing rows does
+    temp_db.delete_cached_data("missing")
+    assert temp_db._read_cache_generation() == generation
+    temp_db.delete_cached_data("a")
+    temp_db.set_cached_data("p_1", [1])
+    temp_db.delete_cached_prefix(["p_"])
+    assert temp_db._read_cache_generation() == generation + 2
+
+
+def test_memory_tier_byte_cap(monkeypatch):
+    from backend.core.memory_cache import MemoryCacheTier
+
+    monkeypatch.setattr(settings, "CACHE_L1_MAX_BYTES", 400)
+    tier = MemoryCacheTier()
+    for key in ("a", "b", "c"):
+        tier.put("ns", key, key, 100, written_at=0, expires_at=float("inf"))
+    tier.get("ns", "a")  # a becomes most recently used
+    tier.put("ns", "d", "d", 100, written_at=0, expires_at=float("inf"))
+    tier.put("ns", "e", "e", 100, written_at=0, expires_at=float("inf"))
+
+    assert tier.get("ns", "b") is None
+    assert [tier.get("ns", k).value for k in ("a", "c", "d", "e")] == ["a", "c", "d", "e"]
+    assert tier.stats()["bytes"] == 400
+
+
+def test_cache_codecs_round_trip_and_read_legacy_rows(temp_db, monkeypatch):
+    from backend.core import cache_codec
+
+    value = {"members": [{"member": f"m{i}", "tags": {"Array": i, "Graph": 2 * i}} for i in range(50)]}
+    for codec in ("json", "json+zlib", "orjson+zlib"):
+        if not cache_codec.available(codec):
+            continue
+        monkeypatch.setattr(settings, "CACHE_CODEC", codec)
+        temp_db.set_cached_data(f"k_{codec}", value)
+        with temp_db.get_db_connection() as conn:
+            row = conn.execute("SELECT codec, size_bytes FROM api_cache WHERE key = ?", (f"k_{codec}",)).fetchone()
+        assert row["codec"] == codec
+        monkeypatch.setattr(settings, "CACHE_L1_ENABLED", False)
+        assert temp_db.get_cached_data(f"k_{codec}") == value
+        monkeypatch.setattr(settings, "CACHE_L1_ENABLED", True)
+
+    # Compressed rows are much smaller than the JSON text
+    assert len(cache_codec.encode(value, "json+zlib")[1]) * 3 < len(json.dumps(value))
+
+    # Rows written before the codec column hold JSON text
+    with temp_db.get_db_connection() as conn:
+        conn.execute(
+            "INSERT INTO api_cache (key, data, timestamp, expires_at, last_accessed) VALUES ('legacy', ?, ?, ?, ?)",
+            ('{"v": 1}', datetime.now().isoformat(), time.time() + 60, time.time())
+        )
+        conn.commit()
+    assert temp_db.get_cached_data("legacy") == {"v": 1}
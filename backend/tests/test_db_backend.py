@@ -0,0 +1,91 @@
+"""
+Storage backend tests.
+
+SQL translation runs everywhere; the PostgreSQL round trip only runs when
+TEST_DATABASE_URL points at a scratch database, e.g.
+
+    TEST_DATABASE_URL=postgresql://postgres@localhost/leetcode_test pytest backend/tests
+"""
+
+import os
+
+import pytest
+from backend.core import database, db_backend
+from backend.core.bulk_db import bulk_insert_snapshots
+from backend.core.config import settings
+
+
+def test_translate_placeholders_and_percent():
+    sql = db_backend.translate_sql("SELECT * FROM t WHERE a = ? AND b LIKE '%?%' AND c = ?")
+    assert sql == "SELECT * FROM t WHERE a = %s AND b LIKE '%%?%%' AND c = %s"
+
+    # Without parameters psycopg does no interpolation, so nothing is escaped
+    assert db_backend.translate_sql("SELECT '%'", has_params=False) == "SELECT '%'"
+
+
+def test_translate_ddl():
+    sql = db_backend.translate_sql("""
+        CREATE TABLE IF NOT EXISTS snapshots (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            week_start TEXT,
+            expires_at REAL,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (username) REFERENCES members (username),
+            UNIQUE(username, week_start)
+        )
+    """, has_params=False)
+    assert "BIGSERIAL PRIMARY KEY" in sql
+    assert "expires_at DOUBLE PRECISION" in sql
+    assert "timestamp TEXT DEFAULT (to_char(" in sql
+    assert "FOREIGN KEY" not in sql
+    assert "UNIQUE(username, week_start)" in sql
+
+    alter = db_backend.translate_sql("ALTER TABLE api_cache ADD COLUMN expires_at REAL", has_params=False)
+    assert alter == "ALTER TABLE api_cache ADD COLUMN IF NOT EXISTS expires_at DOUBLE PRECISION"
+
+
+def test_row_indexes_like_sqlite_row():
+    row = db_backend.Row(("alice", 3), {"username": 0, "total": 1})
+    assert row[0] == "alice"
+    assert row["total"] == 3
+    assert dict(row) == {"username": "alice", "total": 3}
+    assert tuple(row) == ("alice", 3)
+
+
+@pytest.fixture
+def postgres_db(monkeypatch):
+    url = os.getenv("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL not set")
+    if db_backend.psycopg is None:
+        pytest.skip("psycopg not installed")
+
+    monkeypatch.setattr(settings, "DATABASE_URL", url)
+    db_backend.close_pool()
+    database.init_db()
+    with database.get_db_connection() as conn:
+        conn.execute("TRUNCATE members, snapshots, api_cache, notifications, last_state")
+    yield database
+    db_backend.close_pool()
+
+
+def test_postgres_round_trip(postgres_db):
+    with postgres_db.get_db_connection() as conn:
+        conn.execute(
+            "INSERT INTO members (username, name, team_owner, status) VALUES (?, ?, ?, 'active')",
+            ("alice", "Alice", "owner")
+        )
+
+    outcomes = bulk_insert_snapshots([
+        {"username": "alice", "week_start": "2025-01-06", "totalSolved": 10},
+        {"username": "alice", "week_start": "2025-01-13", "totalSolved": 12},
+    ])
+    assert [o.status for o in outcomes] == ["inserted", "inserted"]
+
+    rows = postgres_db.query_history("owner", last_n=1)
+    assert [(r.member, r.week_start, r.total) for r in rows] == [("alice", "2025-01-13", 12)]
+    assert postgres_db.get_team_members_from_db("owner")[0]["name"] == "Alice"
+
+    postgres_db.set_cached_data("k", {"a": 1})
+    postgres_db.set_cached_data("k", {"a": 2})
+    assert postgres_db.get_cached_data("k") == {"a": 2}
@@ -0,0 +1,55 @@
+"""
+HistoryMatrix and difficulty trend tests
+"""
+
+import numpy as np
+
+from backend.core.database import SnapshotRow
+from backend.utils.difficulty_analyzer import calculate_difficulty_trends, matrix_difficulty_trends
+from backend.utils.history_matrix import HistoryMatrix, last_n_mean, rank_descending
+
+WEEKS = ["2025-01-06", "2025-01-13", "2025-01-20", "2025-01-27", "2025-02-03"]
+
+
+def _row(member, week, easy, medium=0, hard=0):
+    return SnapshotRow(member, week, easy + medium + hard, easy, medium, hard, None)
+
+
+def test_forward_fill_ranks_and_rolling_means():
+    matrix = HistoryMatrix.from_rows(
+        [_row("bob", WEEKS[1], 5), _row("alice", WEEKS[0], 10), _row("alice", WEEKS[3], 12), _row("eve", "2024-12-30", 1)],
+        members=["alice", "bob", "carol"],
+        weeks=WEEKS,
+    )
+
+    # Rows outside the grid are dropped; gaps carry the last value forward
+    assert matrix.forward_filled().tolist() == [[10, 10, 10, 12, 12], [0, 5, 5, 5, 5], [0] * 5]
+    assert matrix.last_index()[0].tolist() == [0, 0, 0, 3, 3]
+
+    assert rank_descending(np.array([3.0, 7.0, 3.0])).tolist() == [2, 1, 3]
+
+    values = np.array([[1.0, 2.0, 3.0, 4.0, 5.0]])
+    mask = np.array([[True, False, True, True, True]])
+    assert last_n_mean(values, mask, 2).tolist() == [4.5]
+    assert last_n_mean(values, mask, 2, skip=2).tolist() == [2.0]
+    assert np.isnan(last_n_mean(values, mask, 5)).all()
+
+
+def test_team_difficulty_trends_match_member_results():
+    rows = [_row("alice", week, 9, 1) for week in WEEKS[:4]]
+    rows += [_row("bob", WEEKS[0], 0), _row("bob", WEEKS[1], 2, 2)]
+    rows += [_row("dave", week, 2, 4 + i * 4, 1) for i, week in enumerate(WEEKS)]
+    matrix = HistoryMatrix.from_rows(rows, members=["alice", "bob", "carol", "dave"])
+
+    trends = matrix_difficulty_trends(matrix)
+
+    assert trends["alice"]["progression_status"] == "stuck_on_easy"
+    assert trends["alice"]["current_distribution"]["easy_pct"] == 90.0
+    # Weeks without any solved problems are skipped
+    assert [t["week"] for t in trends["bob"]["trends"]] == [WEEKS[1]]
+    assert trends["bob"]["progression_status"] == "insufficient_data"
+    assert trends["carol"]["recommendation"] == "Start solving Easy problems"
+    assert trends["dave"]["progression_status"] == "stuck_on_medium"
+
+    history = [{"week_start": r.week_start, "easy": r.easy, "medium": r.medium, "hard": r.hard} for r in rows if r.member == "dave"]
+    assert calculate_difficulty_trends(history) == trends["dave"]
@@ -0,0 +1,39 @@
+"""
+Fast JSON response tests
+"""
+
+import json
+from datetime import datetime, timezone
+
+import numpy as np
+from pydantic import BaseModel
+
+from backend.core.json_response import dumps_json, fast_json
+
+
+class _Point(BaseModel):
+    week: str
+    total: int
+
+
+def test_fast_json_matches_jsonable_encoder_output():
+    payload = {
+        "weeks": ["2025-01-06"],
+        "counts": {1: np.int64(3), "rate": np.float64(0.5)},
+        "point": _Point(week="2025-01-06", total=3),
+        "at": datetime(2025, 1, 6, tzinfo=timezone.utc),
+        "title": "🎉 Ada",
+    }
+    decoded = json.loads(dumps_json(payload))
+    assert decoded == {
+        "weeks": ["2025-01-06"],
+        "counts": {"1": 3, "rate": 0.5},
+        "point": {"week": "2025-01-06", "total": 3},
+        "at": "2025-01-06T00:00:00+00:00",
+        "title": "🎉 Ada",
+    }
+
+    response = fast_json({"ok": True}, headers={"X-Next-Cursor": "abc"})
+    assert response.body == b'{"ok":true}'
+    assert response.headers["x-next-cursor"] == "abc"
+    assert response.media_type == "application/json"
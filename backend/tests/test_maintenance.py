@@ -0,0 +1,56 @@
+"""
+Scheduled maintenance tests
+"""
+
+import json
+from backend.core import maintenance
+
+
+def _churn(db, rows=2000):
+    with db.get_db_connection() as conn:
+        conn.executemany(
+            "INSERT INTO notifications (type, title, message, status) VALUES ('test', ?, ?, 'sent')",
+            [(f"T{i}", "x" * 200) for i in range(rows)]
+        )
+        conn.commit()
+        conn.execute("DELETE FROM notifications")
+        conn.commit()
+
+
+def test_maintenance_reclaims_space_and_records_run(temp_db):
+    _churn(temp_db)
+
+    results = maintenance.run_maintenance(budget_seconds=30, force=True)
+    assert [r["database"] for r in results] == ["catalog"]
+    result = results[0]
+    assert result["status"] == "ok"
+    assert result["size_after"] < result["size_before"]
+    assert {"analyze", "optimize"} <= set(result["steps"])
+
+    # Once switched to incremental mode, later runs free pages step by step
+    _churn(temp_db)
+    result = maintenance.run_maintenance(budget_seconds=30, force=True)[0]
+    assert "incremental_vacuum" in result["steps"]
+    assert result["freed_pages"] > 0
+
+    with temp_db.get_db_connection() as conn:
+        runs = conn.execute("SELECT database_name, status, steps FROM maintenance_runs ORDER BY id").fetchall()
+    assert [(r["database_name"], r["status"]) for r in runs] == [("catalog", "ok"), ("catalog", "ok")]
+    assert "optimize" in json.loads(runs[0]["steps"])
+
+
+def test_maintenance_skips_while_api_busy(temp_db):
+    maintenance.mark_api_activity()
+    assert maintenance.api_busy()
+    assert maintenance.run_maintenance() == []
+
+    with temp_db.get_db_connection() as conn:
+        run = conn.execute("SELECT database_name, status FROM maintenance_runs").fetchone()
+    assert (run["database_name"], run["status"]) == ("all", "skipped")
+
+
+def test_maintenance_stops_at_budget(temp_db):
+    _churn(temp_db)
+    result = maintenance.maintain_file(temp_db.DB_PATH, deadline=0)
+    assert result["status"] == "partial"
+    assert result["steps"] == {}
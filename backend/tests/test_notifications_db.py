@@ -0,0 +1,53 @@
+"""
+Notification listing tests
+"""
+
+import json
+import sqlite3
+from backend.core import database
+from backend.core.notifications_db import count_notifications, query_notifications
+from backend.utils.notification_service import NotificationService
+
+
+def test_promoted_fields_are_columns_and_filterable(temp_db):
+    service = NotificationService()
+    service.save_notification_to_db(service.create_milestone_notification("alice", "Alice", "total_solved", 100), "sent")
+    at_risk = service.create_streak_at_risk_notification("bob", "Bob", 3, "2025-01-01")
+    service.save_notification_to_db({**at_risk, "current_streak": 3}, "sent")
+
+    with temp_db.get_db_connection() as conn:
+        row = conn.execute("SELECT priority, member_name, milestone_type, metadata FROM notifications WHERE recipient = 'alice'").fetchone()
+    assert (row["priority"], row["member_name"], row["milestone_type"]) == ("medium", "Alice", "total_solved")
+    assert "member_name" not in json.loads(row["metadata"])
+
+    high = service.get_notifications(priority="high")
+    assert [n["member"] for n in high] == ["bob"]
+    assert high[0]["action"] and "current_streak" not in high[0]
+    assert service.get_notifications(priority="high", include_metadata=True)[0]["current_streak"] == 3
+
+    assert [n["member_name"] for n in query_notifications(milestone_type="total_solved")] == ["Alice"]
+    assert count_notifications(member_name="Bob") == 1
+    assert "metadata" not in query_notifications()[0]
+
+
+def test_legacy_metadata_is_backfilled(tmp_path, monkeypatch):
+    path = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(path)
+    conn.execute("""
+        CREATE TABLE notifications (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, type TEXT, title TEXT, message TEXT,
+            recipient TEXT, status TEXT, metadata TEXT, created_at TIMESTAMP, sent_at TIMESTAMP
+        )
+    """)
+    conn.execute(
+        "INSERT INTO notifications (type, title, recipient, status, metadata) VALUES ('milestone', 'T', 'alice', 'sent', ?)",
+        (json.dumps({"member_name": "Alice", "milestone_type": "streak", "link": "https://x"}),)
+    )
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setattr(database, "DB_PATH", path)
+    database.init_db()
+
+    [row] = query_notifications(milestone_type="streak")
+    assert (row["member_name"], row["link"], row["priority"], row["read"]) == ("Alice", "https://x", "medium", 0)
@@ -0,0 +1,98 @@
+"""
+ETag/304 tests for polled endpoints
+"""
+
+import pytest
+from backend.api import analytics
+from backend.core import response_cache
+from backend.core.bulk_db import bulk_insert_snapshots, bulk_upsert_members
+from backend.core.security import create_access_token
+
+
+@pytest.fixture
+def client(client, monkeypatch):
+    """The shared client, recording the handler's history queries in client.calls"""
+    calls = []
+    query_history = analytics.query_history
+    monkeypatch.setattr(analytics, "query_history", lambda *a, **kw: calls.append(a) or query_history(*a, **kw))
+    client.calls = calls
+    return client
+
+
+def test_unchanged_data_is_answered_with_304_without_running_the_handler(client):
+    first = client.get("/analytics/history")
+    etag = first.headers["etag"]
+    assert first.status_code == 200 and first.json() == [] and len(client.calls) == 1
+
+    not_modified = client.get("/analytics/history", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304 and not_modified.content == b""
+    # A poll without the ETag is replayed from the stored body
+    assert client.get("/analytics/history").json() == []
+    assert len(client.calls) == 1
+
+    # Parameters and data changes lead to new ETags
+    assert client.get("/analytics/history?x=1").headers["etag"] != etag
+    bulk_upsert_members("owner", [{"username": "alice"}])
+    changed = client.get("/analytics/history", headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["etag"] != etag
+    assert len(client.calls) == 3
+
+
+def test_etag_follows_the_replica_the_body_is_read_from(client):
+    from backend.core.read_replica import read_replica
+
+    read_replica.refresh()
+    try:
+        etag = client.get("/analytics/history").headers["etag"]
+        bulk_upsert_members("owner", [{"username": "alice"}])
+        bulk_insert_snapshots([{"username": "alice", "week_start": "2025-01-06", "totalSolved": 1}])
+
+        # The copy is behind the write: same version, so no stale body lands under the new ETag
+        assert client.get("/analytics/history", headers={"If-None-Match": etag}).status_code == 304
+
+        read_replica.refresh()
+        fresh = client.get("/analytics/history", headers={"If-None-Match": etag})
+        assert fresh.status_code == 200 and [row["member"] for row in fresh.json()] == ["alice"]
+    finally:
+        read_replica.stop()
+
+
+def test_bodies_are_served_gzipped_and_other_users_are_not(client, monkeypatch):
+    monkeypatch.setattr(response_cache.settings, "RESPONSE_GZIP_MIN_BYTES", 0)
+    etag = client.get("/analytics/history").headers["etag"]
+    replay = client.get("/analytics/history", headers={"Accept-Encoding": "gzip"})
+    assert replay.headers["content-encoding"] == "gzip" and replay.json() == []
+
+    other = client.get(
+        "/analytics/history",
+        headers={"Authorization": f"Bearer {create_access_token({'sub': 'other'})}", "If-None-Match": etag},
+    )
+    assert other.status_code == 200
+    assert client.get("/analytics/history", headers={"Authorization": "Bearer bad"}).status_code == 401
+
+
+def test_history_is_filtered_and_paged_with_cursors(client, snapshot_row):
+    bulk_upsert_members("owner", [{"username": "alice"}, {"username": "bob"}])
+    bulk_insert_snapshots([
+        snapshot_row(u, w, t)
+        for u in ("alice", "bob") for w, t in (("2025-01-06", 1), ("2025-01-13", 2), ("2025-01-20", 3))
+    ])
+
+    full = client.get("/analytics/history").json()
+    assert full[0] == {"week_start": "2025-01-06", "member": "alice", "totalSolved": 1, "easy": 1, "medium": 0, "hard": 0}
+
+    pages, url = [], "/analytics/history?limit=4"
+    while url:
+        page = client.get(url)
+        pages.extend(page.json())
+        cursor = page.headers.get("x-next-cursor")
+        url = f"/analytics/history?limit=4&cursor={cursor}" if cursor else None
+    assert pages == full
+
+    narrow = client.get("/analytics/history?since=2025-01-13&members=bob&fields=totalSolved").json()
+    assert narrow == [
+        {"week_start": "2025-01-13", "member": "bob", "totalSolved": 2},
+        {"week_start": "2025-01-20", "member": "bob", "totalSolved": 3},
+    ]
+    assert client.get("/analytics/history?fields=nope").status_code == 400
+    assert client.get("/analytics/history?cursor=!!").status_code == 400
@@ -0,0 +1,82 @@
+"""
+Per-team sharding tests
+"""
+
+import os
+import pytest
+from backend.core import bulk_db, sharding
+from backend.core.config import settings
+
+
+@pytest.fixture
+def sharded_db(temp_db, monkeypatch):
+    monkeypatch.setattr(settings, "SHARDING_ENABLED", True)
+    yield temp_db
+    sharding.close_shard_connections()
+
+
+def _add_team(owner, members):
+    with sharding.owner_scope(owner):
+        bulk_db.bulk_upsert_members(owner, [{"username": m} for m in members])
+        bulk_db.bulk_insert_snapshots([
+            {"username": m, "week_start": "2025-01-06", "totalSolved": 10, "easy": 10, "medium": 0, "hard": 0}
+            for m in members
+        ])
+
+
+def test_teams_are_isolated(sharded_db):
+    _add_team("owner1", ["alice"])
+    _add_team("owner2", ["bob"])
+
+    with sharding.owner_scope("owner1"):
+        assert [m["username"] for m in sharded_db.get_team_members_from_db("owner1")] == ["alice"]
+        assert sharded_db.get_team_members_from_db("owner2") == []
+        assert [r.member for r in sharded_db.query_history("owner1")] == ["alice"]
+
+    # Team data never reaches the catalog
+    with sharded_db.get_db_connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM members").fetchone()[0] == 0
+        routes = dict(conn.execute("SELECT owner_username, shard_file FROM shard_routes").fetchall())
+    assert set(routes) == {"owner1", "owner2"}
+    assert all(os.path.exists(sharding.shard_path(owner)) for owner in routes)
+
+
+def test_fan_out_and_members_service(sharded_db):
+    from services.members_service import MembersService
+
+    _add_team("owner1", ["alice", "carol"])
+    _add_team("owner2", ["bob"])
+
+    counts = sharding.fan_out(lambda owner: len(sharded_db.get_team_members_from_db(owner)))
+    assert counts == {"owner1": 2, "owner2": 1}
+
+    all_members = MembersService().load_all_members()
+    assert {owner: sorted(m["username"] for m in members) for owner, members in all_members.items()} == {
+        "owner1": ["alice", "carol"],
+        "owner2": ["bob"],
+    }
+
+
+def test_catalog_only_ignores_owner_scope(sharded_db):
+    @sharding.catalog_only
+    def read_goal():
+        with sharded_db.get_db_connection() as conn:
+            return conn.execute("SELECT value FROM system_settings WHERE key = 'weekly_goal'").fetchone()[0]
+
+    with sharding.owner_scope("owner1"):
+        assert read_goal() == "100"
+        assert sharding.current_owner() == "owner1"
+
+
+def test_shard_connections_are_reused(sharded_db):
+    with sharding.shard_connection("owner1") as first:
+        with sharding.shard_connection("owner1") as nested:
+            assert nested is not first
+    with sharding.shard_connection("owner1") as again:
+        assert again in (first, nested)
+
+    # Uncommitted work is discarded when a connection goes back to the cache
+    with sharding.shard_connection("owner1") as conn:
+        conn.execute("INSERT INTO members (username, team_owner) VALUES ('ghost', 'owner1')")
+    with sharding.shard_connection("owner1") as conn:
+        assert conn.execute("SELECT COUNT(*) FROM members").fetchone()[0] == 0
@@ -0,0 +1,86 @@
+"""
+Shared state tests (Redis via fakeredis when installed)
+"""
+
+import threading
+import time
+import pytest
+from backend.core import shared_state
+from backend.core.shared_state import DatabaseStore, RedisStore, SharedStore, shared_cached
+from backend.utils.notification_service import NotificationService
+
+
+@pytest.fixture(params=["database", "redis"])
+def store(request, temp_db):
+    if request.param == "redis":
+        fakeredis = pytest.importorskip("fakeredis")
+        store = RedisStore(fakeredis.FakeRedis(), "test:")
+    else:
+        store = DatabaseStore()
+    shared_state.set_shared_store(store)
+    yield store
+    shared_state.set_shared_store(None)
+
+
+def test_store_entries_lists_and_locks(store):
+    store.set("k", {"a": [1, 2]}, 60)
+    assert store.get("k") == {"a": [1, 2]}
+    store.set("short", 1, 0.05)
+    time.sleep(0.1)
+    assert store.get("short") is None and store.get("missing") is None
+
+    assert store.add("lock", 1, 60) and not store.add("lock", 2, 60)
+    store.delete("lock")
+    assert store.add("lock", 3, 60)
+
+    for i in range(5):
+        store.list_push("l", {"i": i}, max_length=3)
+    assert store.list_items("l") == [{"i": 2}, {"i": 3}, {"i": 4}]
+    store.list_replace("l", [{"i": 9}])
+    assert store.list_items("l") == [{"i": 9}]
+
+
+def test_incomplete_store_cannot_be_instantiated():
+    class GetOnlyStore(SharedStore):
+        def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        GetOnlyStore()
+
+
+def test_shared_cached_fetches_once_across_callers(store):
+    calls = []
+
+    def fetch(year, month):
+        calls.append((year, month))
+        time.sleep(0.1)
+        return [{"date": f"{year}-{month:02d}-01"}]
+
+    # Two wrappers around the same key stand in for two worker processes
+    worker_a = shared_cached("challenges", ttl=60)(fetch)
+    worker_b = shared_cached("challenges", ttl=60)(fetch)
+    threads = [threading.Thread(target=worker, args=(2025, 1)) for worker in (worker_a, worker_b, worker_a)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert calls == [(2025, 1)]
+    assert worker_b(2025, 1) == [{"date": "2025-01-01"}] and calls == [(2025, 1)]
+
+    # Negative results are not shared
+    empty = shared_cached("empty", ttl=60, negative=lambda result: not result)(lambda: calls.append("e") or [])
+    empty(); empty()
+    assert calls.count("e") == 2
+
+
+def test_in_app_notifications_are_shared_and_bounded(store, monkeypatch):
+    monkeypatch.setattr(shared_state.settings, "NOTIFICATIONS_IN_APP_MAX", 2)
+    sender, reader = NotificationService(), NotificationService()
+    for member in ("alice", "bob", "carol"):
+        sender.send_notification(sender.create_inactivity_notification(member, member.title(), 7))
+
+    assert [n["member"] for n in reader.notifications] == ["bob", "carol"]
+    reader.clear_notifications("bob")
+    assert [n["member"] for n in sender.notifications] == ["carol"]
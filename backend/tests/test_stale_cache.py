@@ -0,0 +1,52 @@
+"""
+Stale-while-revalidate tests
+"""
+
+import threading
+import time
+from backend.core import stale_cache
+from backend.core.bulk_db import bulk_upsert_members
+from backend.core.stale_cache import get_or_revalidate
+
+
+def _wait_for_refreshes():
+    deadline = time.time() + 5
+    while stale_cache._refreshing and time.time() < deadline:
+        time.sleep(0.01)
+
+
+def test_stale_result_is_served_while_one_refresh_runs(temp_db):
+    calls = []
+    release = threading.Event()
+
+    def compute():
+        calls.append(1)
+        if len(calls) > 1:
+            release.wait(5)
+        return [{"n": len(calls)}]
+
+    assert get_or_revalidate("k", "owner", compute, fresh_seconds=3600) == ([{"n": 1}], 0.0)
+
+    # A data change makes the entry stale: it is still returned, and
+    # concurrent requests start a single background recompute
+    bulk_upsert_members("owner", [{"username": "alice"}])
+    for _ in range(3):
+        value, age = get_or_revalidate("k", "owner", compute, fresh_seconds=3600)
+        assert value == [{"n": 1}] and age >= 0
+    release.set()
+    _wait_for_refreshes()
+    assert len(calls) == 2
+
+    assert get_or_revalidate("k", "owner", compute, fresh_seconds=3600)[0] == [{"n": 2}]
+
+
+def test_too_stale_results_are_recomputed_inline(temp_db, monkeypatch):
+    get_or_revalidate("k", "owner", lambda: ["old"], fresh_seconds=3600)
+    monkeypatch.setattr(stale_cache.settings, "SWR_MAX_STALE_SECONDS", 0)
+    assert get_or_revalidate("k", "owner", lambda: ["new"], fresh_seconds=3600) == (["new"], 0.0)
+
+
+def test_max_stale_seconds_overrides_the_default(temp_db):
+    get_or_revalidate("k", "owner", lambda: ["old"], fresh_seconds=3600)
+    assert get_or_revalidate("k", "owner", lambda: ["new"], fresh_seconds=3600)[0] == ["old"]
+    assert get_or_revalidate("k", "owner", lambda: ["new"], fresh_seconds=3600, max_stale_seconds=0) == (["new"], 0.0)
@@ -0,0 +1,101 @@
+"""
+NDJSON streaming tests
+"""
+
+import asyncio
+import contextvars
+import json
+import time
+
+import pytest
+
+from backend.core import streaming
+from backend.core.bulk_db import bulk_insert_snapshots, bulk_upsert_members
+from backend.utils.notification_service import NotificationService
+
+NDJSON = {"Accept": "application/x-ndjson"}
+
+
+@pytest.fixture
+def client(client, monkeypatch):
+    """The shared client, with batches small enough that every stream spans several"""
+    monkeypatch.setattr(streaming.settings, "STREAM_BATCH_ROWS", 4)
+    return client
+
+
+def _lines(response):
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_history_and_notification_log_stream_every_row(client, snapshot_row):
+    bulk_upsert_members("owner", [{"username": u} for u in ("alice", "bob", "carol")])
+    bulk_insert_snapshots([
+        snapshot_row(u, f"2025-01-{d:02d}", d)
+        for u in ("alice", "bob", "carol") for d in (6, 13, 20)
+    ])
+    assert _lines(client.get("/analytics/history", headers=NDJSON)) == client.get("/analytics/history").json()
+    assert _lines(client.get("/analytics/history?members=bob&fields=easy", headers=NDJSON)) == [
+        {"week_start": f"2025-01-{d:02d}", "member": "bob", "easy": d} for d in (6, 13, 20)
+    ]
+
+    service = NotificationService()
+    with service.batched_saves():
+        for i in range(60):
+            service.save_notification_to_db(service.create_milestone_notification(f"m{i}", f"M{i}", "total_solved", 100), "sent")
+    # The JSON view stays a page of 50; the stream has every row
+    assert len(client.get("/notifications-log").json()["notifications"]) == 50
+    streamed = _lines(client.get("/notifications-log?include_metadata=true", headers=NDJSON))
+    assert len(streamed) == 60 and isinstance(streamed[0]["metadata"], dict)
+
+
+def test_slow_or_gone_clients_stop_the_reader():
+    produced = []
+    closed = []
+
+    def rows():
+        try:
+            for i in range(10_000):
+                produced.append(i)
+                yield {"i": i}
+        finally:
+            closed.append(True)
+
+    async def read_one_chunk():
+        chunks = streaming._ndjson_chunks(rows, 10, contextvars.copy_context())
+        first = await chunks.__anext__()
+        # The reader fills the bounded queue and then waits for the client
+        await asyncio.sleep(0.2)
+        read_ahead = len(produced)
+        await chunks.aclose()
+        return first, read_ahead
+
+    first, read_ahead = asyncio.run(read_one_chunk())
+    assert [json.loads(line)["i"] for line in first.splitlines()] == list(range(10))
+    assert read_ahead <= 10 * (streaming.settings.STREAM_QUEUE_CHUNKS + 2)
+
+    deadline = time.time() + 5
+    while not closed and time.time() < deadline:
+        time.sleep(0.05)
+    assert closed and len(produced) < 10_000
+
+
+def test_export_streams_both_sheets_with_one_profile_fetch_per_member(client, monkeypatch):
+    from backend.api import team
+    from backend.utils import week_over_week
+
+    fetched = []
+
+    def fetch_user_data(username):
+        fetched.append(username)
+        return {"username": username, "totalSolved": 7}
+
+    monkeypatch.setattr(team, "fetch_user_data", fetch_user_data)
+    monkeypatch.setattr(week_over_week, "fetch_user_data", fetch_user_data)
+    bulk_upsert_members("owner", [{"username": u} for u in ("alice", "bob")])
+    bulk_insert_snapshots([{"username": "alice", "week_start": "2025-01-06", "totalSolved": 3}])
+
+    lines = _lines(client.get("/team/export/excel", headers=NDJSON))
+    assert [(line["sheet"], line["username"]) for line in lines[:2]] == [("Current Stats", "alice"), ("Current Stats", "bob")]
+    assert {line["sheet"] for line in lines[2:]} == {"Week over Week"}
+    assert sorted(fetched) == ["alice", "bob"]
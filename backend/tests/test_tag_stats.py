@@ -0,0 +1,91 @@
+"""
+Stored tag aggregate tests
+"""
+
+import pytest
+
+from backend.core.bulk_db import bulk_upsert_members
+from backend.core.data_version import get_data_version
+from backend.core.tag_stats import members_never_synced, query_team_tag_counts, record_accepted_problems
+from backend.services import tag_sync
+from backend.utils.tag_analyzer import analyze_problem_tags
+
+SUBMISSIONS = {
+    "alice": [
+        {"titleSlug": "two-sum", "timestamp": "100", "tags": ["Array", "Hash Table"]},
+        {"titleSlug": "climbing-stairs", "timestamp": "200", "tags": ["Dynamic Programming", "Math"]},
+        {"titleSlug": "house-robber", "timestamp": "300", "tags": ["Array", "Dynamic Programming"]},
+    ],
+    "bob": [{"titleSlug": "two-sum", "timestamp": "150", "tags": ["Array", "Hash Table"]}],
+    "carol": [{"titleSlug": "valid-parentheses", "timestamp": "50", "tags": ["String", "Stack"]}],
+}
+
+
+@pytest.fixture
+def team(temp_db):
+    bulk_upsert_members("owner", [
+        {"username": "alice", "name": "Alice"},
+        {"username": "bob", "name": "Bob"},
+        {"username": "carol", "name": "Carol", "status": "suspended"},
+    ])
+
+
+def test_recording_counts_each_problem_once(team):
+    version = get_data_version("owner")
+    assert record_accepted_problems("alice", SUBMISSIONS["alice"][:2]) == 2
+    # Overlapping batches only add the problems not seen before
+    assert record_accepted_problems("alice", SUBMISSIONS["alice"]) == 1
+    assert record_accepted_problems("alice", SUBMISSIONS["alice"]) == 0
+    assert get_data_version("owner") == version + 2
+
+    record_accepted_problems("carol", SUBMISSIONS["carol"])
+    assert members_never_synced(["alice", "bob", "carol"]) == ["bob"]
+    # Suspended members are left out of team totals
+    assert query_team_tag_counts("owner").most_common() == [
+        ("Array", 2), ("Dynamic Programming", 2), ("Hash Table", 1), ("Math", 1)
+    ]
+
+
+@pytest.fixture
+def fetched(monkeypatch):
+    fetched = []
+
+    def fetch_submissions_with_tags(username, limit=100):
+        fetched.append(username)
+        return SUBMISSIONS.get(username, [])
+
+    monkeypatch.setattr(tag_sync, "fetch_submissions_with_tags", fetch_submissions_with_tags)
+    return fetched
+
+
+def test_sync_fetches_changed_and_never_synced_members(team, fetched):
+    bulk_upsert_members("owner", [{"username": "dave"}])
+    record_accepted_problems("alice", SUBMISSIONS["alice"][:1])
+
+    assert tag_sync.sync_team_tags(["alice", "bob", "dave"]) == {"bob": 1, "dave": 0}
+    # dave has nothing accepted but is synced: later checks leave him alone
+    assert tag_sync.sync_team_tags(["alice", "bob", "dave"], changed=["alice"]) == {"alice": 2}
+    assert fetched == ["bob", "dave", "alice"]
+
+
+def test_tag_views_read_the_stored_aggregates(team, fetched, client):
+    record_accepted_problems("alice", SUBMISSIONS["alice"])
+
+    analysis = client.get("/analytics/tags/analysis").json()
+    assert [a["member"] for a in analysis] == ["alice", "bob"]
+    assert analysis[0]["name"] == "Alice"
+    expected = analyze_problem_tags(SUBMISSIONS["alice"])
+    assert {k: v for k, v in analysis[0].items() if k not in ("member", "name")} == expected
+
+    heatmap = client.get("/analytics/tags/heatmap").json()
+    # Tag occurrences over active members, as get_team_tag_heatmap counts them
+    assert heatmap["total_problems"] == 8
+    assert heatmap["team_strengths"][0] == {"tag": "Array", "count": 3, "percentage": 37.5}
+
+    # Members never synced are backfilled by the first view that shows them
+    assert fetched == ["bob"]
+
+    recommendations = client.get("/analytics/tags/recommendations/carol").json()
+    assert recommendations["coverage_score"] == analyze_problem_tags(SUBMISSIONS["carol"])["coverage_score"]
+    assert client.get("/analytics/tags/recommendations/dave").json() == {"error": "Member not found in your team"}
+    assert fetched == ["bob", "carol"]
@@ -0,0 +1,45 @@
+"""
+Week-over-week engine tests
+"""
+
+from datetime import date, timedelta
+
+from backend.core.bulk_db import bulk_insert_snapshots, bulk_upsert_members
+from backend.core.closed_weeks import current_week_start
+from backend.utils import week_over_week as wow
+
+
+def test_rows_use_indexed_fallbacks_and_one_live_batch(temp_db, monkeypatch, snapshot_row):
+    this_week = current_week_start()
+    week = lambda n: (date.fromisoformat(this_week) - timedelta(weeks=n)).isoformat()
+
+    bulk_upsert_members("owner", [{"username": "alice"}, {"username": "bob"}, {"username": "carol"}])
+    bulk_insert_snapshots([
+        snapshot_row("alice", week(3), 10),
+        snapshot_row("alice", week(1), 30),  # skipped week 2
+        snapshot_row("alice", this_week, 35),
+        snapshot_row("bob", week(2), 20),
+        snapshot_row("bob", week(1), 22),
+    ])
+
+    fetched = []
+
+    def fake_fetch(member):
+        fetched.append(member)
+        return {"totalSolved": {"bob": 40, "carol": 0}[member]}
+
+    monkeypatch.setattr(wow, "fetch_user_data", fake_fetch)
+
+    rows = {(r["week"], r["member"]): r for r in wow.compute_week_over_week("owner", 3)}
+    label = lambda n: date.fromisoformat(week(n)).strftime("%b %d, %Y")
+
+    # Only members without an open-week snapshot are fetched, once each
+    assert sorted(fetched) == ["bob", "carol"]
+    assert (rows[(label(0), "bob")]["current"], rows[(label(0), "bob")]["rank"]) == (40, 1)
+    assert (rows[(label(0), "alice")]["previous"], rows[(label(0), "alice")]["rank_delta"]) == (30, -1)
+    assert rows[(label(0), "carol")]["current"] == 0
+
+    # Alice has no week-2 snapshot, so she is compared against week 3
+    assert (rows[(label(2), "alice")]["previous"], rows[(label(2), "alice")]["current"]) == (10, 0)
+    assert (rows[(label(1), "alice")]["previous"], rows[(label(1), "alice")]["change"]) == (10, 20)
+    assert len(rows) == 9
@@ -0,0 +1,65 @@
+"""
+Materialized weekly delta tests
+"""
+
+from backend.core.bulk_db import bulk_insert_snapshots, bulk_upsert_members
+from backend.core.weekly_deltas import query_weekly_deltas, refresh_weekly_deltas
+
+
+def test_deltas_follow_snapshot_writes(temp_db, snapshot_row):
+    bulk_upsert_members("owner", [{"username": "alice"}, {"username": "bob"}])
+    bulk_insert_snapshots([
+        snapshot_row("alice", "2025-01-06", 10),
+        snapshot_row("bob", "2025-01-06", 20),
+        snapshot_row("alice", "2025-01-20", 30, hard=2),  # skipped a week
+        snapshot_row("bob", "2025-01-20", 25),
+    ])
+
+    rows = {(d.member, d.week_start): d for d in query_weekly_deltas("owner")}
+
+    first = rows[("alice", "2025-01-06")]
+    assert (first.prev_week_start, first.solved_delta, first.rank, first.rank_delta) == (None, 10, 2, None)
+
+    later = rows[("alice", "2025-01-20")]
+    assert later.prev_week_start == "2025-01-06"
+    assert (later.prev_total, later.solved_delta, later.hard_delta) == (10, 20, 2)
+    assert (later.rank, later.rank_delta) == (1, 1)
+    assert rows[("bob", "2025-01-20")].rank_delta == -1
+
+    # Back-filling the missing week re-links the following row
+    bulk_insert_snapshots([snapshot_row("alice", "2025-01-13", 15)])
+    later = {d.week_start: d for d in query_weekly_deltas("owner", members=["alice"])}["2025-01-20"]
+    assert (later.prev_week_start, later.solved_delta) == ("2025-01-13", 15)
+
+
+def test_full_rebuild_backfills_direct_inserts(temp_db):
+    bulk_upsert_members("owner", [{"username": "alice"}])
+    with temp_db.get_db_connection() as conn:
+        # Maintenance scripts write snapshots directly
+        conn.executemany(
+            "INSERT INTO snapshots (username, week_start, total_solved, easy, medium, hard) VALUES (?, ?, ?, ?, 0, 0)",
+            [("alice", "2025-01-06", 1, 1), ("alice", "2025-01-13", 4, 4)]
+        )
+        conn.commit()
+    assert query_weekly_deltas("owner") == []
+
+    assert refresh_weekly_deltas() == 2
+    assert [d.solved_delta for d in query_weekly_deltas("owner", last_n=1)] == [3]
+
+
+def test_writes_rebuild_only_from_the_earliest_changed_week(temp_db, snapshot_row):
+    bulk_upsert_members("owner", [{"username": u} for u in ("alice", "bob", "carol")])
+    weeks = ["2025-01-06", "2025-01-13", "2025-01-20", "2025-01-27"]
+    bulk_insert_snapshots([
+        snapshot_row(u, w, 10 * i + j) for i, w in enumerate(weeks) for j, u in enumerate(("alice", "bob", "carol"))
+        if not (u == "carol" and w == "2025-01-13")
+    ])
+    # A back-filled week: only that week and the later ones are rewritten
+    bulk_insert_snapshots([snapshot_row("carol", "2025-01-13", 12)])
+    assert refresh_weekly_deltas(usernames=["carol"], since="2025-01-20") == 6
+
+    incremental = query_weekly_deltas("owner")
+    refresh_weekly_deltas()
+    assert incremental == query_weekly_deltas("owner")
+    carol = {d.week_start: d for d in incremental if d.member == "carol"}
+    assert (carol["2025-01-13"].prev_week_start, carol["2025-01-13"].rank_delta) == ("2025-01-06", 0)
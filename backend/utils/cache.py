@@ -1,52 +1,221 @@
 # backend/utils/cache.py
-"""Simple async LRU cache with TTL for in‑process use.
+"""In-process LRU cache with TTL for sync and async functions.
 No external dependencies – pure Python.
+
+- True LRU: entries live in an OrderedDict, hits move to the end and the
+  least recently used entry is evicted in O(1).
+- Single-flight: concurrent misses for the same key wait for one call
+  instead of all hitting the upstream.
+- Negative caching: failures (exceptions, or results the ``negative``
+  predicate flags) are remembered for ``negative_ttl`` seconds.
+- Per-key TTL: ``ttl`` may be a callable receiving the call's arguments.
+- Counters: ``fn.cache_info()`` reports hits, misses, evictions and size.
 """
 import asyncio
-from functools import wraps
-from typing import Any, Callable, Tuple
-from concurrent.futures import ThreadPoolExecutor
+import copy
 import inspect
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from functools import wraps
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple, Union
+
+Ttl = Union[float, Callable[..., float]]
+
+
+class _Entry(NamedTuple):
+    expires_at: float
+    value: Any
+    error: Optional[BaseException]  # Cached exception (negative entry)
+
+
+class _LRUStore:
+    """Thread-safe LRU storage shared by the sync and async wrappers"""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.entries: "OrderedDict[Tuple, _Entry]" = OrderedDict()
+        self.in_flight: Dict[Tuple, Any] = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def lookup(self, key: Tuple) -> Optional[_Entry]:
+        """Live entry for key (counts the hit), or None; call with the lock held"""
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        if entry.error is not None:
+            self.negative_hits += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def store(self, key: Tuple, entry: _Entry):
+        """Insert an entry, evicting the least recently used ones; call with the lock held"""
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def info(self) -> Dict[str, int]:
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "negative_hits": self.negative_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self.entries),
+                "maxsize": self.maxsize,
+                "in_flight": len(self.in_flight),
+            }
 
-# Thread pool for running sync functions
-_executor = ThreadPoolExecutor(max_workers=10)
 
-def async_lru_cache(maxsize: int = 128, ttl: int = 300):
-    """Wrap a sync or async function with an LRU cache that expires after *ttl* seconds.
-    The cache key is the tuple of positional args + frozenset of kwargs.
+def _make_key(args: tuple, kwargs: dict) -> Tuple:
+    return (args, tuple(sorted(kwargs.items()))) if kwargs else (args,)
+
+
+def async_lru_cache(
+    maxsize: int = 128,
+    ttl: Ttl = 300,
+    negative_ttl: Optional[float] = None,
+    negative: Callable[[Any], bool] = lambda result: result is None,
+    copy_results: bool = False,
+):
+    """Wrap a sync or async function with an LRU cache whose entries expire after *ttl* seconds.
+
+    The cache key is the tuple of positional args + sorted kwargs (all must be hashable).
+    Sync functions stay sync (they run in the caller's thread); coroutine
+    functions stay coroutines.
+
+    Args:
+        maxsize: Entries kept before the least recently used is evicted
+        ttl: Seconds a result stays cached, or a callable taking the call's
+            arguments and returning the TTL for that key
+        negative_ttl: Seconds to cache failures (exceptions, and results for
+            which ``negative`` is true); None leaves failures uncached
+        negative: Predicate marking a returned value as a failure
+        copy_results: Return a deep copy on every call, for callers that
+            mutate what they get back
     """
     def decorator(fn: Callable):
-        cache: dict[Tuple[Any, ...], Tuple[float, Any]] = {}
-        lock = asyncio.Lock()
+        store = _LRUStore(maxsize)
         is_coroutine = inspect.iscoroutinefunction(fn)
 
-        @wraps(fn)
-        async def wrapper(*args, **kwargs):
-            key = (args, frozenset(kwargs.items()))
-            async with lock:
-                now = asyncio.get_event_loop().time()
-                if key in cache:
-                    ts, val = cache[key]
-                    if now - ts < ttl:
-                        return val
-                    # expired
-                    del cache[key]
-            
-            # compute fresh (outside lock to allow concurrent computation)
-            if is_coroutine:
-                result = await fn(*args, **kwargs)
+        def entry_for(args, kwargs, value=None, error=None) -> Optional[_Entry]:
+            failed = error is not None or negative(value)
+            if failed:
+                if negative_ttl is None:
+                    return None
+                seconds = negative_ttl
             else:
-                # Run sync function in thread pool
-                loop = asyncio.get_event_loop()
-                result = await loop.run_in_executor(_executor, lambda: fn(*args, **kwargs))
-            
-            async with lock:
-                now = asyncio.get_event_loop().time()
-                cache[key] = (now, result)
-                # enforce maxsize
-                if len(cache) > maxsize:
-                    oldest = min(cache.items(), key=lambda i: i[1][0])[0]
-                    del cache[oldest]
-            return result
+                seconds = ttl(*args, **kwargs) if callable(ttl) else ttl
+            if seconds <= 0:
+                return None
+            return _Entry(time.monotonic() + seconds, value, error)
+
+        def resolve(entry: _Entry):
+            if entry.error is not None:
+                raise entry.error
+            return copy.deepcopy(entry.value) if copy_results else entry.value
+
+        if is_coroutine:
+            @wraps(fn)
+            async def wrapper(*args, **kwargs):
+                key = _make_key(args, kwargs)
+                with store.lock:
+                    entry = store.lookup(key)
+                    if entry is None:
+                        pending = store.in_flight.get(key)
+                        if pending is None:
+                            store.misses += 1
+                            pending = asyncio.get_running_loop().create_future()
+                            store.in_flight[key] = pending
+                            leader = True
+                        else:
+                            leader = False
+                if entry is not None:
+                    return resolve(entry)
+                if not leader:
+                    return resolve(await asyncio.shield(pending))
+
+                entry = cached = None
+                try:
+                    value = await fn(*args, **kwargs)
+                    entry = _Entry(0, value, None)
+                    cached = entry_for(args, kwargs, value=value)
+                except Exception as e:
+                    entry = _Entry(0, None, e)
+                    cached = entry_for(args, kwargs, error=e)
+                finally:
+                    with store.lock:
+                        store.in_flight.pop(key, None)
+                        if cached is not None:
+                            store.store(key, cached)
+                    if entry is None:
+                        # Cancelled: waiters see the cancellation too
+                        pending.cancel()
+                    else:
+                        pending.set_result(entry)
+                return resolve(entry)
+        else:
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                key = _make_key(args, kwargs)
+                with store.lock:
+                    entry = store.lookup(key)
+                    if entry is None:
+                        pending = store.in_flight.get(key)
+                        if pending is None:
+                            store.misses += 1
+                            pending = Future()
+                            store.in_flight[key] = pending
+                            leader = True
+                        else:
+                            leader = False
+                if entry is not None:
+                    return resolve(entry)
+                if not leader:
+                    return resolve(pending.result())
+
+                entry = cached = None
+                try:
+                    value = fn(*args, **kwargs)
+                    entry = _Entry(0, value, None)
+                    cached = entry_for(args, kwargs, value=value)
+                except Exception as e:
+                    entry = _Entry(0, None, e)
+                    cached = entry_for(args, kwargs, error=e)
+                finally:
+                    with store.lock:
+                        store.in_flight.pop(key, None)
+                        if cached is not None:
+                            store.store(key, cached)
+                    if entry is None:
+                        pending.set_exception(RuntimeError(f"{fn.__name__} was interrupted"))
+                    else:
+                        pending.set_result(entry)
+                return resolve(entry)
+
+        def cache_invalidate(*args, **kwargs):
+            """Drop the cached result for these arguments"""
+            with store.lock:
+                store.entries.pop(_make_key(args, kwargs), None)
+
+        def cache_clear():
+            with store.lock:
+                store.entries.clear()
+
+        wrapper.cache_info = store.info
+        wrapper.cache_clear = cache_clear
+        wrapper.cache_invalidate = cache_invalidate
         return wrapper
     return decorator
@@ -3,8 +3,22 @@ Difficulty trend analysis utilities
 Tracks progression through Easy → Medium → Hard problems
 """
 
-from typing import Dict, List, Any
-from datetime import date, timedelta
+from typing import Dict, List, Any, Iterable
+
+import numpy as np
+
+from backend.core.database import SnapshotRow
+from backend.utils.history_matrix import HistoryMatrix, last_n_mean
+
+
+def _snapshot_rows(history: Dict[str, List[Dict[str, Any]]]) -> Iterable[SnapshotRow]:
+    """Legacy {member: [snapshot dicts]} history as rows for HistoryMatrix"""
+    for member, snapshots in history.items():
+        for snapshot in snapshots:
+            yield SnapshotRow(
+                member, snapshot.get("week_start"), snapshot.get("totalSolved"),
+                snapshot.get("easy", 0), snapshot.get("medium", 0), snapshot.get("hard", 0), None
+            )
 
 
 def calculate_difficulty_trends(history_data: List[Dict[str, Any]]) -> Dict[str, Any]:
@@ -17,98 +31,123 @@ def calculate_difficulty_trends(history_data: List[Dict[str, Any]]) -> Dict[str,
     Returns:
         Dict with difficulty trends, progression status, and recommendations
     """
-    if not history_data:
-        return {
-            "trends": [],
-            "current_distribution": {"easy": 0, "medium": 0, "hard": 0},
-            "progression_status": "no_data",
-            "stuck_on_difficulty": None,
-            "recommendation": "Start solving Easy problems"
-        }
-    
-    # Sort by week_start
-    sorted_data = sorted(history_data, key=lambda x: x.get("week_start", ""))
-    
-    # Calculate trends
-    trends = []
-    for snapshot in sorted_data:
-        easy = snapshot.get("easy", 0)
-        medium = snapshot.get("medium", 0)
-        hard = snapshot.get("hard", 0)
-        total = easy + medium + hard
-        
-        if total > 0:
-            trends.append({
-                "week": snapshot.get("week_start"),
+    matrix = HistoryMatrix.from_rows(_snapshot_rows({"member": history_data}), members=["member"])
+    return matrix_difficulty_trends(matrix)["member"]
+
+
+def matrix_difficulty_trends(matrix: HistoryMatrix) -> Dict[str, Dict[str, Any]]:
+    """
+    Difficulty trends of every member of a HistoryMatrix, computed for the
+    whole team at once.
+
+    Weeks count when easy + medium + hard > 0; the progression status looks
+    at the percentages of each member's last 4 such weeks.
+
+    Returns:
+        {member: trend data as returned by calculate_difficulty_trends}
+    """
+    counts = np.nan_to_num(np.stack([matrix.field("easy"), matrix.field("medium"), matrix.field("hard")], axis=2)).astype(np.int64)
+    solved = counts.sum(axis=2)
+    pct = matrix.difficulty_distribution()
+    valid = matrix.present & (solved > 0)
+
+    easy_pct, medium_pct, hard_pct = pct[:, :, 0], pct[:, :, 1], pct[:, :, 2]
+    averages = np.stack([
+        last_n_mean(easy_pct, valid, 4),
+        last_n_mean(medium_pct, valid, 4),
+        last_n_mean(hard_pct, valid, 4),
+        last_n_mean(medium_pct, valid, 2, skip=2),
+        last_n_mean(medium_pct, valid, 2),
+        last_n_mean(hard_pct, valid, 2, skip=2),
+        last_n_mean(hard_pct, valid, 2),
+    ], axis=1).tolist()
+
+    weeks = np.array(matrix.weeks, dtype=object)
+    results = {}
+    for i, member in enumerate(matrix.members):
+        if not matrix.present[i].any():
+            results[member] = {
+                "trends": [],
+                "current_distribution": {"easy": 0, "medium": 0, "hard": 0},
+                "progression_status": "no_data",
+                "stuck_on_difficulty": None,
+                "recommendation": "Start solving Easy problems"
+            }
+            continue
+
+        columns = valid[i]
+        if not columns.any():
+            results[member] = {
+                "trends": [],
+                "current_distribution": {"easy": 0, "medium": 0, "hard": 0},
+                "progression_status": "no_data",
+                "stuck_on_difficulty": None,
+                "recommendation": "Start solving problems"
+            }
+            continue
+
+        trends = [
+            {
+                "week": week,
                 "easy": easy,
                 "medium": medium,
                 "hard": hard,
                 "total": total,
-                "easy_pct": round((easy / total) * 100, 1) if total > 0 else 0,
-                "medium_pct": round((medium / total) * 100, 1) if total > 0 else 0,
-                "hard_pct": round((hard / total) * 100, 1) if total > 0 else 0
-            })
-    
-    if not trends:
-        return {
-            "trends": [],
-            "current_distribution": {"easy": 0, "medium": 0, "hard": 0},
-            "progression_status": "no_data",
-            "stuck_on_difficulty": None,
-            "recommendation": "Start solving problems"
+                "easy_pct": e_pct,
+                "medium_pct": m_pct,
+                "hard_pct": h_pct
+            }
+            for week, (easy, medium, hard), total, (e_pct, m_pct, h_pct) in zip(
+                weeks[columns].tolist(), counts[i][columns].tolist(), solved[i][columns].tolist(), pct[i][columns].tolist()
+            )
+        ]
+
+        # Get current distribution
+        current = trends[-1]
+        current_distribution = {
+            "easy": current["easy"],
+            "medium": current["medium"],
+            "hard": current["hard"],
+            "easy_pct": current["easy_pct"],
+            "medium_pct": current["medium_pct"],
+            "hard_pct": current["hard_pct"]
         }
-    
-    # Get current distribution
-    current = trends[-1]
-    current_distribution = {
-        "easy": current["easy"],
-        "medium": current["medium"],
-        "hard": current["hard"],
-        "easy_pct": current["easy_pct"],
-        "medium_pct": current["medium_pct"],
-        "hard_pct": current["hard_pct"]
-    }
-    
-    # Analyze progression status
-    progression_status, stuck_on, recommendation = _analyze_progression(trends)
-    
-    return {
-        "trends": trends,
-        "current_distribution": current_distribution,
-        "progression_status": progression_status,
-        "stuck_on_difficulty": stuck_on,
-        "recommendation": recommendation
-    }
+
+        # Analyze progression status
+        progression_status, stuck_on, recommendation = _analyze_progression(len(trends), *averages[i])
+
+        results[member] = {
+            "trends": trends,
+            "current_distribution": current_distribution,
+            "progression_status": progression_status,
+            "stuck_on_difficulty": stuck_on,
+            "recommendation": recommendation
+        }
+
+    return results
 
 
-def _analyze_progression(trends: List[Dict[str, Any]]) -> tuple:
+def _analyze_progression(
+    weeks: int,
+    avg_easy: float,
+    avg_medium: float,
+    avg_hard: float,
+    avg_medium_first: float,
+    avg_medium_last: float,
+    avg_hard_first: float,
+    avg_hard_last: float,
+) -> tuple:
     """
     Analyze if user is progressing through difficulties or stuck.
+
+    Averages are over the last 4 weeks (first/last: the older and newer two).
     
     Returns:
         (progression_status, stuck_on_difficulty, recommendation)
     """
-    if len(trends) < 4:
+    if weeks < 4:
         return ("insufficient_data", None, "Keep solving to establish a pattern")
     
-    # Look at last 4 weeks
-    recent = trends[-4:]
-    
-    # Calculate average percentages
-    avg_easy = sum(w["easy_pct"] for w in recent) / len(recent)
-    avg_medium = sum(w["medium_pct"] for w in recent) / len(recent)
-    avg_hard = sum(w["hard_pct"] for w in recent) / len(recent)
-    
-    # Check for growth in harder problems
-    first_two = trends[-4:-2]
-    last_two = trends[-2:]
-    
-    avg_medium_first = sum(w["medium_pct"] for w in first_two) / 2
-    avg_medium_last = sum(w["medium_pct"] for w in last_two) / 2
-    
-    avg_hard_first = sum(w["hard_pct"] for w in first_two) / 2
-    avg_hard_last = sum(w["hard_pct"] for w in last_two) / 2
-    
     # Determine status
     if avg_easy > 80:
         return (
@@ -164,17 +203,11 @@ def get_team_difficulty_trends(history: Dict[str, List[Dict[str, Any]]]) -> List
     Returns:
         List of dicts with member and their difficulty trends
     """
-    team_trends = []
-    
-    for member, member_history in history.items():
-        trend_data = calculate_difficulty_trends(member_history)
-        
-        team_trends.append({
-            "member": member,
-            **trend_data
-        })
-    
-    return team_trends
+    matrix = HistoryMatrix.from_rows(_snapshot_rows(history), members=history.keys())
+    return [
+        {"member": member, **trend_data}
+        for member, trend_data in matrix_difficulty_trends(matrix).items()
+    ]
 
 
 def get_stuck_members(team_trends: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
@@ -0,0 +1,116 @@
+"""
+Dense member x week arrays for trend analytics.
+
+A HistoryMatrix holds a team's weekly rows as one float array of shape
+(members, weeks, fields), NaN where a member has no row for a week, so
+forward-fill, standings, difficulty distributions and rolling averages are
+array operations instead of per-member dict walks. (Week-over-week deltas are
+already materialized in weekly_deltas, which loads into the same shape.)
+"""
+
+from itertools import repeat
+from typing import Iterable, List, Optional, Sequence
+
+import numpy as np
+
+HISTORY_FIELDS = ("total", "easy", "medium", "hard")
+
+
+class HistoryMatrix:
+    """Members x weeks x fields array of weekly rows"""
+
+    def __init__(self, members: List[str], weeks: List[str], fields: Sequence[str], values: np.ndarray, present: np.ndarray):
+        self.members = members
+        self.weeks = weeks
+        self.fields = tuple(fields)
+        self.values = values
+        self.present = present  # (members, weeks) bool: the member has a row that week
+        self.member_index = {m: i for i, m in enumerate(members)}
+        self.week_index = {w: j for j, w in enumerate(weeks)}
+
+    @classmethod
+    def from_rows(
+        cls,
+        rows: Iterable,
+        fields: Sequence[str] = HISTORY_FIELDS,
+        members: Optional[Iterable[str]] = None,
+        weeks: Optional[Iterable[str]] = None,
+    ) -> "HistoryMatrix":
+        """
+        Build from NamedTuple rows with member, week_start and the given
+        fields (SnapshotRow, DeltaRow).
+
+        Args:
+            rows: Rows in any order; None values become NaN
+            fields: Row attributes stored along the last axis
+            members: Row order (default: members of the rows, in first-seen order);
+                rows of other members are dropped
+            weeks: Column order (default: the rows' weeks, sorted); rows of
+                other weeks are dropped
+        """
+        rows = list(rows)
+        columns = dict(zip(rows[0]._fields, zip(*rows))) if rows else {"member": (), "week_start": ()}
+        members = list(dict.fromkeys(columns["member"])) if members is None else list(members)
+        weeks = sorted(set(columns["week_start"])) if weeks is None else list(weeks)
+        member_index = {m: i for i, m in enumerate(members)}
+        week_index = {w: j for j, w in enumerate(weeks)}
+
+        values = np.full((len(members), len(weeks), len(fields)), np.nan)
+        present = np.zeros((len(members), len(weeks)), dtype=bool)
+
+        if rows:
+            i = np.fromiter(map(member_index.get, columns["member"], repeat(-1)), dtype=np.intp, count=len(rows))
+            j = np.fromiter(map(week_index.get, columns["week_start"], repeat(-1)), dtype=np.intp, count=len(rows))
+            kept = (i >= 0) & (j >= 0)
+            i, j = i[kept], j[kept]
+            for k, name in enumerate(fields):
+                values[i, j, k] = np.array(columns[name], dtype=float)[kept]
+            present[i, j] = True
+
+        return cls(members, weeks, fields, values, present)
+
+    def field(self, name: str) -> np.ndarray:
+        """(members, weeks) view of one field"""
+        return self.values[:, :, self.fields.index(name)]
+
+    def last_index(self) -> np.ndarray:
+        """Column of each member's most recent row at or before every week (-1 before the first)"""
+        columns = np.where(self.present, np.arange(len(self.weeks)), -1)
+        return np.maximum.accumulate(columns, axis=1) if columns.size else columns
+
+    def forward_filled(self, name: str = "total", fill: float = 0.0) -> np.ndarray:
+        """(members, weeks) field carried forward over weeks without a row, fill before the first row"""
+        index = self.last_index()
+        filled = np.take_along_axis(np.nan_to_num(self.field(name), nan=fill), np.maximum(index, 0), axis=1)
+        filled[index < 0] = fill
+        return filled
+
+    def difficulty_distribution(self) -> np.ndarray:
+        """(members, weeks, 3) easy/medium/hard percentages of easy + medium + hard, rounded to 0.1"""
+        counts = np.nan_to_num(np.stack([self.field("easy"), self.field("medium"), self.field("hard")], axis=2))
+        solved = counts.sum(axis=2, keepdims=True)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.round(np.where(solved > 0, counts / solved * 100, 0.0), 1)
+
+
+def rank_descending(values: np.ndarray) -> np.ndarray:
+    """1-based standings along axis 0, highest first; ties keep row order"""
+    order = np.argsort(-values, axis=0, kind="stable")
+    ranks = np.empty(values.shape, dtype=np.int64)
+    np.put_along_axis(ranks, order, np.arange(1, values.shape[0] + 1).reshape((-1,) + (1,) * (values.ndim - 1)), axis=0)
+    return ranks
+
+
+def last_n_mean(values: np.ndarray, mask: np.ndarray, n: int, skip: int = 0) -> np.ndarray:
+    """
+    Per-row mean over the last n masked columns, after skipping the newest
+    `skip` of them (rolling average over each member's own rows). NaN for rows
+    with fewer than skip + n masked columns.
+    """
+    from_end = np.where(mask, np.cumsum(mask[:, ::-1], axis=1)[:, ::-1], 0)  # 1 at the newest masked column
+    sums = np.zeros(values.shape[0])
+    # Added oldest first, one column per row at a time, so sums match sum() over the same values
+    for position in range(skip + n, skip, -1):
+        sums += np.where(from_end == position, values, 0.0).sum(axis=1)
+    return np.where(mask.sum(axis=1) >= skip + n, sums / n, np.nan)
+
@@ -3,9 +3,14 @@ LeetCode API client for fetching user data
 """
 
 import requests
-from typing import Dict, Any, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from typing import Dict, Any, Callable, Iterable, List, Optional
 import logging
 
+from backend.core.shared_state import shared_cached
+from backend.utils.cache import async_lru_cache
+
 logger = logging.getLogger(__name__)
 
 
@@ -19,6 +24,10 @@ HEADERS = {
     "Referer": "https://leetcode.com/"
 }
 
+# Profiles are fetched per member by several endpoints and the scheduler; failures are retried after 15s.
+# Each process keeps its own copy in front of the shared one (backend.core.shared_state).
+@async_lru_cache(maxsize=512, ttl=60, negative_ttl=15, copy_results=True)
+@shared_cached("leetcode_profile", ttl=60)
 def fetch_user_data(username: str) -> Optional[Dict[str, Any]]:
     """
     Fetch user profile data from LeetCode GraphQL API
@@ -114,6 +123,8 @@ def fetch_user_data(username: str) -> Optional[Dict[str, Any]]:
         return None
 
 
+@async_lru_cache(maxsize=512, ttl=60, negative_ttl=15, negative=lambda result: not result, copy_results=True)
+@shared_cached("leetcode_recent_submissions", ttl=60, negative=lambda result: not result)
 def fetch_recent_submissions(username: str, limit: int = 20) -> List[Dict[str, Any]]:
     """
     Fetch recent accepted submissions for a user
@@ -166,6 +177,30 @@ def fetch_recent_submissions(username: str, limit: int = 20) -> List[Dict[str, A
         return []
 
 
+def fetch_for_members(fetch: Callable[..., Any], usernames: Iterable[str], *args, max_workers: int = 10) -> Dict[str, Any]:
+    """
+    Call fetch(username, *args) for several members in parallel
+
+    Returns:
+        {username: result}, None for members whose fetch raised
+    """
+    usernames = list(dict.fromkeys(usernames))
+    if not usernames:
+        return {}
+
+    def fetch_one(username: str):
+        try:
+            return fetch(username, *args)
+        except Exception as e:
+            logger.error(f"Error fetching {getattr(fetch, '__name__', 'data')} for {username}: {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(usernames))) as executor:
+        return dict(zip(usernames, executor.map(fetch_one, usernames)))
+
+
+@async_lru_cache(maxsize=1, ttl=300, negative_ttl=30, copy_results=True)
+@shared_cached("leetcode_daily_challenge", ttl=300)
 def fetch_daily_challenge() -> Optional[Dict[str, Any]]:
     """
     Fetch today's LeetCode daily challenge
@@ -278,9 +313,14 @@ def fetch_daily_challenge_by_date(target_date: str) -> Optional[Dict[str, Any]]:
         logger.error(f"Error fetching daily challenge for {target_date}: {e}")
         return None
 
-from functools import lru_cache
+def _monthly_challenges_ttl(year: int, month: int) -> int:
+    # The current month gains a challenge every day; past months are final
+    today = date.today()
+    return 3600 if (year, month) == (today.year, today.month) else 86400
+
 
-@lru_cache(maxsize=12)  # Cache last 12 months requested
+@async_lru_cache(maxsize=12, ttl=_monthly_challenges_ttl, negative_ttl=60, negative=lambda result: not result)
+@shared_cached("leetcode_monthly_challenges", ttl=_monthly_challenges_ttl, negative=lambda result: not result)
 def _fetch_monthly_challenges(year: int, month: int) -> List[Dict[str, Any]]:
     """
     Fetch all daily challenges for a specific month (Cached)
@@ -325,6 +365,8 @@ def _fetch_monthly_challenges(year: int, month: int) -> List[Dict[str, Any]]:
         return []
 
 
+@async_lru_cache(maxsize=256, ttl=300, negative_ttl=15, negative=lambda result: not result, copy_results=True)
+@shared_cached("leetcode_submissions_with_tags", ttl=300, negative=lambda result: not result)
 def fetch_submissions_with_tags(username: str, limit: int = 100) -> List[Dict[str, Any]]:
     """
     Fetch recent accepted submissions with problem tags.
@@ -394,6 +436,8 @@ def fetch_submissions_with_tags(username: str, limit: int = 100) -> List[Dict[st
         return []
 
 
+# Problem metadata practically never changes; the database cache below survives restarts
+@async_lru_cache(maxsize=4096, ttl=86400, negative_ttl=60)
 def _fetch_problem_details(title_slug: str) -> Optional[Dict[str, Any]]:
     """
     Fetch problem details including tags (internal helper).
@@ -458,7 +502,7 @@ def _fetch_problem_details(title_slug: str) -> Optional[Dict[str, Any]]:
         # Save to DB cache
         try:
             from backend.core.database import set_cached_data
-            set_cached_data(cache_key, result)
+            set_cached_data(cache_key, result, ttl_seconds=86400 * 30)
         except:
             pass
             
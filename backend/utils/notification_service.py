@@ -5,7 +5,9 @@ Sends notifications for streaks, milestones, and inactivity
 
 from typing import Dict, List, Any, Optional
 from datetime import date, datetime, timedelta, timezone
+from contextlib import contextmanager
 import logging
+import threading
 from backend.core.config import settings
 
 logger = logging.getLogger(__name__)
@@ -14,8 +16,29 @@ logger = logging.getLogger(__name__)
 class NotificationService:
     """Service for sending various types of notifications"""
     
+    # Shared-state list holding in-app notifications (see backend.core.shared_state)
+    IN_APP_KEY = "notifications:in_app"
+
     def __init__(self):
-        self.notifications = []  # Store notifications in memory for now
+        self._batch = threading.local()  # Per-thread buffer used by batched_saves()
+
+    @property
+    def notifications(self) -> List[Dict[str, Any]]:
+        """In-app notifications, shared by every API worker and the scheduler"""
+        from backend.core.shared_state import get_shared_store
+        try:
+            return get_shared_store().list_items(self.IN_APP_KEY)
+        except Exception as e:
+            logger.error(f"Failed to read in-app notifications: {e}")
+            return []
+
+    @notifications.setter
+    def notifications(self, values: List[Dict[str, Any]]):
+        from backend.core.shared_state import get_shared_store
+        try:
+            get_shared_store().list_replace(self.IN_APP_KEY, values)
+        except Exception as e:
+            logger.error(f"Failed to replace in-app notifications: {e}")
     
     def create_streak_at_risk_notification(
         self,
@@ -152,47 +175,56 @@ class NotificationService:
         }
     
     def save_notification_to_db(self, notification: Dict[str, Any], status: str = "pending"):
-        """Save notification to database"""
+        """Save notification to database (buffered while batched_saves() is active)"""
+        pending = getattr(self._batch, "rows", None)
+        if pending is not None:
+            pending.append((notification, status))
+            return None
+        
         try:
             from backend.core.database import get_db_connection
-            import json
+            from backend.core.bulk_db import NOTIFICATION_INSERT_COLUMNS, notification_row
+            from backend.core.data_version import bump_recipient_versions
             
+            row = notification_row(notification, status)
             with get_db_connection() as conn:
                 cursor = conn.cursor()
-                
-                # Extract metadata (everything except core fields)
-                core_fields = ["type", "title", "message", "member", "priority", "created_at"]
-                metadata = {k: v for k, v in notification.items() if k not in core_fields}
-                
-                # Determine recipient
-                recipient = notification.get("member")
-                if not recipient:
-                    # If it's a channel-wide notification, maybe use 'channel' or 'all'
-                    recipient = "channel"
-                
-                sent_at = None
-                if status == "sent":
-                    sent_at = datetime.now(timezone.utc).isoformat()
-                
-                cursor.execute("""
-                INSERT INTO notifications (type, title, message, recipient, status, metadata, created_at, sent_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    notification.get("type"),
-                    notification.get("title"),
-                    notification.get("message"),
-                    recipient,
-                    status,
-                    json.dumps(metadata),
-                    notification.get("created_at", datetime.now(timezone.utc).isoformat()),
-                    sent_at
-                ))
+                cursor.execute(f"""
+                INSERT INTO notifications ({NOTIFICATION_INSERT_COLUMNS})
+                VALUES ({", ".join(["?"] * len(row))})
+                RETURNING id
+                """, row)
+                notification_id = cursor.fetchone()[0]
+                bump_recipient_versions(cursor, [row[3]])
                 conn.commit()
-                return cursor.lastrowid
+                return notification_id
         except Exception as e:
             logger.error(f"Failed to save notification to DB: {e}")
             return None
 
+    @contextmanager
+    def batched_saves(self):
+        """
+        Buffer DB writes made by send_notification in this thread and flush
+        them in one transaction when the block exits. Nested blocks join
+        the outermost one.
+        """
+        if getattr(self._batch, "rows", None) is not None:
+            yield
+            return
+        
+        self._batch.rows = []
+        try:
+            yield
+        finally:
+            rows, self._batch.rows = self._batch.rows, None
+            if rows:
+                from backend.core.bulk_db import bulk_insert_notifications
+                outcomes = bulk_insert_notifications(rows)
+                failed = sum(1 for o in outcomes if o.status == "error")
+                if failed:
+                    logger.error(f"Failed to save {failed} of {len(rows)} notifications to DB")
+
     def send_notification(
         self,
         notification: Dict[str, Any],
@@ -210,9 +242,13 @@ class NotificationService:
         """
         success = True
         
-        # For now, just store in memory (in-app notifications)
+        # In-app notifications go to shared state, bounded to the newest NOTIFICATIONS_IN_APP_MAX
         if "in_app" in channels:
-            self.notifications.append(notification)
+            from backend.core.shared_state import get_shared_store
+            try:
+                get_shared_store().list_push(self.IN_APP_KEY, notification, settings.NOTIFICATIONS_IN_APP_MAX)
+            except Exception as e:
+                logger.error(f"Failed to store in-app notification: {e}")
             logger.info(f"Notification created: {notification['type']} for {notification.get('member', 'team')}")
         
         # Email integration (placeholder)
@@ -269,71 +305,59 @@ class NotificationService:
         self,
         member: Optional[str] = None,
         limit: int = 50,
-        include_read: bool = False
+        include_read: bool = False,
+        priority: Optional[str] = None,
+        member_name: Optional[str] = None,
+        milestone_type: Optional[str] = None,
+        type: Optional[str] = None,
+        include_metadata: bool = False
     ) -> List[Dict[str, Any]]:
-        """Get recent notifications from database"""
+        """Get recent notifications from database (filters run in SQL)"""
         try:
-            from backend.core.database import get_db_connection
-            import json
+            from backend.core.notifications_db import query_notifications
             
-            with get_db_connection() as conn:
-                cursor = conn.cursor()
-                
-                # Build query based on member filter and read status
-                read_filter = "" if include_read else "AND (read IS NULL OR read = 0)"
-                
-                if member:
-                    cursor.execute(f"""
-                        SELECT id, type, title, message, recipient, status, metadata, created_at, sent_at, read
-                        FROM notifications
-                        WHERE (recipient = ? OR recipient = 'channel') {read_filter}
-                        ORDER BY created_at DESC
-                        LIMIT ?
-                    """, (member, limit))
-                else:
-                    cursor.execute(f"""
-                        SELECT id, type, title, message, recipient, status, metadata, created_at, sent_at, read
-                        FROM notifications
-                        WHERE 1=1 {read_filter}
-                        ORDER BY created_at DESC
-                        LIMIT ?
-                    """, (limit,))
-                
-                rows = cursor.fetchall()
-                
-                # Convert to notification format
-                notifications = []
-                for row in rows:
-                    notification = {
-                        "id": row["id"],
-                        "type": row["type"],
-                        "title": row["title"],
-                        "message": row["message"],
-                        "member": row["recipient"] if row["recipient"] != "channel" else None,
-                        "priority": "medium",  # Default priority
-                        "created_at": row["created_at"],
-                        "read": False  # Default to unread
-                    }
-                    
-                    # Parse metadata if exists
-                    if row["metadata"]:
-                        try:
-                            metadata = json.loads(row["metadata"])
-                            notification.update(metadata)
-                        except:
-                            pass
-                    
-                    notifications.append(notification)
-                
-                return notifications
+            rows = query_notifications(
+                limit=limit,
+                include_metadata=include_metadata,
+                member=member,
+                include_read=include_read,
+                priority=priority,
+                member_name=member_name,
+                milestone_type=milestone_type,
+                type=type,
+            )
+            
+            # Convert to notification format
+            notifications = []
+            for row in rows:
+                notification = {
+                    "id": row["id"],
+                    "type": row["type"],
+                    "title": row["title"],
+                    "message": row["message"],
+                    "member": row["recipient"] if row["recipient"] != "channel" else None,
+                    "priority": row["priority"] or "medium",
+                    "created_at": row["created_at"],
+                    "read": bool(row["read"])
+                }
+                for field in ("member_name", "milestone_type", "link", "action"):
+                    if row[field] is not None:
+                        notification[field] = row[field]
+                if include_metadata:
+                    notification.update(row["metadata"])
                 
+                notifications.append(notification)
+            
+            return notifications
+            
         except Exception as e:
             logger.error(f"Failed to get notifications from DB: {e}")
-            # Fallback to in-memory list if DB fails
+            # Fallback to the shared in-app list if the notifications table fails
+            filtered = self.notifications
             if member:
-                filtered = [n for n in self.notifications if n.get("member") == member]
-            else:
-                filtered = self.notifications
+                filtered = [n for n in filtered if n.get("member") == member]
+            wanted = {"priority": priority, "member_name": member_name, "milestone_type": milestone_type, "type": type}
+            filtered = [n for n in filtered if all(n.get(k) == v for k, v in wanted.items() if v)]
             
             sorted_notifications = sorted(
                 filtered,
@@ -363,7 +387,7 @@ class NotificationService:
         except Exception as e:
             logger.error(f"Failed to mark notifications as read: {e}")
         
-        # Also clear in-memory list (for backward compatibility)
+        # Also clear the shared in-app list (for backward compatibility)
         if member:
             self.notifications = [n for n in self.notifications if n.get("member") != member]
         else:
@@ -46,6 +46,19 @@ def calculate_streaks(history_data: List[Dict[str, Any]]) -> Dict[str, Any]:
             if current.get("totalSolved", 0) > previous.get("totalSolved", 0):
                 active_weeks.append(current["week_start"])
     
+    return calculate_streaks_from_active_weeks(active_weeks)
+
+
+def calculate_streaks_from_active_weeks(active_weeks: List[str]) -> Dict[str, Any]:
+    """
+    Calculate streak data from the weeks a member made progress.
+    
+    Args:
+        active_weeks: week_start dates with progress (oldest first)
+        
+    Returns:
+        Same dict as calculate_streaks
+    """
     # Calculate streaks
     current_streak = 0
     longest_streak = 0
@@ -138,6 +151,50 @@ def get_team_streaks(history: Dict[str, List[Dict[str, Any]]]) -> List[Dict[str,
     return team_streaks
 
 
+def get_team_streaks_from_deltas(member_deltas: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    """
+    Calculate streaks for all team members from weekly_deltas rows.
+    
+    A week counts as active when solved_delta > 0, which matches
+    calculate_streaks (a member's first snapshot counts its whole total).
+    
+    Args:
+        member_deltas: Dict mapping member usernames to DeltaRows (oldest first)
+        
+    Returns:
+        Same list as get_team_streaks
+    """
+    return get_team_streaks_from_active_weeks({
+        member: [d.week_start for d in deltas if d.solved_delta > 0]
+        for member, deltas in member_deltas.items()
+    })
+
+
+def get_team_streaks_from_active_weeks(member_active_weeks: Dict[str, List[str]]) -> List[Dict[str, Any]]:
+    """
+    Calculate streaks for all team members from their active weeks.
+    
+    Args:
+        member_active_weeks: Dict mapping member usernames to the weeks they
+            made progress (oldest first)
+        
+    Returns:
+        Same list as get_team_streaks
+    """
+    team_streaks = []
+    
+    for member, active_weeks in member_active_weeks.items():
+        team_streaks.append({
+            "member": member,
+            **calculate_streaks_from_active_weeks(active_weeks)
+        })
+    
+    # Sort by current streak (descending)
+    team_streaks.sort(key=lambda x: x["current_streak"], reverse=True)
+    
+    return team_streaks
+
+
 def get_streak_leaderboard(team_streaks: List[Dict[str, Any]], limit: int = 10) -> List[Dict[str, Any]]:
     """
     Get top members by current streak.
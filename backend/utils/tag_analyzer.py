@@ -30,7 +30,28 @@ def analyze_problem_tags(submissions: List[Dict[str, Any]]) -> Dict[str, Any]:
     Returns:
         Dict with tag counts, strengths, weaknesses, and recommendations
     """
-    if not submissions:
+    # Count tags
+    tag_counter = Counter()
+    for sub in submissions:
+        tags = sub.get("tags", [])
+        for tag in tags:
+            tag_counter[tag] += 1
+    
+    return analyze_tag_counts(tag_counter, len(submissions))
+
+
+def analyze_tag_counts(tag_counter: Counter, total_problems: int) -> Dict[str, Any]:
+    """
+    Analyze per-tag solved counts (the aggregates behind analyze_problem_tags).
+    
+    Args:
+        tag_counter: Solved problems per tag (equal counts are listed in its order)
+        total_problems: Problems the counts were taken from
+        
+    Returns:
+        Dict with tag counts, strengths, weaknesses, and recommendations
+    """
+    if not total_problems:
         return {
             "tag_counts": {},
             "total_unique_tags": 0,
@@ -40,16 +61,8 @@ def analyze_problem_tags(submissions: List[Dict[str, Any]]) -> Dict[str, Any]:
             "recommendation": "Start solving problems to build tag history"
         }
     
-    # Count tags
-    tag_counter = Counter()
-    for sub in submissions:
-        tags = sub.get("tags", [])
-        for tag in tags:
-            tag_counter[tag] += 1
-    
     # Calculate statistics
     total_unique_tags = len(tag_counter)
-    total_problems = len(submissions)
     
     # Get top tags (strengths)
     top_tags = [
@@ -132,6 +145,36 @@ def get_team_tag_analysis(member_submissions: Dict[str, List[Dict[str, Any]]]) -
     return team_analysis
 
 
+def get_team_tag_analysis_from_counts(
+    member_tag_counts: Dict[str, Counter],
+    member_totals: Dict[str, int],
+    members: List[str]
+) -> List[Dict[str, Any]]:
+    """
+    Analyze tags for all team members from stored per-tag counts.
+    
+    Args:
+        member_tag_counts: Dict mapping member usernames to their tag Counter
+        member_totals: Dict mapping member usernames to their solved problem count
+        members: Members to include (members without counts get the empty analysis)
+        
+    Returns:
+        List of dicts with member and their tag analysis, by coverage score
+    """
+    team_analysis = [
+        {
+            "member": member,
+            **analyze_tag_counts(member_tag_counts.get(member, Counter()), member_totals.get(member, 0))
+        }
+        for member in members
+    ]
+    
+    # Sort by coverage score (descending)
+    team_analysis.sort(key=lambda x: x["coverage_score"], reverse=True)
+    
+    return team_analysis
+
+
 def get_team_tag_heatmap(team_analysis: List[Dict[str, Any]]) -> Dict[str, Any]:
     """
     Create a heatmap of team's collective tag coverage.
@@ -150,6 +193,19 @@ def get_team_tag_heatmap(team_analysis: List[Dict[str, Any]]) -> Dict[str, Any]:
         for tag, count in tag_counts.items():
             team_tag_counter[tag] += count
     
+    return team_tag_heatmap_from_counts(team_tag_counter)
+
+
+def team_tag_heatmap_from_counts(team_tag_counter: Counter) -> Dict[str, Any]:
+    """
+    Team-wide tag statistics from per-tag counts summed over the team.
+    
+    Args:
+        team_tag_counter: Solved problems per tag across all members
+        
+    Returns:
+        Dict with team-wide tag statistics
+    """
     # Calculate team strengths and weaknesses
     total_team_problems = sum(team_tag_counter.values())
     
@@ -0,0 +1,184 @@
+"""
+Week-over-week engine shared by /analytics/week-over-week and the Excel export.
+
+Delta rows are loaded once into a member x week HistoryMatrix, so each week
+offset is a column read and "most recent snapshot before" fallbacks are a
+binary search over the weeks plus a forward-filled column index. Members
+without a snapshot for the open week get their live totals in one parallel
+batch.
+"""
+
+from bisect import bisect_left
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from backend.core.closed_weeks import closed_week_fingerprint, current_week_start, get_closed_week, set_closed_week
+from backend.core.database import get_team_members_from_db
+from backend.core.weekly_deltas import DeltaRow, query_weekly_deltas
+from backend.utils.history_matrix import HistoryMatrix, rank_descending
+from backend.utils.leetcodeapi import fetch_for_members, fetch_user_data
+
+LIVE_FILL_WORKERS = 10
+
+# weekly_deltas columns kept per member and week
+DELTA_FIELDS = ("total", "prev_total", "rank")
+
+
+def rank_by_total(totals: Dict[str, int]) -> Dict[str, int]:
+    """1-based standings by total, highest first (ties keep the dict's order)"""
+    ranks = rank_descending(np.array(list(totals.values()), dtype=float))
+    return dict(zip(totals, ranks.tolist()))
+
+
+def week_pair(matrix: HistoryMatrix, week_start: str) -> Dict[str, Dict[str, int]]:
+    """Totals and standings of one week next to each member's previous snapshot"""
+    totals = matrix.field("total")
+    column = matrix.week_index.get(week_start)
+    if column is None:
+        has_row = np.zeros(len(matrix.members), dtype=bool)
+        current = prev_totals = ranks = np.full(len(matrix.members), np.nan)
+    else:
+        has_row = matrix.present[:, column]
+        current = totals[:, column]
+        prev_totals = matrix.field("prev_total")[:, column]
+        ranks = matrix.field("rank")[:, column]
+
+    # No snapshot this week: compare against the most recent one before it
+    before = bisect_left(matrix.weeks, week_start) - 1
+    fallback = matrix.last_index()[:, before] if before >= 0 else np.full(len(matrix.members), -1)
+    fallback_totals = np.take_along_axis(totals, np.maximum(fallback, 0)[:, None], axis=1)[:, 0]
+
+    # A delta row already points at the most recent earlier snapshot
+    previous = np.where(has_row, prev_totals, np.where(fallback >= 0, fallback_totals, np.nan))
+
+    current_week_data = {}
+    previous_week_data = {}
+    current_week_ranks = {}
+    for member, row, total, rank, prev in zip(
+        matrix.members, has_row.tolist(), current.tolist(), ranks.tolist(), previous.tolist()
+    ):
+        if row:
+            current_week_data[member] = int(total)
+            current_week_ranks[member] = int(rank)
+        if prev == prev:  # not NaN
+            previous_week_data[member] = int(prev)
+
+    # Previous standings mix weeks for members with gaps, so rank the compared values
+    return {
+        "current": current_week_data,
+        "previous": previous_week_data,
+        "current_ranks": current_week_ranks,
+        "previous_ranks": rank_by_total(previous_week_data),
+    }
+
+
+def fetch_live_totals(members: Iterable[str], profiles: Optional[Dict[str, Optional[dict]]] = None) -> Dict[str, int]:
+    """
+    Live totalSolved for the given members (failures and zeros are left out),
+    fetched in one parallel batch unless their profiles were already fetched
+    """
+    members = list(members)
+    if profiles is None:
+        profiles = fetch_for_members(fetch_user_data, members, max_workers=LIVE_FILL_WORKERS)
+    totals = {member: (profiles.get(member) or {}).get("totalSolved", 0) for member in members}
+    return {member: total for member, total in totals.items() if total > 0}
+
+
+def _change_row(formatted_week: str, member: str, pair: Dict[str, Dict[str, int]]) -> Dict[str, Any]:
+    current_val = pair["current"].get(member, 0)
+    previous_val = pair["previous"].get(member, 0)
+    change = current_val - previous_val
+
+    if previous_val > 0:
+        pct_change = (change / previous_val) * 100
+    elif current_val > 0:
+        pct_change = 100.0
+    else:
+        pct_change = 0.0
+
+    current_rank = pair["current_ranks"].get(member)
+    previous_rank = pair["previous_ranks"].get(member)
+    rank_delta = previous_rank - current_rank if current_rank and previous_rank else 0
+
+    return {
+        "week": formatted_week,
+        "member": member,
+        "previous": previous_val,
+        "current": current_val,
+        "change": change,
+        "pct_change": round(pct_change, 1),
+        "rank": current_rank if current_rank else 0,
+        "rank_delta": rank_delta
+    }
+
+
+def compute_week_over_week(
+    username: str,
+    weeks: int,
+    profiles: Optional[Dict[str, Optional[dict]]] = None,
+    user_members_raw: Optional[List[dict]] = None,
+    recent_deltas: Optional[List[DeltaRow]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Week-over-week rows for the last N weeks, newest week first.
+
+    Pairs for closed weeks are cached permanently (see backend.core.closed_weeks);
+    only the open week is recomputed, from each member's latest delta row.
+    Live totals, the member list and the newest delta rows per member (any
+    number up to the open week) come from the caller when it already loaded them.
+    """
+    today = date.today()
+    this_week_start = current_week_start(today)
+
+    # The latest delta row per member is either this week's or the one before it
+    if recent_deltas is None:
+        open_deltas = query_weekly_deltas(username, until=this_week_start, last_n=1, replica=True)
+    else:
+        # Rows come by member, then week: the last one per member wins
+        open_deltas = list({d.member: d for d in recent_deltas if d.week_start <= this_week_start}.values())
+    if not open_deltas:
+        return []
+
+    if user_members_raw is None:
+        user_members_raw = get_team_members_from_db(username, replica=True)
+    # Suspended members are left out of the rows
+    user_members = [m["username"] for m in user_members_raw if m.get("status", "active") != "suspended"]
+    fingerprint = closed_week_fingerprint(username)
+
+    past_weeks = [(today - timedelta(days=today.weekday() + 7 * w)).isoformat() for w in range(1, weeks)]
+    pairs = {}
+    missing = []
+    for week in past_weeks:
+        pair = get_closed_week(username, "wow", week, fingerprint)
+        if pair is None:
+            missing.append(week)
+        else:
+            pairs[week] = pair
+
+    if missing:
+        # Each missing week needs its own row and the most recent one before it,
+        # so nothing older than span + 2 snapshots back is loaded
+        span = (date.fromisoformat(missing[0]) - date.fromisoformat(missing[-1])).days // 7
+        matrix = HistoryMatrix.from_rows(
+            query_weekly_deltas(username, until=missing[0], last_n=span + 2), DELTA_FIELDS
+        )
+        for week in missing:
+            pairs[week] = week_pair(matrix, week)
+            set_closed_week(username, "wow", pairs[week], week, fingerprint)
+
+    # The open week falls back to live totals for members without a (non-zero) snapshot
+    current = week_pair(HistoryMatrix.from_rows(open_deltas, DELTA_FIELDS), this_week_start)
+    current["current"].update(fetch_live_totals(
+        (m for m in user_members if not current["current"].get(m)), profiles
+    ))
+    current["current_ranks"] = rank_by_total(current["current"])
+    pairs[this_week_start] = current
+
+    changes = []
+    for week_start in [this_week_start] + past_weeks:
+        formatted_week = date.fromisoformat(week_start).strftime("%b %d, %Y")
+        pair = pairs[week_start]
+        changes.extend(_change_row(formatted_week, member, pair) for member in user_members)
+    return changes
@@ -23,11 +23,16 @@ try:
     from concurrent.futures import ThreadPoolExecutor, as_completed
     from backend.core.config import settings
     from backend.core.storage import read_json, write_json
+    from backend.core.last_state_db import update_last_state
+    from backend.core.sharding import fan_out, owner_scope, sharding_enabled
     from backend.utils.notification_service import (
         check_and_notify_new_submissions,
         check_and_notify_milestones,
-        notify_daily_challenge
+        notify_daily_challenge,
+        notification_service
     )
+    from backend.services.cache_warmer import cache_warmer
+    from backend.services.tag_sync import sync_team_tags
     print("Imports completed successfully.", flush=True)
 except Exception as e:
     print(f"CRITICAL ERROR during imports: {e}", flush=True)
@@ -80,8 +85,10 @@ class DataScheduler:
             for owner, members in all_members.items():
                 user_last_state = last_state.get(owner, {})
                 new_state = {}
+                solved_more = []
                 
-                with ThreadPoolExecutor(max_workers=5) as executor:
+                # Notifications for this owner are written to the team's DB in one transaction
+                with owner_scope(owner), ThreadPoolExecutor(max_workers=5) as executor, notification_service.batched_saves():
                     future_to_member = {
                         executor.submit(fetch_user_data, member["username"]): member
                         for member in members
@@ -109,6 +116,7 @@ class DataScheduler:
                                 
                                 if current_total > previous_total:
                                     logger.info(f"Detected change for {member_username}: {previous_total} -> {current_total} (+{current_total - previous_total})")
+                                    solved_more.append(member_username)
                                 
                                 # Check for new submissions
                                 check_and_notify_new_submissions(
@@ -132,9 +140,25 @@ class DataScheduler:
                 user_last_state.update(new_state)
                 last_state[owner] = user_last_state
                 
+                # Mirror it into the team's database; changed counts advance the
+                # owner's data version and invalidate its cached analytics
+                if new_state:
+                    with owner_scope(owner):
+                        update_last_state(owner, new_state)
+                
+                # Fold newly accepted problems into the team's tag aggregates
+                try:
+                    with owner_scope(owner):
+                        recorded = sync_team_tags([m["username"] for m in members], solved_more)
+                    if any(recorded.values()):
+                        logger.info(f"Recorded {sum(recorded.values())} new accepted problems for team '{owner}'")
+                except Exception as e:
+                    logger.error(f"Error syncing tag stats for team '{owner}': {e}")
+                
             # Save updated state
             write_json(settings.LAST_STATE_FILE, last_state)
             logger.info("Submission check completed.")
+            cache_warmer.start("scheduler")
             
         except Exception as e:
             logger.error(f"Error in check_new_submissions: {e}", exc_info=True)
@@ -153,6 +177,36 @@ class DataScheduler:
         except Exception as e:
             logger.error(f"Error checking daily challenge: {e}", exc_info=True)
 
+    def sweep_cache(self):
+        """Delete expired api_cache rows and enforce the cache size cap."""
+        try:
+            from backend.core.database import sweep_api_cache
+            result = sweep_api_cache()
+            if sharding_enabled():
+                # Each team shard has its own api_cache table
+                for shard_result in fan_out(lambda owner: sweep_api_cache()).values():
+                    for field in result:
+                        result[field] += shard_result[field]
+            logger.info(
+                f"Cache sweep completed: {result['expired']} expired, "
+                f"{result['evicted']} evicted, {result['remaining_bytes']} bytes remaining"
+            )
+            from backend.core.shared_state import DatabaseStore, get_shared_store
+            store = get_shared_store()
+            if isinstance(store, DatabaseStore):
+                # Redis expires its keys itself
+                logger.info(f"Shared state sweep: {store.sweep_expired()} expired")
+        except Exception as e:
+            logger.error(f"Error sweeping api_cache: {e}", exc_info=True)
+
+    def maintain_database(self):
+        """Refresh planner statistics and reclaim free pages, unless the API is busy."""
+        try:
+            from backend.core.maintenance import run_maintenance
+            run_maintenance()
+        except Exception as e:
+            logger.error(f"Error in database maintenance: {e}", exc_info=True)
+
     def fetch_and_record_all_teams(self):
         """Fetch data for all teams and record to history."""
         logger.info("Starting scheduled data fetch...")
@@ -216,6 +270,7 @@ class DataScheduler:
                         logger.error(f"Error recording history for team '{owner}': {e}")
 
             logger.info(f"Scheduled fetch completed: {teams_processed} teams, {members_processed} members processed")
+            cache_warmer.start("scheduler")
 
         except Exception as e:
             logger.error(f"Error in fetch_and_record_all_teams: {e}", exc_info=True)
@@ -280,6 +335,12 @@ class DataScheduler:
         
         # Schedule weekly backup (Sunday at 02:00 AM)
         schedule.every().sunday.at("02:00").do(self.backup_data)
+        
+        # Schedule api_cache sweep (expired rows + size cap)
+        schedule.every(settings.CACHE_SWEEP_INTERVAL_MINUTES).minutes.do(self.sweep_cache)
+        
+        # Schedule database maintenance (skips itself while the API is busy)
+        schedule.every(settings.MAINTENANCE_INTERVAL_MINUTES).minutes.do(self.maintain_database)
 
         logger.info("Scheduler started. Waiting for scheduled tasks...")
         logger.info("Scheduled jobs:")
@@ -12,8 +12,8 @@ def iso_week_start(d: date) -> date:
     return d - timedelta(days=d.weekday())
 
 
-from datetime import datetime
-from backend.core.database import get_db_connection
+from backend.core.bulk_db import bulk_insert_snapshots
+from backend.core.sharding import owner_scope
 
 class HistoryService:
     def __init__(self, storage: Storage):
@@ -27,47 +27,39 @@ class HistoryService:
         pass
 
     def record_weekly(self, owner: str, team_data: List[Dict[str, Any]], when: Optional[date] = None) -> Dict[str, Any]:
+        """Record this week's snapshot for every member in one transaction; returns {username: outcome status}"""
         week_start_str = iso_week_start(when or date.today()).isoformat()
+        rows = []
         
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
+        for member in team_data:
+            # Extract difficulty
+            easy = int(member.get("easy", 0))
+            medium = int(member.get("medium", 0))
+            hard = int(member.get("hard", 0))
             
-            for member in team_data:
-                uname = member["username"]
-                total = int(member.get("totalSolved", 0))
-                
-                # Extract difficulty
-                easy = int(member.get("easy", 0))
-                medium = int(member.get("medium", 0))
-                hard = int(member.get("hard", 0))
-                
-                # If difficulty not in top level, check submissions list (legacy format)
-                if easy == 0 and medium == 0 and hard == 0:
-                     for s in member.get("submissions", []):
-                        if s.get("difficulty") == "Easy":
-                            easy = int(s.get("count", 0))
-                        elif s.get("difficulty") == "Medium":
-                            medium = int(s.get("count", 0))
-                        elif s.get("difficulty") == "Hard":
-                            hard = int(s.get("count", 0))
+            # If difficulty not in top level, check submissions list (legacy format)
+            if easy == 0 and medium == 0 and hard == 0:
+                 for s in member.get("submissions", []):
+                    if s.get("difficulty") == "Easy":
+                        easy = int(s.get("count", 0))
+                    elif s.get("difficulty") == "Medium":
+                        medium = int(s.get("count", 0))
+                    elif s.get("difficulty") == "Hard":
+                        hard = int(s.get("count", 0))
 
-                try:
-                    cursor.execute("""
-                    INSERT OR IGNORE INTO snapshots 
-                    (username, week_start, total_solved, easy, medium, hard, timestamp)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        uname,
-                        week_start_str,
-                        total,
-                        easy,
-                        medium,
-                        hard,
-                        datetime.utcnow().isoformat()
-                    ))
-                except Exception as e:
-                    print(f"Error recording history for {uname}: {e}")
-            
-            conn.commit()
+            rows.append({
+                "username": member.get("username"),
+                "week_start": week_start_str,
+                "totalSolved": member.get("totalSolved", 0),
+                "easy": easy,
+                "medium": medium,
+                "hard": hard,
+            })
+        
+        with owner_scope(owner):
+            outcomes = bulk_insert_snapshots(rows)
+        for outcome in outcomes:
+            if outcome.status == "error":
+                print(f"Error recording history for {outcome.key[0]}: {outcome.error}")
             
-        return {}
+        return {outcome.key[0]: outcome.status for outcome in outcomes}
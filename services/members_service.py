@@ -3,6 +3,7 @@ from __future__ import annotations
 from typing import List, Dict, Any
 
 from backend.core.database import get_db_connection
+from backend.core.sharding import fan_out, owner_scope, sharding_enabled
 
 # Replaces Storage-based implementation with DB implementation
 class MembersService:
@@ -12,6 +13,14 @@ class MembersService:
 
     def load_all_members(self) -> Dict[str, Any]:
         """Load all members grouped by team owner"""
+        if sharding_enabled():
+            result = {}
+            for team in fan_out(lambda owner: self._load_active_members()).values():
+                result.update(team)
+            return result
+        return self._load_active_members()
+
+    def _load_active_members(self) -> Dict[str, Any]:
         result = {}
         with get_db_connection() as conn:
             cursor = conn.cursor()
@@ -33,7 +42,7 @@ class MembersService:
         pass
 
     def load_members(self, owner: str) -> List[Dict[str, str]]:
-        with get_db_connection() as conn:
+        with owner_scope(owner), get_db_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT username, name, team_owner, status FROM members WHERE team_owner = ?", (owner,))
             return [dict(row) for row in cursor.fetchall()]